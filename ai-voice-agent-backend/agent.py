@@ -1,50 +1,91 @@
+import asyncio
 import logging
-from dotenv import load_dotenv
 from livekit.agents import (
     AgentSession,
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    UserInputTranscribedEvent,
+    NOT_GIVEN,
     WorkerOptions,
     cli,
     metrics,
 )
-from livekit.plugins import deepgram, cartesia, anthropic, silero, tavus
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-from agent_definition import AppointmentAgent
-from config import TAVUS_REPLICA_ID, TAVUS_PERSONA_ID
+from livekit.agents.metrics import LLMMetrics
+from agent_definition import AppointmentAgent, preidentify_caller, speculate_from_transcript
+from event_publisher import close_publisher
+from session_state import SessionState
+from audio_cache import fixed_phrases, synthesize_missing
+from prewarm import default_components, run_prewarm
+from plugins import (
+    avatar_enabled,
+    build_avatar,
+    build_llm,
+    build_stt,
+    build_tts,
+    build_turn_detection,
+    load_plugins,
+    required_plugins,
+)
+from config import PROMETHEUS_PORT, PREWARM_TIMEOUT_SECONDS
+import telemetry
 
-load_dotenv()
 logger = logging.getLogger("voice-agent")
 
 
 def prewarm(proc: JobProcess):
-    """Pre-load the VAD model for faster startup."""
-    proc.userdata["vad"] = silero.VAD.load()
+    """Load models and open connections concurrently before the process takes a job.
+
+    Raises if a required model fails to load, so LiveKit never hands a job to a
+    cold or broken process.
+    """
+    run_prewarm(default_components(), proc.userdata, imports=required_plugins())
+
+
+async def _identify_joining_caller(ctx: JobContext, state: SessionState) -> dict | None:
+    """Look up the caller from the joining participant's metadata."""
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    return await preidentify_caller(state, participant.metadata, ctx.room)
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
 
 
 async def entrypoint(ctx: JobContext):
     """Main entry point for each voice agent session."""
-    session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=anthropic.LLM(model="claude-sonnet-4-20250514"),
-        tts=cartesia.TTS(model="sonic"),
-        turn_detection=MultilingualModel(),
+    state = SessionState()
+    # Runs while the session and avatar start up; the greeting waits for it briefly
+    caller_lookup = asyncio.create_task(_identify_joining_caller(ctx, state))
+
+    session = AgentSession[SessionState](
+        userdata=state,
+        stt=build_stt(),
+        llm=build_llm(),
+        tts=build_tts(),
+        turn_detection=build_turn_detection(),
         vad=ctx.proc.userdata["vad"],
     )
 
+    # Greeting and filler audio missing from the on-disk cache (usually only on a fresh host)
+    fixed_audio = asyncio.create_task(synthesize_missing(session.tts, fixed_phrases()))
+    ctx.add_shutdown_callback(lambda: _cancel(fixed_audio))
+
     # Tavus avatar: captures agent audio, renders lip-synced video
-    if TAVUS_REPLICA_ID and TAVUS_PERSONA_ID:
+    if avatar_enabled():
         try:
-            avatar = tavus.AvatarSession(
-                replica_id=TAVUS_REPLICA_ID,
-                persona_id=TAVUS_PERSONA_ID,
-            )
+            avatar = build_avatar()
             await avatar.start(session, room=ctx.room)
             logger.info("Tavus avatar started successfully")
         except Exception as e:
             logger.warning(f"Tavus avatar failed to start (continuing without avatar): {e}")
 
+    # Look up phone numbers and dates while the caller is still saying them
+    @session.on("user_input_transcribed")
+    def _on_transcript(ev: UserInputTranscribedEvent):
+        speculate_from_transcript(state, ev.transcript, ev.is_final)
+
     # Metrics logging
     usage_collector = metrics.UsageCollector()
 
@@ -52,24 +93,39 @@ async def entrypoint(ctx: JobContext):
     def _on_metrics(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        if isinstance(ev.metrics, LLMMetrics):
+            telemetry.record_llm_usage(ev.metrics)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        if summary.llm_prompt_tokens:
+            cached = summary.llm_prompt_cached_tokens / summary.llm_prompt_tokens
+            logger.info(f"Prompt cache: {summary.llm_prompt_cached_tokens}/{summary.llm_prompt_tokens} "
+                        f"prompt tokens read from cache ({cached:.0%})")
+        telemetry.log_snapshot()
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(lambda: close_publisher(ctx.room))
 
     # Start the session with the appointment agent
     await session.start(
-        agent=AppointmentAgent(),
+        agent=AppointmentAgent(caller_lookup=caller_lookup),
         room=ctx.room,
     )
 
 
 if __name__ == "__main__":
+    # The worker process itself needs the plugins registered: download-files
+    # fetches their model files and the turn detector's inference runner starts here
+    load_plugins()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            # Headroom over the prewarm deadline before LiveKit gives up on the process
+            initialize_process_timeout=PREWARM_TIMEOUT_SECONDS + 5,
+            # Serves livekit's worker metrics plus our span histograms at /metrics
+            prometheus_port=PROMETHEUS_PORT or NOT_GIVEN,
         )
     )
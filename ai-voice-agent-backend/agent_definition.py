@@ -1,10 +1,37 @@
+import asyncio
+import functools
+import inspect
 import json
 import logging
+import time
+from datetime import timedelta
 from livekit.agents import Agent, RunContext
 from livekit.agents.llm import function_tool
 from tools import appointment_tools
+from tools.phone import normalize_phone
+from tools.clinic_time import clinic_today
+from tools.transcript_entities import find_phone, find_date
+from db.storage import StoreUnavailable
+from db.resilience import latency_budget
 from models import ToolCallEvent
-from config import SYSTEM_PROMPT, TOOL_CALL_TOPIC, CALL_SUMMARY_TOPIC
+from event_publisher import publisher_for, flush_publisher
+from telemetry import span, traced, detached_task
+import audio_cache
+from filler import masked
+from session_state import SessionState
+from prompts import build_system_prompt, prefix_fingerprint
+from result_shaping import shape_slots, shape_appointments, shape_write_result, system_busy
+from config import (
+    TOOL_LATENCY_BUDGETS_MS,
+    CALL_SUMMARY_TOPIC,
+    PREIDENTIFY_TIMEOUT_SECONDS,
+    PREFETCH_TTL_SECONDS,
+    SPECULATION_TTL_SECONDS,
+    SPECULATION_MAX_PER_CALL,
+    GREETING_TEXT,
+    KNOWN_CALLER_NOTE,
+    NEW_CALLER_NOTE,
+)
 
 logger = logging.getLogger("appointment-agent")
 
@@ -14,29 +41,213 @@ def _get_room(context: RunContext):
     return context.session.room_io.room
 
 
+async def _swallow_errors(tool: str, fn, *args):
+    """Run a speculative lookup within `tool`'s latency budget; a failure just means the
+    real tool call goes live."""
+    try:
+        with latency_budget(TOOL_LATENCY_BUDGETS_MS[tool] / 1000):
+            return await fn(*args)
+    except Exception as e:
+        logger.debug(f"Prefetch failed: {e}")
+        return None
+
+
+def _log_late_lookup(lookup: asyncio.Future) -> None:
+    """Retrieve the outcome of a caller lookup nobody waits for any more, logging a failure."""
+    if not lookup.cancelled() and lookup.exception() is not None:
+        logger.warning(f"Caller lookup failed after the greeting: {lookup.exception()}")
+
+
+def _to_json(result) -> str:
+    """Serialize a tool result for the LLM."""
+    with span("serialize"):
+        return json.dumps(result, default=str, separators=(",", ":"))
+
+
+def _within_budget(tool: str):
+    """Decorator: run an agent tool within its latency budget. If storage is unavailable
+    (slow, failing or behind an open circuit), answer with a busy result the agent can
+    speak instead of failing the call."""
+    budget = TOOL_LATENCY_BUDGETS_MS[tool] / 1000
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(self, context, *args, **kwargs):
+            try:
+                with latency_budget(budget):
+                    return await fn(self, context, *args, **kwargs)
+            except StoreUnavailable as e:
+                logger.warning(f"{tool} failed fast: {e}")
+                arguments = signature.bind(self, context, *args, **kwargs).arguments
+                arguments = {k: v for k, v in arguments.items() if k not in ("self", "context")}
+                result = system_busy(tool)
+                self._publish_tool_event(context, ToolCallEvent.now(tool, "error", arguments, result))
+                return _to_json(result)
+        return wrapper
+    return decorator
+
+
+def _get_state(context: RunContext) -> SessionState:
+    """Get the per-call SessionState attached to the AgentSession."""
+    return context.userdata
+
+
+def _start_prefetch(state: SessionState, phone_number: str, found: bool) -> None:
+    """Warm the lookups the LLM almost always makes right after identify_user."""
+    today = clinic_today()
+    tomorrow = today + timedelta(days=1)
+    lookups = {
+        ("slots", ""): ("fetch_slots", appointment_tools.fetch_available_slots, None),
+        ("slots", today.isoformat()): ("fetch_slots", appointment_tools.fetch_available_slots, today.isoformat()),
+        ("slots", tomorrow.isoformat()): ("fetch_slots", appointment_tools.fetch_available_slots, tomorrow.isoformat()),
+    }
+    if found:
+        lookups[("appointments", phone_number)] = (
+            "retrieve_appointments", appointment_tools.retrieve_appointments, phone_number
+        )
+
+    for key, (tool, fn, arg) in lookups.items():
+        if key not in state.prefetched:
+            _prefetch(state, key, tool, fn, arg, PREFETCH_TTL_SECONDS)
+
+
+def _prefetch(state: SessionState, key: tuple[str, str], tool: str, fn, arg, ttl: float) -> None:
+    """Start a lookup whose result a tool may take within `ttl` seconds; older, it is
+    a snapshot that misses other callers' bookings."""
+    state.prefetched[key] = detached_task(_swallow_errors(tool, fn, arg))
+    state.prefetch_expires[key] = time.monotonic() + ttl
+
+
+def _remember_caller(state: SessionState, caller: dict) -> None:
+    """Store an identify result on the session and start the follow-up prefetches."""
+    state.caller = caller
+    # An unknown caller has no appointments yet
+    state.appointments = None if caller.get("found") else []
+    _start_prefetch(state, caller["phone"], caller.get("found", False))
+
+
+def _speculate(state: SessionState, key: tuple[str, str], tool: str, fn, arg: str) -> None:
+    if key in state.prefetched or state.speculations >= SPECULATION_MAX_PER_CALL:
+        return
+    state.speculations += 1
+    _prefetch(state, key, tool, fn, arg, SPECULATION_TTL_SECONDS)
+    logger.debug(f"Speculating {tool}({arg}) from the transcript")
+
+
+def speculate_from_transcript(state: SessionState, transcript: str, final: bool = False) -> None:
+    """Start the read-only lookups for a phone number or date the caller is saying.
+
+    Called for every (interim) transcript, so identify_user and fetch_slots often
+    find their answer already in `state.prefetched` when the LLM calls them. Only
+    reads are speculated; the results expire after SPECULATION_TTL_SECONDS.
+    """
+    phone_number = find_phone(transcript, final)
+    if phone_number and not state.is_caller(phone_number):
+        _speculate(state, ("caller", phone_number), "identify_user",
+                   appointment_tools.identify_user_by_phone, phone_number)
+    day = find_date(transcript, clinic_today(), final)
+    if day:
+        _speculate(state, ("slots", day), "fetch_slots", appointment_tools.fetch_available_slots, day)
+
+
+def phone_from_metadata(metadata: str | None) -> str | None:
+    """The caller's phone number from participant metadata set by the token route."""
+    try:
+        phone_number = json.loads(metadata or "{}").get("phoneNumber")
+    except (ValueError, AttributeError):
+        return None
+    return phone_number or None
+
+
+async def preidentify_caller(state: SessionState, metadata: str | None, room=None) -> dict | None:
+    """Identify the caller from participant metadata before the first turn.
+
+    Runs alongside session startup so the greeting can already use the caller's
+    name, and tells the frontend as if `identify_user` had been called.
+    """
+    phone_number = phone_from_metadata(metadata)
+    if not phone_number:
+        return None
+    with span("preidentify"):
+        result = await appointment_tools.identify_user_by_phone(phone_number)
+    _remember_caller(state, result)
+    if room is not None:
+        publisher_for(room).publish(ToolCallEvent.now(
+            "identify_user", "completed", {"phone_number": phone_number}, result
+        ))
+    return result
+
+
+def caller_note(caller: dict) -> str:
+    """Initial-context note telling the LLM who is calling."""
+    if caller.get("found"):
+        return KNOWN_CALLER_NOTE.format(name=caller.get("name"), phone=caller["phone"])
+    return NEW_CALLER_NOTE.format(phone=caller["phone"])
+
+
+async def _take_prefetched(state: SessionState, kind: str, argument: str):
+    """Return a prefetched result (once), or None if nothing usable was prefetched."""
+    task = state.prefetched.pop((kind, argument), None)
+    expires = state.prefetch_expires.pop((kind, argument), None)
+    if task is None:
+        return None
+    if expires is not None and time.monotonic() > expires:
+        task.cancel()  # Too old to answer from
+        return None
+    return await task
+
+
 class AppointmentAgent(Agent):
-    def __init__(self) -> None:
-        super().__init__(instructions=SYSTEM_PROMPT)
+    def __init__(self, caller_lookup: asyncio.Future | None = None) -> None:
+        super().__init__(instructions=build_system_prompt())
+        # Caller identification started at room join (see preidentify_caller)
+        self._caller_lookup = caller_lookup
 
     async def on_enter(self):
-        """Called when agent starts. Generate initial greeting."""
+        """Called when agent starts. Greet the caller."""
+        logger.info(f"LLM prefix fingerprint: {prefix_fingerprint(self.instructions, self.tools)}")
+        caller = await self._wait_for_caller()
+        if caller is None and GREETING_TEXT:
+            # The same words for every unidentified caller: play them from the audio cache
+            # instead of an LLM + TTS round trip
+            audio_cache.say(self.session, GREETING_TEXT)
+            return
+        if caller is not None:
+            chat_ctx = self.chat_ctx.copy()
+            chat_ctx.add_message(role="system", content=caller_note(caller))
+            await self.update_chat_ctx(chat_ctx)
         self.session.generate_reply()
 
-    async def _publish_tool_event(self, context: RunContext, event: ToolCallEvent):
-        """Publish a tool call event to the frontend via data channel."""
+    async def _wait_for_caller(self) -> dict | None:
+        """The pre-identified caller, or None if there is none or it isn't ready in time."""
+        if self._caller_lookup is None:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._caller_lookup), PREIDENTIFY_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Caller lookup not ready in time; greeting without it")
+            # It keeps running (it also fills the session state); don't leave a failure unretrieved
+            self._caller_lookup.add_done_callback(_log_late_lookup)
+        except Exception as e:
+            logger.warning(f"Caller lookup failed: {e}")
+        return None
+
+    def _publish_tool_event(self, context: RunContext, event: ToolCallEvent):
+        """Queue a tool call event for the frontend; never blocks the tool."""
         try:
             room = _get_room(context)
             if room and room.local_participant:
-                await room.local_participant.publish_data(
-                    payload=event.model_dump_json().encode("utf-8"),
-                    reliable=True,
-                    topic=TOOL_CALL_TOPIC,
-                )
+                with span("publish"):
+                    publisher_for(room).publish(event)
         except Exception as e:
             logger.warning(f"Failed to publish tool event: {e}")
 
     # ---- Tool 1: Identify User ----
     @function_tool
+    @traced("tool.identify_user")
+    @_within_budget("identify_user")
     async def identify_user(self, context: RunContext, phone_number: str):
         """Identify a user by their phone number. Call this when the user provides their
         phone number at the start of the conversation.
@@ -45,36 +256,98 @@ class AppointmentAgent(Agent):
             phone_number: The user's phone number (e.g., +1234567890)
         """
         args = {"phone_number": phone_number}
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("identify_user", "started", args)
         )
-        result = await appointment_tools.identify_user_by_phone(phone_number)
-        await self._publish_tool_event(
+        state = _get_state(context)
+        if state.is_caller(phone_number):
+            result = state.caller
+        else:
+            result = await _take_prefetched(state, "caller", normalize_phone(phone_number))
+            if result is None:
+                result = await appointment_tools.identify_user_by_phone(phone_number)
+            _remember_caller(state, result)
+        self._publish_tool_event(
             context, ToolCallEvent.now("identify_user", "completed", args, result)
         )
-        return json.dumps(result)
+        return _to_json(result)
 
     # ---- Tool 2: Fetch Slots ----
     @function_tool
-    async def fetch_slots(self, context: RunContext, preferred_date: str = ""):
-        """Fetch available appointment slots. Optionally filter by a specific date.
+    @traced("tool.fetch_slots")
+    @masked("fetch_slots")
+    @_within_budget("fetch_slots")
+    async def fetch_slots(
+        self,
+        context: RunContext,
+        preferred_date: str = "",
+        end_date: str = "",
+        earliest_time: str = "",
+        latest_time: str = "",
+        after: str = "",
+        limit: int = 0,
+        doctor: str = "",
+        clinic: str = "",
+    ):
+        """Fetch available appointment slots. Narrow the search to what the patient asked for.
+
+        Returns start times grouped by day as ranges: "09:00-11:30" means a slot
+        every `slot_minutes` from 09:00 through 11:30.
 
         Args:
-            preferred_date: Optional date in YYYY-MM-DD format to filter slots
+            preferred_date: Optional date in YYYY-MM-DD format; alone, only that day is searched
+            end_date: Optional last date (YYYY-MM-DD) to search a range from preferred_date
+            earliest_time: Optional earliest start time in HH:MM, e.g. "13:00" for afternoons
+            latest_time: Optional latest start time in HH:MM
+            after: Optional "YYYY-MM-DD HH:MM"; only slots strictly after it, for "the next opening after ..."
+            limit: Optional maximum number of slots, e.g. 1 for "the first available"
+            doctor: Optional doctor name, when the patient wants a specific doctor
+            clinic: Optional clinic name, to only search doctors at that clinic
         """
-        args = {"preferred_date": preferred_date}
-        await self._publish_tool_event(
+        args = {
+            "preferred_date": preferred_date,
+            "end_date": end_date,
+            "earliest_time": earliest_time,
+            "latest_time": latest_time,
+            "after": after,
+            "limit": limit,
+            "doctor": doctor,
+            "clinic": clinic,
+        }
+        self._publish_tool_event(
             context, ToolCallEvent.now("fetch_slots", "started", args)
         )
-        result = await appointment_tools.fetch_available_slots(preferred_date or None)
-        result_summary = {"slots": result[:10], "total_available": len(result)}
-        await self._publish_tool_event(
+        state = _get_state(context)
+        result = None
+        # Prefetches only cover whole days
+        if not (end_date or earliest_time or latest_time or after or limit or doctor or clinic):
+            result = await _take_prefetched(state, "slots", preferred_date)
+        try:
+            if result is None:
+                result = await appointment_tools.fetch_available_slots(
+                    preferred_date or None,
+                    end_date or None,
+                    earliest_time or None,
+                    latest_time or None,
+                    after or None,
+                    limit or None,
+                    doctor or None,
+                    clinic or None,
+                )
+        except ValueError as e:
+            result_summary = {"error": str(e)}
+        else:
+            result_summary = shape_slots(result)
+        self._publish_tool_event(
             context, ToolCallEvent.now("fetch_slots", "completed", args, result_summary)
         )
-        return json.dumps(result_summary)
+        return _to_json(result_summary)
 
     # ---- Tool 3: Book Appointment ----
     @function_tool
+    @traced("tool.book_appointment")
+    @masked("book_appointment")
+    @_within_budget("book_appointment")
     async def book_appointment(
         self,
         context: RunContext,
@@ -83,6 +356,7 @@ class AppointmentAgent(Agent):
         appointment_date: str,
         appointment_time: str,
         reason: str = "",
+        doctor_name: str = "",
     ):
         """Book a new appointment for the user. Confirm the details with the patient before calling this.
 
@@ -92,6 +366,7 @@ class AppointmentAgent(Agent):
             appointment_date: Date in YYYY-MM-DD format
             appointment_time: Time in HH:MM format (24-hour)
             reason: Reason for the appointment
+            doctor_name: The doctor of the chosen slot; empty for whichever doctor is free
         """
         args = {
             "phone_number": phone_number,
@@ -99,20 +374,29 @@ class AppointmentAgent(Agent):
             "appointment_date": appointment_date,
             "appointment_time": appointment_time,
             "reason": reason,
+            "doctor_name": doctor_name,
         }
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("book_appointment", "started", args)
         )
+        state = _get_state(context)
+        state.invalidate_prefetched()
         result = await appointment_tools.book_appointment(
-            phone_number, patient_name, appointment_date, appointment_time, reason or None
+            phone_number, patient_name, appointment_date, appointment_time, reason or None, doctor_name or None
         )
-        await self._publish_tool_event(
+        if result.get("success"):
+            state.record_booking(result["appointment"])
+        result = shape_write_result("book_appointment", result)
+        self._publish_tool_event(
             context, ToolCallEvent.now("book_appointment", "completed", args, result)
         )
-        return json.dumps(result, default=str)
+        return _to_json(result)
 
     # ---- Tool 4: Retrieve Appointments ----
     @function_tool
+    @traced("tool.retrieve_appointments")
+    @masked("retrieve_appointments")
+    @_within_budget("retrieve_appointments")
     async def retrieve_appointments(self, context: RunContext, phone_number: str):
         """Retrieve all scheduled appointments for a user.
 
@@ -120,19 +404,28 @@ class AppointmentAgent(Agent):
             phone_number: The user's phone number
         """
         args = {"phone_number": phone_number}
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("retrieve_appointments", "started", args)
         )
-        result = await appointment_tools.retrieve_appointments(phone_number)
-        result_summary = {"appointments": result, "count": len(result)}
-        await self._publish_tool_event(
+        state = _get_state(context)
+        result = state.cached_appointments(phone_number)
+        if result is None:
+            result = await _take_prefetched(state, "appointments", normalize_phone(phone_number))
+        if result is None:
+            result = await appointment_tools.retrieve_appointments(phone_number)
+        state.set_appointments(phone_number, result)
+        result_summary = shape_appointments(result)
+        self._publish_tool_event(
             context,
             ToolCallEvent.now("retrieve_appointments", "completed", args, result_summary),
         )
-        return json.dumps(result_summary, default=str)
+        return _to_json(result_summary)
 
     # ---- Tool 5: Cancel Appointment ----
     @function_tool
+    @traced("tool.cancel_appointment")
+    @masked("cancel_appointment")
+    @_within_budget("cancel_appointment")
     async def cancel_appointment(self, context: RunContext, appointment_id: str):
         """Cancel an existing appointment. Confirm with the patient before calling this.
 
@@ -140,49 +433,66 @@ class AppointmentAgent(Agent):
             appointment_id: The UUID of the appointment to cancel
         """
         args = {"appointment_id": appointment_id}
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("cancel_appointment", "started", args)
         )
+        state = _get_state(context)
+        state.invalidate_prefetched()
         result = await appointment_tools.cancel_appointment(appointment_id)
-        await self._publish_tool_event(
+        if result.get("success"):
+            state.record_cancellation(appointment_id)
+        result = shape_write_result("cancel_appointment", result)
+        self._publish_tool_event(
             context, ToolCallEvent.now("cancel_appointment", "completed", args, result)
         )
-        return json.dumps(result, default=str)
+        return _to_json(result)
 
     # ---- Tool 6: Modify Appointment ----
     @function_tool
+    @traced("tool.modify_appointment")
+    @masked("modify_appointment")
+    @_within_budget("modify_appointment")
     async def modify_appointment(
         self,
         context: RunContext,
         appointment_id: str,
         new_date: str = "",
         new_time: str = "",
+        new_doctor: str = "",
     ):
-        """Modify an existing appointment's date and/or time. Confirm with the patient before calling this.
+        """Modify an existing appointment's date, time and/or doctor. Confirm with the patient before calling this.
 
         Args:
             appointment_id: The UUID of the appointment to modify
             new_date: New date in YYYY-MM-DD format (optional)
             new_time: New time in HH:MM format (optional)
+            new_doctor: Doctor to move the appointment to (optional)
         """
         args = {
             "appointment_id": appointment_id,
             "new_date": new_date,
             "new_time": new_time,
+            "new_doctor": new_doctor,
         }
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("modify_appointment", "started", args)
         )
+        state = _get_state(context)
+        state.invalidate_prefetched()
         result = await appointment_tools.modify_appointment(
-            appointment_id, new_date or None, new_time or None
+            appointment_id, new_date or None, new_time or None, new_doctor or None
         )
-        await self._publish_tool_event(
+        if result.get("success"):
+            state.record_update(result["updated"])
+        result = shape_write_result("modify_appointment", result)
+        self._publish_tool_event(
             context, ToolCallEvent.now("modify_appointment", "completed", args, result)
         )
-        return json.dumps(result, default=str)
+        return _to_json(result)
 
     # ---- Tool 7: End Conversation ----
     @function_tool
+    @traced("tool.end_conversation")
     async def end_conversation(self, context: RunContext, summary: str):
         """End the conversation and provide a summary of what was accomplished.
         Call this when the user says goodbye or indicates they are done.
@@ -191,14 +501,16 @@ class AppointmentAgent(Agent):
             summary: A brief summary of what was accomplished in this conversation
         """
         args = {"summary": summary}
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context, ToolCallEvent.now("end_conversation", "started", args)
         )
 
-        # Publish summary on dedicated topic for frontend summary display
+        # Publish summary on dedicated topic for frontend summary display,
+        # after any queued tool events so the panel is final first
         try:
             room = _get_room(context)
             if room and room.local_participant:
+                await flush_publisher(room)
                 await room.local_participant.publish_data(
                     payload=json.dumps({"summary": summary}).encode("utf-8"),
                     reliable=True,
@@ -207,8 +519,8 @@ class AppointmentAgent(Agent):
         except Exception as e:
             logger.warning(f"Failed to publish call summary: {e}")
 
-        await self._publish_tool_event(
+        self._publish_tool_event(
             context,
             ToolCallEvent.now("end_conversation", "completed", args, {"summary": summary}),
         )
-        return json.dumps({"message": "Conversation ended", "summary": summary})
+        return _to_json({"message": "Conversation ended", "summary": summary})
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import TYPE_CHECKING, AsyncIterator
+from config import (
+    AUDIO_CACHE_DIR,
+    AUDIO_CACHE_MAX_MB,
+    TTS_PROVIDER,
+    TTS_MODEL,
+    TTS_VOICE,
+    GREETING_TEXT,
+    FILLER_PHRASES,
+    FILLER_PROGRESS_PHRASE,
+)
+
+if TYPE_CHECKING:
+    from livekit import rtc
+
+logger = logging.getLogger("audio-cache")
+
+# Entry file: magic, sample rate, channels, then 16-bit little-endian PCM
+_HEADER = struct.Struct("<4sII")
+_MAGIC = b"PCM1"
+FRAME_MS = 20  # Playback frame length
+_PAGE = mmap.PAGESIZE
+
+
+def fixed_phrases() -> list[str]:
+    """Text the agent says verbatim: the greeting and the filler phrases."""
+    return list(dict.fromkeys(filter(None, [GREETING_TEXT, *FILLER_PHRASES.values(), FILLER_PROGRESS_PHRASE])))
+
+
+def cache_key(text: str, sample_rate: int) -> str:
+    """Content address of `text` spoken by the configured TTS provider, model and voice at `sample_rate`."""
+    material = "\x1f".join([TTS_PROVIDER, TTS_MODEL, TTS_VOICE or "default", str(sample_rate), text])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """On-disk, content-addressed cache of synthesized speech, shared by every process on a host.
+
+    One file per entry, named by `cache_key`. Writes are atomic (temp file + rename),
+    reads memory-map the file and slice frames out of the page cache, and a hit
+    refreshes the file's mtime, so eviction past `max_bytes` drops the least
+    recently used entries first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, num_channels: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, sample_rate, num_channels))
+                f.write(pcm)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def _open(self, key: str) -> mmap.mmap | None:
+        """Map an entry (marking it recently used), or None if it is missing or unreadable."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None  # Missing, evicted meanwhile, or empty
+        if mapped[:4] != _MAGIC:
+            mapped.close()
+            return None
+        return mapped
+
+    def playback(self, key: str) -> AsyncIterator["rtc.AudioFrame"] | None:
+        """An entry as FRAME_MS audio frames read from its memory map, or None if it is not cached."""
+        mapped = self._open(key)
+        return None if mapped is None else _play(mapped)
+
+    def warm(self, keys: list[str]) -> int:
+        """Fault the entries' pages into memory so the first playback doesn't wait on disk; the number found."""
+        found = 0
+        for key in keys:
+            mapped = self._open(key)
+            if mapped is None:
+                continue
+            for offset in range(0, len(mapped), _PAGE):
+                mapped[offset]
+            mapped.close()
+            found += 1
+        return found
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # Another process evicted it
+            total -= size
+
+
+async def _play(mapped: mmap.mmap) -> AsyncIterator["rtc.AudioFrame"]:
+    from livekit import rtc
+    try:
+        _, sample_rate, channels = _HEADER.unpack_from(mapped)
+        step = sample_rate * FRAME_MS // 1000 * channels * 2
+        for start in range(_HEADER.size, len(mapped), step):
+            chunk = mapped[start:start + step]  # Copies one frame out of the page cache
+            yield rtc.AudioFrame(chunk, sample_rate, channels, len(chunk) // (2 * channels))
+    finally:
+        mapped.close()
+
+
+_cache: AudioCache | None = None
+
+
+def get_audio_cache() -> AudioCache:
+    """Get or create the process's view of the on-disk audio cache."""
+    global _cache
+    if _cache is None:
+        _cache = AudioCache(AUDIO_CACHE_DIR, int(AUDIO_CACHE_MAX_MB * 1024 * 1024))
+    return _cache
+
+
+async def synthesize_missing(tts, texts: list[str]) -> int:
+    """Synthesize and store every text not cached yet for this TTS; the number added.
+
+    Texts that fail are left to live synthesis when they are said.
+    """
+    cache = get_audio_cache()
+    added = 0
+    for text in texts:
+        key = cache_key(text, tts.sample_rate)
+        if key in cache:
+            continue
+        try:
+            async with tts.synthesize(text) as stream:
+                frames = [event.frame async for event in stream]
+            if frames:
+                cache.put(key, b"".join(bytes(f.data) for f in frames), frames[0].sample_rate, frames[0].num_channels)
+                added += 1
+        except Exception as e:
+            # TTS failure, full disk, ...: this text is synthesized live when said
+            logger.warning(f"Could not add '{text}' to the audio cache: {e}")
+    return added
+
+
+def say(session, text: str, add_to_chat_ctx: bool = True):
+    """`session.say` a fixed phrase, played from the audio cache when it is there (no TTS round trip)."""
+    audio = get_audio_cache().playback(cache_key(text, session.tts.sample_rate))
+    if audio is None:
+        return session.say(text, add_to_chat_ctx=add_to_chat_ctx)
+    return session.say(text, audio=audio, add_to_chat_ctx=add_to_chat_ctx)
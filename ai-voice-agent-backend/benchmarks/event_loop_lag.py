@@ -0,0 +1,126 @@
+"""Measure event-loop lag while simulated sessions hit a slow database.
+
+Runs the same call script against a stand-in Supabase client whose `.execute()`
+blocks for a fixed latency, once with queries executed inline on the event loop
+("before") and once through `run_query` ("after"). The lag monitor is a coroutine
+that expects to wake every few milliseconds; any extra delay is time the loop
+could not serve audio frames.
+
+Usage:
+    python -m benchmarks.event_loop_lag --sessions 50 --db-latency-ms 40
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import os
+import time
+from dataclasses import dataclass
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tools import appointment_tools
+
+
+@dataclass
+class _Response:
+    data: list
+
+
+class SlowQuery:
+    """Chainable query builder whose execute() blocks like a network round trip."""
+
+    def __init__(self, latency: float):
+        self._latency = latency
+        self._insert: dict | None = None
+
+    def __getattr__(self, name):
+        # select/eq/neq/gte/order/limit/update are no-ops for this benchmark
+        return lambda *args, **kwargs: self
+
+    def insert(self, data: dict):
+        self._insert = data
+        return self
+
+    def execute(self):
+        time.sleep(self._latency)
+        return _Response(data=[{"id": "bench", **self._insert}] if self._insert else [])
+
+
+class SlowClient:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def table(self, name: str):
+        return SlowQuery(self._latency)
+
+
+async def _run_inline(query):
+    """The pre-executor behaviour: call the blocking execute() on the loop."""
+    return query.execute()
+
+
+async def _session(index: int) -> None:
+    """A typical call: identify, check availability, book, then review."""
+    phone = f"+1555{index:07d}"
+    await appointment_tools.identify_user_by_phone(phone)
+    await appointment_tools.fetch_available_slots()
+    await appointment_tools.book_appointment(phone, "Bench Caller", "2030-01-07", "09:00")
+    await appointment_tools.retrieve_appointments(phone)
+
+
+async def monitor_lag(stop: asyncio.Event, interval: float, samples: list[float]) -> None:
+    """Sample how late the loop wakes a sleeper (ms) until `stop` is set."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval) * 1000)
+
+
+async def measure(sessions: int, latency: float, inline: bool, interval: float = 0.005) -> dict:
+    """Run `sessions` concurrent call scripts and report loop lag in milliseconds."""
+    samples: list[float] = []
+    stop = asyncio.Event()
+    client = SlowClient(latency)
+
+    with patch("db.supabase_store.get_supabase", return_value=client):
+        runner = patch("db.supabase_store.run_query", _run_inline) if inline else None
+        if runner:
+            runner.start()
+        try:
+            monitor = asyncio.create_task(monitor_lag(stop, interval, samples))
+            started = time.perf_counter()
+            await asyncio.gather(*(_session(i) for i in range(sessions)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await monitor
+        finally:
+            if runner:
+                runner.stop()
+
+    samples = samples or [0.0]
+    ordered = sorted(samples)
+    return {
+        "mode": "inline" if inline else "executor",
+        "sessions": sessions,
+        "wall_s": round(elapsed, 3),
+        "lag_mean_ms": round(statistics.fmean(samples), 2),
+        "lag_p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "lag_max_ms": round(ordered[-1], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--db-latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    latency = args.db_latency_ms / 1000
+    for inline in (True, False):
+        print(asyncio.run(measure(args.sessions, latency, inline)))
+
+
+if __name__ == "__main__":
+    main()
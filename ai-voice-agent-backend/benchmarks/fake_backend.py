@@ -0,0 +1,220 @@
+"""In-memory stand-in for the Supabase client used by the benchmarks.
+
+Implements the subset of the PostgREST query builder that `tools.appointment_tools`
+uses, with real filtering, the unique scheduled-slot index and the overlap
+exclusion constraint (raising the same APIError codes 23505 and 23P01 as
+PostgreSQL) and the patients upsert trigger. Every
+`execute()` blocks for an injectable latency, like a network round trip.
+"""
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from postgrest.exceptions import APIError
+
+DEFAULT_DOCTOR = "Dr. Smith"
+
+
+@dataclass
+class FakeResponse:
+    data: list
+
+
+class LatencyModel:
+    """Round-trip latency: a base delay plus uniform jitter, in seconds."""
+
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0, seed: int | None = None):
+        self._base = base_ms / 1000
+        self._jitter = jitter_ms / 1000
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            return self._base + self._rng.uniform(0, self._jitter)
+
+
+class FakeQuery:
+    def __init__(self, db: "InMemorySupabase", table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._payload: dict | None = None
+        self._filters: list = []
+        self._order: str | None = None
+        self._limit: int | None = None
+
+    # ---- Builder ----
+
+    def select(self, *args, **kwargs):
+        self._op = "select"
+        return self
+
+    def insert(self, data: dict):
+        self._op, self._payload = "insert", data
+        return self
+
+    def update(self, data: dict):
+        self._op, self._payload = "update", data
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def neq(self, column: str, value):
+        self._filters.append(lambda row: str(row.get(column)) != str(value))
+        return self
+
+    def gte(self, column: str, value):
+        self._filters.append(lambda row: str(row.get(column)) >= str(value))
+        return self
+
+    def lte(self, column: str, value):
+        self._filters.append(lambda row: str(row.get(column)) <= str(value))
+        return self
+
+    def order(self, column: str, *args, **kwargs):
+        self._order = column
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def execute(self) -> FakeResponse:
+        time.sleep(self._db.latency.sample())
+        with self._db.lock:
+            self._db.query_count += 1
+            return FakeResponse(data=getattr(self, f"_execute_{self._op}")())
+
+    # ---- Execution (caller holds the database lock) ----
+
+    def _matching(self) -> list[dict]:
+        return [r for r in self._db.tables[self._table] if all(f(r) for f in self._filters)]
+
+    def _execute_select(self) -> list[dict]:
+        rows = self._matching()
+        if self._order:
+            rows = sorted(rows, key=lambda r: str(r.get(self._order)))
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        return [dict(r) for r in rows]
+
+    def _execute_insert(self) -> list[dict]:
+        row = self._db.new_row(self._table, self._payload)
+        self._db.check_slot_constraints(row)
+        self._db.tables[self._table].append(row)
+        if self._table == "appointments":
+            self._db.upsert_patient(row)
+        return [dict(row)]
+
+    def _execute_update(self) -> list[dict]:
+        rows = self._matching()
+        for row in rows:
+            self._db.check_slot_constraints({**row, **self._payload})
+        payload = dict(self._payload)
+        if "appointment_time" in payload:
+            payload["appointment_time"] = _pg_time(payload["appointment_time"])
+        for row in rows:
+            row.update(payload)
+            row["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return [dict(r) for r in rows]
+
+
+class InMemorySupabase:
+    """Thread-safe fake of the Supabase client (`.table(name)` entry point)."""
+
+    def __init__(self, latency: LatencyModel | None = None):
+        self.latency = latency or LatencyModel()
+        self.lock = threading.Lock()
+        self.tables: dict[str, list[dict]] = {"appointments": [], "patients": []}
+        self.query_count = 0
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def new_row(self, table: str, payload: dict) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        row = {"created_at": now, "updated_at": now, **payload}
+        if table == "appointments":
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("status", "scheduled")
+            row.setdefault("duration_minutes", 30)
+            row.setdefault("doctor_name", DEFAULT_DOCTOR)
+            row["appointment_time"] = _pg_time(row["appointment_time"])
+        return row
+
+    def check_slot_constraints(self, row: dict) -> None:
+        """Emulates the unique index on scheduled (date, time, doctor) and the exclusion
+        constraint on overlapping scheduled time ranges per doctor."""
+        if row.get("status", "scheduled") != "scheduled" or "appointment_date" not in row:
+            return
+        slot_date, slot_time = str(row["appointment_date"]), _pg_time(row["appointment_time"])
+        doctor = row.get("doctor_name", DEFAULT_DOCTOR)
+        start = _minutes(slot_time)
+        end = start + (row.get("duration_minutes") or 30)
+        for other in self.tables["appointments"]:
+            if other.get("id") == row.get("id") or other["status"] != "scheduled":
+                continue
+            if (str(other["appointment_date"]), other["doctor_name"]) != (slot_date, doctor):
+                continue
+            other_start = _minutes(_pg_time(other["appointment_time"]))
+            if other_start == start:
+                raise APIError({
+                    "message": "duplicate key value violates unique constraint \"idx_appointments_scheduled_slot\"",
+                    "code": "23505", "details": None, "hint": None,
+                })
+            if other_start < end and start < other_start + other["duration_minutes"]:
+                raise APIError({
+                    "message": "conflicting key value violates exclusion constraint \"appointments_no_overlap\"",
+                    "code": "23P01", "details": None, "hint": None,
+                })
+
+    def upsert_patient(self, appointment: dict) -> None:
+        """Emulates the trg_appointments_upsert_patient trigger."""
+        for patient in self.tables["patients"]:
+            if patient["phone_number"] == appointment["phone_number"]:
+                patient["patient_name"] = appointment["patient_name"]
+                return
+        self.tables["patients"].append({
+            "phone_number": appointment["phone_number"],
+            "patient_name": appointment["patient_name"],
+        })
+
+    def seed_appointment(
+        self,
+        phone_number: str,
+        patient_name: str,
+        appointment_date: str,
+        appointment_time: str,
+        doctor_name: str = DEFAULT_DOCTOR,
+        duration_minutes: int = 30,
+    ) -> dict:
+        """Insert a scheduled appointment directly (no latency), e.g. to set up returning callers."""
+        with self.lock:
+            row = self.new_row("appointments", {
+                "phone_number": phone_number,
+                "patient_name": patient_name,
+                "appointment_date": appointment_date,
+                "appointment_time": appointment_time,
+                "doctor_name": doctor_name,
+                "duration_minutes": duration_minutes,
+                "reason": "Follow-up",
+            })
+            self.check_slot_constraints(row)
+            self.tables["appointments"].append(row)
+            self.upsert_patient(row)
+            return dict(row)
+
+
+def _pg_time(value) -> str:
+    """Store times the way PostgreSQL returns TIME columns ("HH:MM:SS")."""
+    value = str(value)
+    return value if len(value) == 8 else f"{value[:5]}:00"
+
+
+def _minutes(pg_time: str) -> int:
+    return int(pg_time[:2]) * 60 + int(pg_time[3:5])
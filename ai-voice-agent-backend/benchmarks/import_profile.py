@@ -0,0 +1,84 @@
+"""Import-time profile of a module in a fresh interpreter (what each job process pays).
+
+Runs `python -X importtime -c "import <module>"` and reports the total import
+time and the slowest modules, by cumulative and by self time.
+
+Usage:
+    python -m benchmarks.import_profile --module agent --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_imports(module: str = "agent") -> list[ImportTiming]:
+    """Import `module` in a fresh interpreter and parse its -X importtime report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        timings.append(ImportTiming(
+            module=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+        ))
+    return timings
+
+
+def cumulative_ms(timings: list[ImportTiming], module: str) -> float:
+    """Cumulative import time of `module` (0 if it was not imported)."""
+    return next((t.cumulative_us / 1000 for t in timings if t.module == module), 0.0)
+
+
+def report(timings: list[ImportTiming], module: str, top: int) -> dict:
+    def rows(key):
+        return [
+            {"module": t.module, "self_ms": round(t.self_us / 1000, 1), "cumulative_ms": round(t.cumulative_us / 1000, 1)}
+            for t in sorted(timings, key=key, reverse=True)[:top]
+        ]
+
+    return {
+        "module": module,
+        "total_ms": round(cumulative_ms(timings, module), 1),
+        "modules_imported": len(timings),
+        "slowest_cumulative": rows(lambda t: t.cumulative_us),
+        "slowest_self": rows(lambda t: t.self_us),
+        "livekit_plugins_loaded": sorted({
+            ".".join(t.module.split(".")[:3]) for t in timings if t.module.startswith("livekit.plugins.")
+        }),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="agent")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(json.dumps(report(profile_imports(args.module), args.module, args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Overlap lookup cost as bookings per doctor-day grow.
+
+Fills one doctor-day with N non-overlapping bookings of mixed lengths and times
+`IntervalSet.overlaps` against a linear scan of the same intervals (what a
+per-row check costs). The interval index should stay roughly flat while the
+scan grows with N.
+
+Usage:
+    python -m benchmarks.interval_index --sizes 10 100 1000 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tools.interval_set import IntervalSet
+
+DURATIONS = (10, 15, 20, 30, 45, 60)
+
+
+def _bookings(count: int, rng: random.Random) -> list[tuple[int, int]]:
+    """`count` back-to-back intervals with small gaps; the "day" stretches to fit them."""
+    intervals, start = [], 0
+    for _ in range(count):
+        duration = rng.choice(DURATIONS)
+        intervals.append((start, start + duration))
+        start += duration + rng.choice((0, 0, 5, 10))
+    return intervals
+
+
+def _per_lookup_us(check, probes: list[tuple[int, int]], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for start, end in probes:
+            check(start, end)
+    return (time.perf_counter() - started) / (repeat * len(probes)) * 1e6
+
+
+def measure(size: int, probes: int, repeat: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    bookings = _bookings(size, rng)
+    index = IntervalSet()
+    for n, (start, end) in enumerate(bookings):
+        index.add(start, end, str(n))
+
+    horizon = bookings[-1][1]
+    queries = [(s, s + rng.choice(DURATIONS)) for s in (rng.randrange(horizon) for _ in range(probes))]
+
+    def scan(start: int, end: int) -> bool:
+        return any(s < end and start < e for s, e in bookings)
+
+    assert all(index.overlaps(s, e) == scan(s, e) for s, e in queries)
+    return {
+        "bookings": size,
+        "interval_index_us": round(_per_lookup_us(index.overlaps, queries, repeat), 3),
+        "linear_scan_us": round(_per_lookup_us(scan, queries, repeat), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps([measure(n, args.probes, args.repeat, args.seed) for n in args.sizes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
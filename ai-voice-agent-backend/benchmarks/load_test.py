@@ -0,0 +1,311 @@
+"""Offline load test: many concurrent simulated calls against AppointmentAgent.
+
+Each simulated call runs a scripted conversation through the real
+AppointmentAgent tool methods and appointment_tools, backed by the in-memory
+stand-in database in benchmarks/fake_backend.py with injectable latency (through
+the Supabase store), or by the embedded SQLite store with `--store sqlite`.
+The store sits behind the same ResilientStore as in production, so calls that
+hit a latency budget end as "system_busy". Reports throughput, per-tool latency
+percentiles, hedging/timeout counts and event-loop lag for one worker process.
+The database thread pool size comes from DB_MAX_WORKERS as usual.
+
+Usage:
+    python -m benchmarks.load_test --calls 500 --concurrency 100 --db-latency-ms 30
+    python -m benchmarks.load_test --calls 500 --concurrency 100 --store sqlite
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import telemetry
+from agent_definition import AppointmentAgent
+from config import SLOT_CONFIG
+from event_publisher import close_publisher
+from session_state import SessionState
+from tools import appointment_tools, availability_index
+from tools.clinic_time import clinic_today
+from tools.slot_generator import get_slot_calendar
+from db import storage
+from db.resilience import ResilientStore
+from db.sqlite_store import SQLiteStore
+from db.supabase_store import SupabaseStore
+from benchmarks.event_loop_lag import monitor_lag
+from benchmarks.fake_backend import InMemorySupabase, LatencyModel
+
+
+@dataclass
+class LoadTestConfig:
+    calls: int = 200
+    concurrency: int = 50
+    db_latency_ms: float = 30.0
+    db_jitter_ms: float = 10.0
+    publish_latency_ms: float = 5.0
+    think_ms: float = 0.0           # Simulated LLM/TTS turn time between tool calls
+    returning_ratio: float = 0.5    # Share of callers with an existing appointment
+    days_ahead: int = 60            # Booking horizon, so slots don't run out
+    store: str = "supabase"         # "supabase" (fake backend with latency) or "sqlite" (embedded)
+    seed: int = 7
+    script_weights: dict[str, float] = field(default_factory=lambda: {
+        "book": 0.4, "check": 0.25, "reschedule": 0.2, "cancel": 0.15,
+    })
+
+
+class _FakeParticipant:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    async def publish_data(self, payload: bytes, reliable: bool = True, topic: str = ""):
+        await asyncio.sleep(self._latency)
+
+
+class _FakeRoom:
+    def __init__(self, publish_latency: float):
+        self.local_participant = _FakeParticipant(publish_latency)
+
+
+def _make_context(publish_latency: float):
+    """The parts of RunContext the agent tools use."""
+    room = _FakeRoom(publish_latency)
+    return SimpleNamespace(
+        userdata=SessionState(),
+        session=SimpleNamespace(
+            room_io=SimpleNamespace(room=room),
+            tts=SimpleNamespace(sample_rate=24000),  # Fillers look up cached audio by sample rate
+            say=lambda *args, **kwargs: None,
+        ),
+    )
+
+
+class _SystemBusy(Exception):
+    """A tool answered with the "system busy" result; the simulated caller gives up."""
+
+
+def _parse(result: str) -> dict:
+    parsed = json.loads(result)
+    if parsed.get("error") == "system_busy":
+        raise _SystemBusy()
+    return parsed
+
+
+def _bookable(result: str) -> list[dict]:
+    """Expand fetch_slots' compact day ranges back into individual slots."""
+    shaped = _parse(result)
+    slots = []
+    for label, day_ranges in shaped["days"].items():
+        day = label.split()[-1]
+        per_doctor = day_ranges if isinstance(day_ranges, dict) else {shaped["doctor"]: day_ranges}
+        for doctor, ranges in per_doctor.items():
+            step = shaped["slot_minutes"][doctor] if isinstance(shaped["slot_minutes"], dict) else shaped["slot_minutes"]
+            for part in ranges.split(", "):
+                first, _, last = part.partition("-")
+                start, end = _minutes(first), _minutes(last or first)
+                slots += [
+                    {"date": day, "time": f"{m // 60:02d}:{m % 60:02d}", "doctor": doctor}
+                    for m in range(start, end + 1, step)
+                ]
+    return slots
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+# ---- Call scripts: one conversation each, driving the agent's tool methods ----
+
+async def _book(agent, ctx, caller, rng, pause, outcomes):
+    _parse(await agent.identify_user(ctx, phone_number=caller["phone"]))
+    await pause()
+    for _ in range(2):  # retry once if someone else took the slot
+        slots = _bookable(await agent.fetch_slots(ctx))
+        if not slots:
+            outcomes["no_slots"] += 1
+            return
+        slot = rng.choice(slots)
+        await pause()
+        result = _parse(await agent.book_appointment(
+            ctx, caller["phone"], caller["name"], slot["date"], slot["time"], "Checkup", slot["doctor"]
+        ))
+        if result["success"]:
+            return
+        outcomes["booking_conflicts"] += 1
+
+
+async def _check(agent, ctx, caller, rng, pause, outcomes):
+    _parse(await agent.identify_user(ctx, phone_number=caller["phone"]))
+    await pause()
+    _parse(await agent.retrieve_appointments(ctx, phone_number=caller["phone"]))
+    await pause()
+    dates = get_slot_calendar(clinic_today()).dates()
+    _parse(await agent.fetch_slots(ctx, preferred_date=rng.choice(dates[:5])))
+
+
+async def _reschedule(agent, ctx, caller, rng, pause, outcomes):
+    _parse(await agent.identify_user(ctx, phone_number=caller["phone"]))
+    await pause()
+    appointments = _parse(await agent.retrieve_appointments(ctx, phone_number=caller["phone"]))
+    await pause()
+    slots = _bookable(await agent.fetch_slots(ctx))
+    if not appointments["appointments"] or not slots:
+        return
+    slot = rng.choice(slots)
+    await pause()
+    result = _parse(await agent.modify_appointment(
+        ctx, appointments["appointments"][0]["id"], slot["date"], slot["time"], slot["doctor"]
+    ))
+    if not result["success"]:
+        outcomes["booking_conflicts"] += 1
+
+
+async def _cancel(agent, ctx, caller, rng, pause, outcomes):
+    _parse(await agent.identify_user(ctx, phone_number=caller["phone"]))
+    await pause()
+    appointments = _parse(await agent.retrieve_appointments(ctx, phone_number=caller["phone"]))
+    if appointments["appointments"]:
+        await pause()
+        _parse(await agent.cancel_appointment(ctx, appointments["appointments"][0]["id"]))
+
+
+SCRIPTS = {"book": _book, "check": _check, "reschedule": _reschedule, "cancel": _cancel}
+
+
+async def _seed_returning_callers(
+    backend: InMemorySupabase,
+    store: storage.AppointmentStore,
+    config: LoadTestConfig,
+    rng: random.Random,
+) -> list[dict]:
+    calendar = get_slot_calendar(clinic_today())
+    free = rng.sample(range(len(calendar)), k=min(len(calendar) // 2, int(config.calls * config.returning_ratio)))
+    callers = []
+    for n, i in enumerate(free):
+        caller = {"phone": f"+1555{n:07d}", "name": f"Returning Caller {n}"}
+        slot_date, slot_time = calendar.key(i)
+        if isinstance(store, SQLiteStore):
+            await store.reserve({
+                "phone_number": caller["phone"], "patient_name": caller["name"],
+                "appointment_date": slot_date, "appointment_time": slot_time,
+                "doctor_name": calendar.doctor, "reason": "Follow-up",
+            })
+        else:
+            # Directly into the fake backend, skipping its simulated latency
+            backend.seed_appointment(caller["phone"], caller["name"], slot_date, slot_time)
+        callers.append(caller)
+    return callers
+
+
+async def run_load_test(config: LoadTestConfig) -> dict:
+    """Run the configured number of calls and return the report dict."""
+    rng = random.Random(config.seed)
+    backend = InMemorySupabase(LatencyModel(config.db_latency_ms, config.db_jitter_ms, config.seed))
+    store = SQLiteStore() if config.store == "sqlite" else SupabaseStore()
+    outcomes: Counter = Counter()
+    failures: Counter = Counter()
+    call_durations: list[float] = []
+
+    async def pause():
+        if config.think_ms:
+            await asyncio.sleep(config.think_ms / 1000)
+
+    with patch.dict(SLOT_CONFIG, {"days_ahead": config.days_ahead}), \
+            patch("db.supabase_store.get_supabase", return_value=backend), \
+            patch.object(storage, "_store", ResilientStore(store)), \
+            patch.object(availability_index, "_index", None):
+        appointment_tools._patient_cache.clear()
+        telemetry.reset()
+        returning = await _seed_returning_callers(backend, store, config, rng)
+
+        names, weights = zip(*config.script_weights.items())
+        semaphore = asyncio.Semaphore(config.concurrency)
+
+        async def one_call(n: int):
+            script = rng.choices(names, weights)[0]
+            if script in ("reschedule", "cancel", "check") and returning:
+                caller = returning[n % len(returning)]
+            else:
+                caller = {"phone": f"+1666{n:07d}", "name": f"New Caller {n}"}
+            async with semaphore:
+                ctx = _make_context(config.publish_latency_ms / 1000)
+                started = time.perf_counter()
+                try:
+                    agent = AppointmentAgent()
+                    await SCRIPTS[script](agent, ctx, caller, rng, pause, outcomes)
+                    await agent.end_conversation(ctx, summary=f"Simulated {script} call")
+                    outcomes[script] += 1
+                except _SystemBusy:
+                    outcomes["system_busy"] += 1
+                except Exception as e:
+                    failures[f"{script}: {type(e).__name__}"] += 1
+                finally:
+                    await close_publisher(ctx.session.room_io.room)
+                    call_durations.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        lag: list[float] = []
+        monitor = asyncio.create_task(monitor_lag(stop, 0.005, lag))
+        started = time.perf_counter()
+        await asyncio.gather(*(one_call(n) for n in range(config.calls)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await monitor
+
+    spans = telemetry.snapshot()
+    tool_calls = sum(s["count"] for name, s in spans.items() if name.startswith("tool.") and "/" not in name)
+    lag = sorted(lag or [0.0])
+    return {
+        "calls": config.calls,
+        "concurrency": config.concurrency,
+        "store": config.store,
+        "wall_s": round(wall, 3),
+        "calls_per_s": round(config.calls / wall, 1),
+        "tool_calls_per_s": round(tool_calls / wall, 1),
+        "db_queries": backend.query_count if config.store == "supabase" else None,
+        "call_duration_p50_s": round(statistics.median(call_durations), 3),
+        "outcomes": dict(outcomes),
+        "failures": dict(failures),
+        "store_events": telemetry.store_events(),
+        "tool_latency_ms": {
+            name.removeprefix("tool."): summary
+            for name, summary in spans.items()
+            if name.startswith("tool.") and "/" not in name
+        },
+        "tool_breakdown_ms": {name: s["p95_ms"] for name, s in spans.items() if "/" in name},
+        "event_loop_lag_ms": {
+            "mean": round(statistics.fmean(lag), 2),
+            "p99": round(lag[min(len(lag) - 1, int(len(lag) * 0.99))], 2),
+            "max": round(lag[-1], 2),
+        },
+    }
+
+
+def main() -> None:
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=defaults.calls)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--db-latency-ms", type=float, default=defaults.db_latency_ms)
+    parser.add_argument("--db-jitter-ms", type=float, default=defaults.db_jitter_ms)
+    parser.add_argument("--publish-latency-ms", type=float, default=defaults.publish_latency_ms)
+    parser.add_argument("--think-ms", type=float, default=defaults.think_ms)
+    parser.add_argument("--returning-ratio", type=float, default=defaults.returning_ratio)
+    parser.add_argument("--days-ahead", type=int, default=defaults.days_ahead)
+    parser.add_argument("--store", choices=["supabase", "sqlite"], default=defaults.store)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    config = LoadTestConfig(**vars(args))
+    print(json.dumps(asyncio.run(run_load_test(config)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
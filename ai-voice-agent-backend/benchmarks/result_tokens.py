@@ -0,0 +1,81 @@
+"""Estimated LLM tokens of tool results before and after result shaping.
+
+Compares what fetch_slots and retrieve_appointments used to return (the first
+10 slot dicts; `select("*")` appointment rows) with the shaped results, for a
+calendar with some slots already booked.
+
+Usage:
+    python -m benchmarks.result_tokens --booked-ratio 0.3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from result_shaping import estimate_tokens, shape_appointments, shape_slots
+from tools.slot_generator import generate_all_slots
+
+
+def _tokens(result) -> int:
+    return estimate_tokens(json.dumps(result, default=str))
+
+
+def _appointment_row(i: int, day: date) -> dict:
+    return {
+        "id": f"6f1c2a4e-0000-4000-8000-{i:012d}",
+        "patient_name": "Jane Doe",
+        "phone_number": "+15551234567",
+        "appointment_date": day.isoformat(),
+        "appointment_time": "09:30:00",
+        "duration_minutes": 30,
+        "doctor_name": "Dr. Smith",
+        "reason": "Follow-up",
+        "status": "scheduled",
+        "created_at": "2026-10-01T12:00:00.000000+00:00",
+        "updated_at": "2026-10-01T12:00:00.000000+00:00",
+    }
+
+
+def measure(booked_ratio: float, appointments: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    slots = [s for s in generate_all_slots(date.today()) if rng.random() >= booked_ratio]
+    rows = [_appointment_row(i, date.today() + timedelta(days=i + 1)) for i in range(appointments)]
+
+    legacy_slots = {"slots": slots[:10], "total_available": len(slots)}
+    all_slots = {"slots": slots, "total_available": len(slots)}
+    shaped_slots = shape_slots(slots)
+    legacy_appointments = {"appointments": rows, "count": len(rows)}
+    shaped_appointments = shape_appointments(rows)
+
+    return {
+        "fetch_slots": {
+            "available": len(slots),
+            "legacy_first_10_tokens": _tokens(legacy_slots),
+            "all_slots_tokens": _tokens(all_slots),
+            "shaped_tokens": _tokens(shaped_slots),
+            "shaped_days": len(shaped_slots["days"]),
+        },
+        "retrieve_appointments": {
+            "count": len(rows),
+            "legacy_tokens": _tokens(legacy_appointments),
+            "shaped_tokens": _tokens(shaped_appointments),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--booked-ratio", type=float, default=0.3)
+    parser.add_argument("--appointments", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps(measure(args.booked_ratio, args.appointments, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import os
-from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,15 +11,97 @@ LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 # --- Supabase ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "16"))  # Threads for blocking DB calls
+
+# --- Appointment storage ---
+# "supabase", or "sqlite" for an embedded database with the same constraints (no network hop)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", ":memory:")  # Database file for the sqlite backend
+
+# Latency budget per tool call: storage calls still running when it runs out fail fast
+# with a "system busy" result the agent can speak
+_READ_BUDGET_MS = float(os.getenv("READ_LATENCY_BUDGET_MS", "1500"))
+_WRITE_BUDGET_MS = float(os.getenv("WRITE_LATENCY_BUDGET_MS", "3000"))
+TOOL_LATENCY_BUDGETS_MS = {
+    "identify_user": _READ_BUDGET_MS,
+    "fetch_slots": _READ_BUDGET_MS,
+    "retrieve_appointments": _READ_BUDGET_MS,
+    "book_appointment": _WRITE_BUDGET_MS,
+    "cancel_appointment": _WRITE_BUDGET_MS,
+    "modify_appointment": _WRITE_BUDGET_MS,
+}
+STORE_TIMEOUT_SECONDS = float(os.getenv("STORE_TIMEOUT_SECONDS", "5"))  # Storage calls outside any tool
+# Idempotent reads are sent again if the first attempt is slower than its observed p95
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))            # Before that, use the default delay
+HEDGE_DEFAULT_DELAY_MS = float(os.getenv("HEDGE_DEFAULT_DELAY_MS", "250"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "10"))        # Never hedge sooner than this
+# Consecutive storage failures (errors or budget timeouts) before failing fast, and for how long
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "10"))
+
+# --- Voice pipeline providers (LiveKit plugin names, imported on demand) ---
+STT_PROVIDER = os.getenv("STT_PROVIDER", "deepgram")
+STT_MODEL = os.getenv("STT_MODEL", "nova-3")
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "anthropic")
+LLM_MODEL = os.getenv("LLM_MODEL", "claude-sonnet-4-20250514")
+# Mark the system prompt, tools and history as cacheable (Anthropic prompt caching)
+LLM_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "true").lower() in ("1", "true", "yes")
+TTS_PROVIDER = os.getenv("TTS_PROVIDER", "cartesia")
+TTS_MODEL = os.getenv("TTS_MODEL", "sonic")
+TTS_VOICE = os.getenv("TTS_VOICE")  # Provider voice id; unset: the plugin's default voice
 
 # --- Tavus Avatar ---
 TAVUS_API_KEY = os.getenv("TAVUS_API_KEY")
 TAVUS_REPLICA_ID = os.getenv("TAVUS_REPLICA_ID")
 TAVUS_PERSONA_ID = os.getenv("TAVUS_PERSONA_ID")
 
+# --- Patients ---
+# Prepended to 10-digit national numbers. db/migrations/002_patients.sql backfills with
+# app.default_country_code (default 1); set it to the same value before running it.
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "1")
+PATIENT_CACHE_SIZE = int(os.getenv("PATIENT_CACHE_SIZE", "1024"))
+PATIENT_CACHE_TTL_SECONDS = float(os.getenv("PATIENT_CACHE_TTL_SECONDS", "300"))
+# Max seconds the greeting waits for the caller lookup started at room join
+PREIDENTIFY_TIMEOUT_SECONDS = float(os.getenv("PREIDENTIFY_TIMEOUT_SECONDS", "1.5"))
+# Lookups started after identify_user (slots, the caller's appointments) are served for this long
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "20"))
+# Read-only lookups started from a phone number or date heard in interim transcripts
+SPECULATION_TTL_SECONDS = float(os.getenv("SPECULATION_TTL_SECONDS", "15"))  # Unused results expire after this
+SPECULATION_MAX_PER_CALL = int(os.getenv("SPECULATION_MAX_PER_CALL", "10"))  # 0 disables
+
+# --- Telemetry ---
+TELEMETRY_MAX_SAMPLES = int(os.getenv("TELEMETRY_MAX_SAMPLES", "2048"))  # Recent samples kept per span
+PROMETHEUS_PORT = int(os.getenv("PROMETHEUS_PORT", "0")) or None          # Expose /metrics when set
+
+# --- Latency masking ---
+# A tool still running after FILLER_DELAY_MS has the agent say a short filler (played from the
+# on-disk audio cache below); after FILLER_PROGRESS_MS it adds one progress update. 0 disables either.
+FILLER_DELAY_MS = float(os.getenv("FILLER_DELAY_MS", "400"))
+FILLER_PROGRESS_MS = float(os.getenv("FILLER_PROGRESS_MS", "3000"))
+FILLER_PHRASES = {
+    "fetch_slots": "One moment while I check the schedule.",
+    "book_appointment": "One moment while I book that for you.",
+    "modify_appointment": "One moment while I move that appointment.",
+    "cancel_appointment": "One moment while I cancel that.",
+    "retrieve_appointments": "Let me pull up your appointments.",
+}
+FILLER_PROGRESS_PHRASE = "Still working on it, thanks for your patience."
+
+# Synthesized fixed phrases (greeting, fillers), content-addressed on disk and shared by the
+# worker's processes; least recently used entries are evicted past AUDIO_CACHE_MAX_MB
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "audio"))
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", "64"))
+
+# --- Worker startup ---
+# Max seconds a job process spends prewarming models and connections before taking jobs
+PREWARM_TIMEOUT_SECONDS = float(os.getenv("PREWARM_TIMEOUT_SECONDS", "20"))
+
 # --- Data Channel Topics ---
 TOOL_CALL_TOPIC = "tool_call"
 CALL_SUMMARY_TOPIC = "call_summary"
+TOOL_EVENT_COALESCE_MS = float(os.getenv("TOOL_EVENT_COALESCE_MS", "20"))  # Wait to merge bursts into one frame
+TOOL_EVENT_MAX_PENDING = int(os.getenv("TOOL_EVENT_MAX_PENDING", "64"))    # Queue bound before dropping events
+TOOL_EVENT_MAX_BATCH = 16                                                  # Events per data channel frame
 
 # --- Slot Configuration ---
 SLOT_CONFIG = {
@@ -31,12 +112,32 @@ SLOT_CONFIG = {
     "doctor_name": "Dr. Smith",
 }
 
-# --- System Prompt ---
-def _build_system_prompt() -> str:
-    today = datetime.now(timezone.utc).strftime("%A, %B %d, %Y")
-    return f"""You are Dr. Ava, a friendly and professional medical appointment scheduling assistant at Dr. Smith's clinic.
+# JSON file with per-doctor hours, breaks, holidays and slot lengths (see doctors.example.json).
+# Unset: a single doctor working SLOT_CONFIG hours Monday to Friday.
+DOCTOR_SCHEDULES_FILE = os.getenv("DOCTOR_SCHEDULES_FILE")
 
-Today's date is {today}.
+# Approximate token budget for each tool result sent back to the LLM
+TOOL_RESULT_TOKEN_BUDGETS = {
+    "fetch_slots": int(os.getenv("SLOTS_RESULT_TOKEN_BUDGET", "250")),
+    "retrieve_appointments": int(os.getenv("APPOINTMENTS_RESULT_TOKEN_BUDGET", "300")),
+}
+
+# IANA timezone of the clinic; "today" in the prompt and slot lookups follows it
+CLINIC_TIMEZONE = os.getenv("CLINIC_TIMEZONE", "UTC")
+
+# Seconds before the in-process availability index is reloaded from the database
+AVAILABILITY_TTL_SECONDS = float(os.getenv("AVAILABILITY_TTL_SECONDS", "30"))
+
+# Per-day availability shared by all workers, invalidated over pub/sub when bookings change.
+# Unset: every worker queries the database itself. `memory://` (single process) or
+# `redis://[:password@]host:port` (Redis, or `python -m tools.cache_server` for local runs).
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL")
+SHARED_CACHE_TTL_SECONDS = float(os.getenv("SHARED_CACHE_TTL_SECONDS", "300"))  # Upper bound on staleness
+
+# --- System Prompt ---
+# Static part, identical for every session so the LLM provider can cache it.
+# Rendered per session with the date suffix by prompts.build_system_prompt().
+SYSTEM_PROMPT_PREFIX = """You are Dr. Ava, a friendly and professional medical appointment scheduling assistant at our clinic.
 
 ## Your Personality
 - Warm, patient, and efficient
@@ -45,7 +146,7 @@ Today's date is {today}.
 - Be conversational but stay focused on the task
 
 ## Conversation Flow
-1. ALWAYS start by greeting the patient and asking for their phone number
+1. ALWAYS start by greeting the patient and asking for their phone number, unless the caller has already been identified for you
 2. Once they provide a phone number, call `identify_user` to look them up
 3. If found, greet them by name. If not, ask for their name.
 4. Ask how you can help them today (book, view, modify, or cancel an appointment)
@@ -53,19 +154,48 @@ Today's date is {today}.
 6. When the conversation is complete, call `end_conversation` with a summary
 
 ## Tool Usage Rules
-- ALWAYS call `identify_user` first before any other tool
-- Before booking, call `fetch_slots` to check availability
+- ALWAYS call `identify_user` first before any other tool (unless the caller has already been identified for you)
+- Before booking, call `fetch_slots` to check availability. Pass the patient's constraints (date range, time of day, "first available after ...", doctor, clinic) rather than fetching everything
+- Pass the doctor of the chosen slot to `book_appointment`; leave it empty if the patient has no preference
 - Before cancelling or modifying, call `retrieve_appointments` to find the appointment
 - ALWAYS confirm the details with the patient before calling `book_appointment`, `cancel_appointment`, or `modify_appointment`
 - When the patient says goodbye or is done, call `end_conversation`
 
 ## Important Notes
-- Today is {today} — always use this as the reference for "today", "tomorrow", "next week", etc.
 - Phone numbers should be stored in a consistent format (e.g., +1234567890)
 - Dates should be in YYYY-MM-DD format
 - Times should be in HH:MM 24-hour format
-- If a slot is not available, suggest alternatives
+- If a slot is not available, offer the `alternatives` returned with the error
+- If a tool returns the error `system_busy`, tell the patient its `message` in your own words and offer to try again shortly; never guess the result
 - Never make up appointment data — always use the tools to fetch real data
 """
 
-SYSTEM_PROMPT = _build_system_prompt()
+# Doctor roster, rendered from the configured schedules; static for a deployment, so still cacheable
+SYSTEM_PROMPT_DOCTORS = """
+## Doctors
+{doctors}
+"""
+
+# Dynamic part, re-rendered when the clinic-local date changes
+SYSTEM_PROMPT_DATE_SUFFIX = """
+## Today
+Today is {today} — always use this as the reference for "today", "tomorrow", "next week", etc.
+"""
+
+# Spoken from the audio cache to a caller who was not identified at room join, instead of
+# generating the same greeting with the LLM every time. Empty: always generate it.
+GREETING_TEXT = os.getenv(
+    "GREETING_TEXT",
+    "Hi, I'm Dr. Ava, the clinic's scheduling assistant. Could I have your phone number to get started?",
+)
+
+# Added to the initial chat context when the caller was identified at room join
+KNOWN_CALLER_NOTE = (
+    "The caller has already been identified from their session: {name}, phone number {phone}, "
+    "a returning patient. Greet them by name. Do not ask for their phone number or call `identify_user`."
+)
+NEW_CALLER_NOTE = (
+    "The caller's phone number is already known from their session: {phone}. There is no patient "
+    "record for it yet, so ask for their name when booking. Do not ask for their phone number or "
+    "call `identify_user`."
+)
@@ -0,0 +1,14 @@
+-- Make double-booking impossible at the database level.
+-- book_appointment / modify_appointment write in a single statement and rely on
+-- this index to reject a slot that is already taken (SQLSTATE 23505).
+
+-- Existing duplicates must be resolved before the unique index can be built:
+--   SELECT appointment_date, appointment_time, doctor_name, count(*)
+--   FROM appointments WHERE status = 'scheduled'
+--   GROUP BY 1, 2, 3 HAVING count(*) > 1;
+
+DROP INDEX IF EXISTS idx_appointments_date_time;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_scheduled_slot
+    ON appointments (appointment_date, appointment_time, doctor_name)
+    WHERE status = 'scheduled';
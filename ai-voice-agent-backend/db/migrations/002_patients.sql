@@ -0,0 +1,70 @@
+-- Normalized patients table keyed by E.164 phone number.
+-- identify_user_by_phone becomes a primary-key point read instead of a scan of
+-- appointment history. Run after 001_unique_scheduled_slot.sql.
+--
+-- 10-digit national numbers get the country code in the app.default_country_code
+-- setting (default 1), which must match the backend's DEFAULT_COUNTRY_CODE, or the
+-- backfilled patients are keyed under numbers identify_user never looks up:
+--   SET app.default_country_code = '44';  -- before running this script
+
+-- Mirrors tools/phone.py normalize_phone
+DROP FUNCTION IF EXISTS normalize_phone_e164(TEXT);
+CREATE OR REPLACE FUNCTION normalize_phone_e164(raw TEXT, country_code TEXT DEFAULT '1') RETURNS TEXT
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    digits TEXT := regexp_replace(raw, '\D', '', 'g');
+BEGIN
+    IF digits = '' THEN
+        RETURN btrim(raw);
+    ELSIF btrim(raw) LIKE '+%' THEN
+        RETURN '+' || digits;
+    ELSIF digits LIKE '00%' THEN
+        RETURN '+' || substr(digits, 3);
+    ELSIF length(digits) = 10 THEN
+        RETURN '+' || country_code || digits;
+    END IF;
+    RETURN '+' || digits;
+END;
+$$;
+
+CREATE TABLE IF NOT EXISTS patients (
+    phone_number VARCHAR(20) PRIMARY KEY,  -- E.164, e.g. +15551234567
+    patient_name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Canonicalize phone numbers already stored on appointments
+UPDATE appointments a
+SET phone_number = n.phone_number
+FROM (
+    SELECT id, normalize_phone_e164(
+        phone_number, coalesce(nullif(current_setting('app.default_country_code', true), ''), '1')
+    ) AS phone_number
+    FROM appointments
+) n
+WHERE a.id = n.id AND a.phone_number <> n.phone_number;
+
+-- Backfill: one patient per phone, using the most recently booked name
+INSERT INTO patients (phone_number, patient_name)
+SELECT DISTINCT ON (phone_number) phone_number, patient_name
+FROM appointments
+ORDER BY phone_number, created_at DESC
+ON CONFLICT (phone_number) DO NOTHING;
+
+-- Keep patients current from bookings, so booking stays a single INSERT
+CREATE OR REPLACE FUNCTION upsert_patient_from_appointment() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO patients (phone_number, patient_name)
+    VALUES (NEW.phone_number, NEW.patient_name)
+    ON CONFLICT (phone_number) DO UPDATE
+        SET patient_name = EXCLUDED.patient_name, updated_at = NOW();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_appointments_upsert_patient ON appointments;
+CREATE TRIGGER trg_appointments_upsert_patient
+    AFTER INSERT ON appointments
+    FOR EACH ROW EXECUTE FUNCTION upsert_patient_from_appointment();
@@ -0,0 +1,26 @@
+-- Reject appointments whose time ranges overlap for the same doctor, not just
+-- exact (date, time) duplicates. Needed once doctors have different slot lengths
+-- or an appointment runs longer than one slot. Writes that overlap fail with
+-- SQLSTATE 23P01; the unique index from 001 stays and still raises 23505 for an
+-- identical start. Run after 002_patients.sql.
+
+-- Existing overlaps must be resolved before the constraint can be added:
+--   SELECT a.id, b.id FROM appointments a JOIN appointments b
+--     ON a.doctor_name = b.doctor_name AND a.appointment_date = b.appointment_date AND a.id < b.id
+--    AND a.appointment_time < b.appointment_time + b.duration_minutes * INTERVAL '1 minute'
+--    AND b.appointment_time < a.appointment_time + a.duration_minutes * INTERVAL '1 minute'
+--   WHERE a.status = 'scheduled' AND b.status = 'scheduled';
+
+-- GiST support for the equality part (doctor_name WITH =)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap;
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (
+        doctor_name WITH =,
+        tsrange(
+            appointment_date + appointment_time,
+            appointment_date + appointment_time + duration_minutes * INTERVAL '1 minute'
+        ) WITH &&
+    )
+    WHERE (status = 'scheduled');
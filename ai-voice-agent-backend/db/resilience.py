@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import telemetry
+from db.storage import AppointmentStore, SlotConflict, InvalidRequest, StoreUnavailable
+from config import (
+    STORE_TIMEOUT_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY_MS,
+    HEDGE_MIN_DELAY_MS,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+)
+
+logger = logging.getLogger("resilience")
+
+# Monotonic time by which the current tool call must be done with storage
+_deadline: ContextVar[float | None] = ContextVar("store_deadline", default=None)
+
+
+@contextmanager
+def latency_budget(seconds: float):
+    """Bound every storage call in this block (and in tasks it starts) to `seconds` in total."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> float:
+    """Seconds left in the current latency budget (STORE_TIMEOUT_SECONDS outside any)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return STORE_TIMEOUT_SECONDS
+    return max(0.0, deadline - time.monotonic())
+
+
+class CircuitBreaker:
+    """Fails fast after `threshold` consecutive failures.
+
+    Open for `reset_seconds`, then half-open: one trial call goes through and its
+    outcome closes or re-opens the breaker; other calls keep failing fast meanwhile.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+        clock=time.monotonic,
+    ):
+        self._threshold = threshold
+        self._reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._trial or self._clock() - self._opened_at >= self._reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the trial when half-open)."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Storage recovered; circuit closed")
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial or (self._opened_at is None and self._failures >= self._threshold):
+            logger.warning(f"Storage failing ({self._failures} in a row); circuit open for {self._reset_seconds}s")
+            self._opened_at = self._clock()
+        self._trial = False
+
+    def release(self) -> None:
+        """The call let through was abandoned without an outcome (e.g. cancelled)."""
+        self._trial = False
+
+
+class ResilientStore(AppointmentStore):
+    """Wraps a store so slow or failing storage costs a tool call bounded time.
+
+    Every operation runs within the caller's latency budget. The idempotent reads are
+    hedged: if the first attempt is still running after the operation's observed p95,
+    a duplicate is sent and whichever answers first wins. Writes are never repeated.
+    Failures and timeouts trip a circuit breaker; all of them surface as
+    StoreUnavailable, while SlotConflict passes through as a normal answer.
+    """
+
+    def __init__(self, inner: AppointmentStore, breaker: CircuitBreaker | None = None):
+        self.inner = inner
+        self.breaker = breaker or CircuitBreaker()
+
+    # ---- Reads (hedged) ----
+
+    async def find_patient(self, phone_number: str) -> dict | None:
+        return await self._call("find_patient", phone_number, hedge=True)
+
+    async def scheduled_between(self, from_date: str, to_date: str | None = None) -> list[dict]:
+        return await self._call("scheduled_between", from_date, to_date, hedge=True)
+
+    async def appointments_for(self, phone_number: str) -> list[dict]:
+        return await self._call("appointments_for", phone_number, hedge=True)
+
+    # ---- Writes (single attempt) ----
+
+    async def reserve(self, appointment: dict) -> dict:
+        return await self._call("reserve", appointment)
+
+    async def cancel(self, appointment_id: str) -> dict | None:
+        return await self._call("cancel", appointment_id)
+
+    async def reschedule(self, appointment_id: str, updates: dict) -> dict | None:
+        return await self._call("reschedule", appointment_id, updates)
+
+    # ---- Policy ----
+
+    async def _call(self, op: str, *args, hedge: bool = False):
+        if not self.breaker.allow():
+            telemetry.record_store_event("rejected")
+            raise StoreUnavailable(f"{op}: storage circuit open")
+        budget = remaining_budget()
+        try:
+            call = self._hedged(op, *args) if hedge else self._attempt(op, *args)
+            result = await asyncio.wait_for(call, budget)
+        except (SlotConflict, InvalidRequest):
+            self.breaker.record_success()  # The database answered; the input was at fault
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except asyncio.TimeoutError as e:
+            # Only a call that had at least a typical answer's time says the store is unhealthy;
+            # one started with the tool's budget nearly spent (e.g. after queueing) does not
+            if budget >= self._hedge_delay(op):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            telemetry.record_store_event("timeout")
+            raise StoreUnavailable(f"{op}: no answer within {budget * 1000:.0f} ms") from e
+        except Exception as e:
+            self.breaker.record_failure()
+            telemetry.record_store_event("error")
+            logger.warning(f"Storage {op} failed: {e}")
+            raise StoreUnavailable(f"{op}: {e}") from e
+        self.breaker.record_success()
+        return result
+
+    async def _attempt(self, op: str, *args):
+        started = time.perf_counter()
+        result = await getattr(self.inner, op)(*args)
+        # Only completed attempts, so the p95 is what a healthy answer takes
+        telemetry.record(f"store.{op}", (time.perf_counter() - started) * 1000)
+        return result
+
+    def _hedge_delay(self, op: str) -> float:
+        p95 = telemetry.percentile(f"store.{op}", 95, HEDGE_MIN_SAMPLES)
+        return max(HEDGE_MIN_DELAY_MS, HEDGE_DEFAULT_DELAY_MS if p95 is None else p95) / 1000
+
+    async def _hedged(self, op: str, *args):
+        """First successful answer of the attempt and, if it is slow, one duplicate."""
+        first = asyncio.ensure_future(self._attempt(op, *args))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self._hedge_delay(op))
+            if done:
+                return done.pop().result()
+            telemetry.record_store_event("hedge")
+            pending.add(asyncio.ensure_future(self._attempt(op, *args)))
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                failed = None
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            telemetry.record_store_event("hedge_won")
+                        return task.result()
+                    failed = task
+                if not pending:
+                    return failed.result()  # Both attempts failed: raise the last error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,168 @@
+import asyncio
+import sqlite3
+import threading
+import uuid
+from db.storage import AppointmentStore, SlotConflict, InvalidRequest, APPOINTMENT_COLUMNS, BOOKED_COLUMNS
+from config import SLOT_CONFIG
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+
+def _minutes(column: str) -> str:
+    """SQL for an "HH:MM:SS" column as minutes from midnight."""
+    return f"(CAST(substr({column}, 1, 2) AS INTEGER) * 60 + CAST(substr({column}, 4, 2) AS INTEGER))"
+
+
+# Overlap with another scheduled appointment of the same doctor on the same day
+_OVERLAP = f"""
+    SELECT RAISE(ABORT, 'appointments_no_overlap') FROM appointments a
+    WHERE a.status = 'scheduled' AND a.id != NEW.id
+      AND a.doctor_name = NEW.doctor_name AND a.appointment_date = NEW.appointment_date
+      AND {_minutes('a.appointment_time')} < {_minutes('NEW.appointment_time')} + NEW.duration_minutes
+      AND {_minutes('NEW.appointment_time')} < {_minutes('a.appointment_time')} + a.duration_minutes;
+"""
+
+# Mirrors the PostgreSQL schema in the README and db/migrations, including its constraints
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS appointments (
+    id TEXT PRIMARY KEY,
+    phone_number TEXT NOT NULL,
+    patient_name TEXT NOT NULL,
+    appointment_date TEXT NOT NULL,
+    appointment_time TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL DEFAULT 30,
+    doctor_name TEXT NOT NULL DEFAULT '{SLOT_CONFIG["doctor_name"]}',
+    reason TEXT,
+    status TEXT NOT NULL DEFAULT 'scheduled'
+        CHECK (status IN ('scheduled', 'cancelled', 'completed', 'modified')),
+    created_at TEXT NOT NULL DEFAULT ({_NOW}),
+    updated_at TEXT NOT NULL DEFAULT ({_NOW})
+);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_phone ON appointments (phone_number);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_scheduled_slot
+    ON appointments (appointment_date, appointment_time, doctor_name)
+    WHERE status = 'scheduled';
+
+-- Stands in for the exclusion constraint, which SQLite does not have
+CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_insert
+    BEFORE INSERT ON appointments WHEN NEW.status = 'scheduled'
+BEGIN {_OVERLAP} END;
+
+CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_update
+    BEFORE UPDATE ON appointments WHEN NEW.status = 'scheduled'
+BEGIN {_OVERLAP} END;
+
+CREATE TABLE IF NOT EXISTS patients (
+    phone_number TEXT PRIMARY KEY,
+    patient_name TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT ({_NOW}),
+    updated_at TEXT NOT NULL DEFAULT ({_NOW})
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_appointments_upsert_patient
+    AFTER INSERT ON appointments
+BEGIN
+    INSERT INTO patients (phone_number, patient_name) VALUES (NEW.phone_number, NEW.patient_name)
+    ON CONFLICT (phone_number) DO UPDATE
+        SET patient_name = excluded.patient_name, updated_at = {_NOW};
+END;
+"""
+
+_WRITABLE = {"phone_number", "patient_name", "appointment_date", "appointment_time", "duration_minutes",
+             "doctor_name", "reason", "status"}
+
+
+def _pg_time(value) -> str:
+    """Store times the way PostgreSQL returns TIME columns ("HH:MM:SS")."""
+    value = str(value)
+    return value if len(value) == 8 else f"{value[:5]}:00"
+
+
+def _columns(values: dict) -> dict:
+    unknown = set(values) - _WRITABLE
+    if unknown:
+        raise InvalidRequest(f"Unknown appointment columns: {', '.join(sorted(unknown))}")
+    if "appointment_time" in values:
+        values = {**values, "appointment_time": _pg_time(values["appointment_time"])}
+    return values
+
+
+class SQLiteStore(AppointmentStore):
+    """Embedded appointment storage: a SQLite file, or ":memory:" for one process.
+
+    No network round trip, so it suits edge deployments, tests and benchmarks. An
+    in-memory database answers each statement in microseconds, inline on the event
+    loop. A file may be locked by another process's write for up to the busy timeout,
+    so its statements run in a worker thread instead. Constraints are enforced
+    inside SQLite (unique index plus overlap triggers), so concurrent writers from
+    several processes sharing a file get the same guarantees as with PostgreSQL.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()  # One connection, used from worker and prewarm threads
+        self._inline = path == ":memory:"  # Never waits on another process's lock
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            try:
+                return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+            except sqlite3.IntegrityError as e:
+                if "appointments_no_overlap" in str(e) or "UNIQUE constraint failed: appointments" in str(e):
+                    raise SlotConflict(str(e)) from e
+                raise InvalidRequest(str(e)) from e
+
+    async def _run(self, sql: str, params: tuple = ()) -> list[dict]:
+        if self._inline:
+            return self._query(sql, params)
+        return await asyncio.to_thread(self._query, sql, params)
+
+    async def find_patient(self, phone_number: str) -> dict | None:
+        rows = await self._run(
+            "SELECT patient_name, phone_number FROM patients WHERE phone_number = ?", (phone_number,)
+        )
+        return rows[0] if rows else None
+
+    async def scheduled_between(self, from_date: str, to_date: str | None = None) -> list[dict]:
+        sql = f"SELECT {', '.join(BOOKED_COLUMNS)} FROM appointments WHERE status = 'scheduled' AND appointment_date >= ?"
+        if to_date:
+            return await self._run(sql + " AND appointment_date <= ?", (from_date, to_date))
+        return await self._run(sql, (from_date,))
+
+    async def appointments_for(self, phone_number: str) -> list[dict]:
+        return await self._run(
+            f"SELECT {', '.join(APPOINTMENT_COLUMNS)} FROM appointments"
+            " WHERE phone_number = ? AND status = 'scheduled' ORDER BY appointment_date, appointment_time",
+            (phone_number,),
+        )
+
+    async def reserve(self, appointment: dict) -> dict:
+        values = {"id": str(uuid.uuid4()), **_columns(appointment)}
+        names = ", ".join(values)
+        marks = ", ".join("?" for _ in values)
+        return (await self._run(
+            f"INSERT INTO appointments ({names}) VALUES ({marks}) RETURNING *", tuple(values.values())
+        ))[0]
+
+    async def cancel(self, appointment_id: str) -> dict | None:
+        return await self.reschedule(appointment_id, {"status": "cancelled"})
+
+    async def reschedule(self, appointment_id: str, updates: dict) -> dict | None:
+        values = _columns(updates)
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        rows = await self._run(
+            f"UPDATE appointments SET {assignments}, updated_at = {_NOW}"
+            " WHERE id = ? AND status = 'scheduled' RETURNING *",
+            (*values.values(), appointment_id),
+        )
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from config import STORAGE_BACKEND, SQLITE_PATH
+
+# Columns of an appointment row returned by appointments_for
+APPOINTMENT_COLUMNS = ("id", "patient_name", "phone_number", "appointment_date", "appointment_time",
+                       "doctor_name", "reason")
+# Columns of a booked row returned by scheduled_between, enough to rebuild availability
+BOOKED_COLUMNS = ("id", "appointment_date", "appointment_time", "duration_minutes", "doctor_name")
+
+
+class SlotConflict(Exception):
+    """A write would double-book a slot or overlap another scheduled appointment of the doctor."""
+
+
+class InvalidRequest(Exception):
+    """The database rejected a call's input (bad value, constraint, permission); retrying won't help."""
+
+
+class StoreUnavailable(Exception):
+    """Storage failed, ran out of the tool's latency budget, or is being skipped by the circuit breaker."""
+
+
+class AppointmentStore(ABC):
+    """Storage operations behind the appointment tools.
+
+    Implementations enforce the same rules as the PostgreSQL schema: one scheduled
+    appointment per (date, time, doctor), no overlapping scheduled time ranges per
+    doctor, and a patients row upserted on every booking. Phone numbers arrive
+    already normalized. Rows are dicts with dates as "YYYY-MM-DD" and times as
+    "HH:MM:SS", the way PostgREST returns them.
+    """
+
+    @abstractmethod
+    async def find_patient(self, phone_number: str) -> dict | None:
+        """The patients row ({"patient_name", "phone_number"}) for a phone, or None."""
+
+    @abstractmethod
+    async def scheduled_between(self, from_date: str, to_date: str | None = None) -> list[dict]:
+        """Scheduled appointments (BOOKED_COLUMNS) from a date onwards, through `to_date` if given."""
+
+    @abstractmethod
+    async def appointments_for(self, phone_number: str) -> list[dict]:
+        """A caller's scheduled appointments (APPOINTMENT_COLUMNS), by date."""
+
+    @abstractmethod
+    async def reserve(self, appointment: dict) -> dict:
+        """Insert a scheduled appointment and return the stored row. Raises SlotConflict."""
+
+    @abstractmethod
+    async def cancel(self, appointment_id: str) -> dict | None:
+        """Cancel a scheduled appointment; the updated row, or None if none was scheduled."""
+
+    @abstractmethod
+    async def reschedule(self, appointment_id: str, updates: dict) -> dict | None:
+        """Apply `updates` to a scheduled appointment; the updated row, or None if none was
+        scheduled. Raises SlotConflict."""
+
+
+def create_store(backend: str, sqlite_path: str = SQLITE_PATH) -> AppointmentStore:
+    """Store for a STORAGE_BACKEND name: "supabase" or "sqlite"."""
+    # Imported here so a deployment only loads the client it uses
+    if backend == "supabase":
+        from db.supabase_store import SupabaseStore
+        return SupabaseStore()
+    if backend == "sqlite":
+        from db.sqlite_store import SQLiteStore
+        return SQLiteStore(sqlite_path)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected supabase or sqlite")
+
+
+_store: AppointmentStore | None = None
+
+
+def get_store() -> AppointmentStore:
+    """Get or create the configured appointment store, behind timeouts, hedging and a circuit breaker."""
+    global _store
+    if _store is None:
+        from db.resilience import ResilientStore
+        _store = ResilientStore(create_store(STORAGE_BACKEND))
+    return _store
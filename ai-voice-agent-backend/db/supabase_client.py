@@ -1,14 +1,68 @@
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from postgrest.exceptions import APIError
+from config import SUPABASE_URL, SUPABASE_KEY, DB_MAX_WORKERS
+from telemetry import span
 
-_client: Client | None = None
+if TYPE_CHECKING:
+    from supabase import Client
 
+# PostgreSQL SQLSTATEs for a unique and an exclusion constraint violation
+UNIQUE_VIOLATION = "23505"
+EXCLUSION_VIOLATION = "23P01"
+# SQLSTATE classes and PostgREST error groups caused by the request itself (invalid value,
+# constraint, permission, unknown column, auth) rather than by the database being unavailable
+_CLIENT_ERROR_PREFIXES = ("22", "23", "42", "PGRST1", "PGRST2", "PGRST3")
 
-def get_supabase() -> Client:
+_client: "Client | None" = None
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_supabase() -> "Client":
     """Get or create a singleton Supabase client."""
     global _client
     if _client is None:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+        # Imported here: the supabase package is slow to import and only needed once connected
+        from supabase import create_client
         _client = create_client(SUPABASE_URL, SUPABASE_KEY)
     return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the thread pool that runs blocking database calls."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DB_MAX_WORKERS, thread_name_prefix="supabase-io"
+        )
+    return _executor
+
+
+async def run_query(query):
+    """Execute a Supabase query builder without blocking the event loop.
+
+    The Supabase client is synchronous, so `.execute()` runs on a bounded worker
+    pool while the event loop keeps serving audio for other sessions. The client's
+    pooled HTTP connection is shared across worker threads.
+    """
+    loop = asyncio.get_running_loop()
+    with span("db.query"):
+        return await loop.run_in_executor(_get_executor(), query.execute)
+
+
+def is_unique_violation(error: Exception) -> bool:
+    """True if a query failed because it hit a unique constraint."""
+    return isinstance(error, APIError) and error.code == UNIQUE_VIOLATION
+
+
+def is_slot_conflict(error: Exception) -> bool:
+    """True if a write was rejected for taking a booked slot or overlapping another booking."""
+    return isinstance(error, APIError) and error.code in (UNIQUE_VIOLATION, EXCLUSION_VIOLATION)
+
+
+def is_invalid_request(error: Exception) -> bool:
+    """True if the database rejected a query for its input, not for being unavailable."""
+    return isinstance(error, APIError) and str(error.code or "").startswith(_CLIENT_ERROR_PREFIXES)
@@ -0,0 +1,89 @@
+from db.storage import AppointmentStore, SlotConflict, InvalidRequest, APPOINTMENT_COLUMNS, BOOKED_COLUMNS
+from db.supabase_client import get_supabase, run_query, is_slot_conflict, is_invalid_request
+
+
+class SupabaseStore(AppointmentStore):
+    """Appointment storage in Supabase through the PostgREST query builder.
+
+    Every operation is a single statement; double-booking and overlaps are rejected
+    by the unique index and exclusion constraint (db/migrations).
+    """
+
+    async def find_patient(self, phone_number: str) -> dict | None:
+        sb = get_supabase()
+        result = await run_query(
+            sb.table("patients")
+            .select("patient_name, phone_number")
+            .eq("phone_number", phone_number)
+            .limit(1)
+        )
+        return result.data[0] if result.data else None
+
+    async def scheduled_between(self, from_date: str, to_date: str | None = None) -> list[dict]:
+        sb = get_supabase()
+        query = (
+            sb.table("appointments")
+            .select(", ".join(BOOKED_COLUMNS))
+            .eq("status", "scheduled")
+            .gte("appointment_date", from_date)
+        )
+        if to_date:
+            query = query.lte("appointment_date", to_date)
+        result = await run_query(query)
+        return result.data
+
+    async def appointments_for(self, phone_number: str) -> list[dict]:
+        sb = get_supabase()
+        result = await run_query(
+            sb.table("appointments")
+            .select(", ".join(APPOINTMENT_COLUMNS))
+            .eq("phone_number", phone_number)
+            .eq("status", "scheduled")
+            .order("appointment_date")
+        )
+        return result.data
+
+    async def reserve(self, appointment: dict) -> dict:
+        sb = get_supabase()
+        try:
+            result = await run_query(sb.table("appointments").insert(appointment))
+        except Exception as e:
+            if is_slot_conflict(e):
+                raise SlotConflict(str(e)) from e
+            if is_invalid_request(e):
+                raise InvalidRequest(str(e)) from e
+            raise
+        return result.data[0]
+
+    async def cancel(self, appointment_id: str) -> dict | None:
+        sb = get_supabase()
+        try:
+            result = await run_query(
+                sb.table("appointments")
+                .update({"status": "cancelled"})
+                .eq("id", appointment_id)
+                .eq("status", "scheduled")
+            )
+        except Exception as e:
+            if is_invalid_request(e):
+                raise InvalidRequest(str(e)) from e
+            raise
+        return result.data[0] if result.data else None
+
+    async def reschedule(self, appointment_id: str, updates: dict) -> dict | None:
+        sb = get_supabase()
+        # The status filter rejects cancelled rows in the same statement
+        try:
+            result = await run_query(
+                sb.table("appointments")
+                .update(updates)
+                .eq("id", appointment_id)
+                .eq("status", "scheduled")
+            )
+        except Exception as e:
+            if is_slot_conflict(e):
+                raise SlotConflict(str(e)) from e
+            if is_invalid_request(e):
+                raise InvalidRequest(str(e)) from e
+            raise
+        return result.data[0] if result.data else None
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass
+import telemetry
+from models import ToolCallEvent
+from config import TOOL_CALL_TOPIC, TOOL_EVENT_COALESCE_MS, TOOL_EVENT_MAX_PENDING, TOOL_EVENT_MAX_BATCH
+
+logger = logging.getLogger("tool-event-publisher")
+
+
+@dataclass
+class PublishStats:
+    """Running totals for one room's tool-event publisher."""
+    frames: int = 0
+    events: int = 0
+    coalesced: int = 0     # "started" events superseded by their result in the same frame
+    dropped: int = 0       # events dropped because the queue was full
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return self.total_latency_ms / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "frames": self.frames,
+            "events": self.events,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "mean_latency_ms": round(self.mean_latency_ms, 2),
+            "max_latency_ms": round(self.max_latency_ms, 2),
+        }
+
+
+def _coalesce(events: list[ToolCallEvent]) -> list[ToolCallEvent]:
+    """Drop "started" events whose result is already in the same batch.
+
+    Pairs each result with the earliest open "started" of the same tool, the same
+    way the frontend matches them.
+    """
+    superseded: set[int] = set()
+    open_started: dict[str, list[int]] = {}
+    for i, event in enumerate(events):
+        if event.status == "started":
+            open_started.setdefault(event.tool_name, []).append(i)
+        elif open_started.get(event.tool_name):
+            superseded.add(open_started[event.tool_name].pop(0))
+    return [e for i, e in enumerate(events) if i not in superseded]
+
+
+def encode_frame(events: list[ToolCallEvent]) -> bytes:
+    """One event is sent as a bare object (the original format); several as a JSON array."""
+    if len(events) == 1:
+        return events[0].model_dump_json().encode("utf-8")
+    return ("[" + ",".join(e.model_dump_json() for e in events) + "]").encode("utf-8")
+
+
+class ToolEventPublisher:
+    """Per-room outbound queue for tool call events.
+
+    `publish()` only enqueues, so tools never wait on the data channel. A background
+    task waits a short coalescing window, merges everything queued into as few
+    reliable `publish_data` frames as possible and records publish latency
+    (enqueue of the oldest event to frame delivered).
+    """
+
+    def __init__(
+        self,
+        room,
+        topic: str = TOOL_CALL_TOPIC,
+        coalesce_window: float = TOOL_EVENT_COALESCE_MS / 1000,
+        max_pending: int = TOOL_EVENT_MAX_PENDING,
+        max_batch: int = TOOL_EVENT_MAX_BATCH,
+    ):
+        self._room = room
+        self._topic = topic
+        self._window = coalesce_window
+        self._max_pending = max_pending
+        self._max_batch = max_batch
+        self._pending: list[tuple[float, ToolCallEvent]] = []
+        self._has_pending = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+        self.stats = PublishStats()
+
+    def publish(self, event: ToolCallEvent) -> None:
+        """Queue an event without blocking."""
+        if len(self._pending) >= self._max_pending:
+            self._drop_one()
+        self._pending.append((time.perf_counter(), event))
+        self._idle.clear()
+        self._has_pending.set()
+        if self._task is None:
+            self._task = telemetry.detached_task(self._run())  # Outlives the tool call that starts it
+
+    async def flush(self) -> None:
+        """Publish everything queued now and wait until it has been sent."""
+        if self._pending:
+            self._flush_now.set()
+        await self._idle.wait()
+
+    async def aclose(self) -> None:
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _drop_one(self) -> None:
+        """Backpressure: drop the oldest "started" event, else the oldest event."""
+        for i, (_, event) in enumerate(self._pending):
+            if event.status == "started":
+                del self._pending[i]
+                break
+        else:
+            del self._pending[0]
+        self.stats.dropped += 1
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            if not self._flush_now.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self._window)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self._pending = self._pending, []
+            self._has_pending.clear()
+            self._flush_now.clear()
+            await self._send(batch)
+            if not self._pending:
+                self._idle.set()
+
+    async def _send(self, batch: list[tuple[float, ToolCallEvent]]) -> None:
+        events = _coalesce([event for _, event in batch])
+        self.stats.coalesced += len(batch) - len(events)
+        oldest = batch[0][0]
+
+        for start in range(0, len(events), self._max_batch):
+            frame = events[start:start + self._max_batch]
+            try:
+                await self._room.local_participant.publish_data(
+                    payload=encode_frame(frame),
+                    reliable=True,
+                    topic=self._topic,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish tool event: {e}")
+                continue
+
+            latency_ms = (time.perf_counter() - oldest) * 1000
+            self.stats.frames += 1
+            self.stats.events += len(frame)
+            self.stats.total_latency_ms += latency_ms
+            self.stats.max_latency_ms = max(self.stats.max_latency_ms, latency_ms)
+            telemetry.record("publish.frame", latency_ms)
+            logger.debug(f"Published {len(frame)} tool event(s) in {latency_ms:.1f}ms")
+
+
+_publishers: "weakref.WeakKeyDictionary[object, ToolEventPublisher]" = weakref.WeakKeyDictionary()
+
+
+def publisher_for(room) -> ToolEventPublisher:
+    """Get or create the tool-event publisher for a room."""
+    publisher = _publishers.get(room)
+    if publisher is None:
+        publisher = _publishers[room] = ToolEventPublisher(room)
+    return publisher
+
+
+async def flush_publisher(room) -> None:
+    """Send any queued tool events for a room right away."""
+    publisher = _publishers.get(room)
+    if publisher is not None:
+        await publisher.flush()
+
+
+async def close_publisher(room) -> None:
+    """Flush and stop a room's publisher, logging its delivery stats."""
+    publisher = _publishers.pop(room, None)
+    if publisher is not None:
+        await publisher.aclose()
+        logger.info(f"Tool event publisher stats: {publisher.stats.as_dict()}")
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+import logging
+import audio_cache
+from telemetry import detached_task
+from config import FILLER_DELAY_MS, FILLER_PROGRESS_MS, FILLER_PHRASES, FILLER_PROGRESS_PHRASE
+
+logger = logging.getLogger("filler")
+
+
+def _say(session, text: str) -> None:
+    """Queue a filler without adding it to the chat context; never awaited, so the tool's
+    answer is spoken after it rather than cut off by it."""
+    audio_cache.say(session, text, add_to_chat_ctx=False)
+
+
+async def _speak_while_waiting(session, tool: str) -> None:
+    try:
+        if FILLER_DELAY_MS:
+            await asyncio.sleep(FILLER_DELAY_MS / 1000)
+            _say(session, FILLER_PHRASES[tool])
+        if FILLER_PROGRESS_MS > FILLER_DELAY_MS:
+            await asyncio.sleep((FILLER_PROGRESS_MS - FILLER_DELAY_MS) / 1000)
+            _say(session, FILLER_PROGRESS_PHRASE)
+    except Exception as e:
+        logger.warning(f"Filler for {tool} failed: {e}")
+
+
+def masked(tool: str):
+    """Decorator for an agent tool: if it is still running after FILLER_DELAY_MS, the session
+    says the tool's filler phrase (and a progress update after FILLER_PROGRESS_MS). Nothing
+    is said when the tool returns sooner."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, context, *args, **kwargs):
+            speaker = detached_task(_speak_while_waiting(context.session, tool))
+            try:
+                return await fn(self, context, *args, **kwargs)
+            finally:
+                speaker.cancel()
+        return wrapper
+    return decorator
@@ -0,0 +1,78 @@
+import importlib
+from types import ModuleType
+from config import (
+    STT_PROVIDER,
+    STT_MODEL,
+    LLM_PROVIDER,
+    LLM_MODEL,
+    LLM_PROMPT_CACHING,
+    TTS_PROVIDER,
+    TTS_MODEL,
+    TTS_VOICE,
+    TAVUS_REPLICA_ID,
+    TAVUS_PERSONA_ID,
+)
+
+VAD_MODULE = "livekit.plugins.silero"
+TURN_DETECTOR_MODULE = "livekit.plugins.turn_detector.multilingual"
+TAVUS_MODULE = "livekit.plugins.tavus"
+
+
+def plugin_module(provider: str) -> str:
+    return f"livekit.plugins.{provider}"
+
+
+def avatar_enabled() -> bool:
+    return bool(TAVUS_REPLICA_ID and TAVUS_PERSONA_ID)
+
+
+def required_plugins() -> list[str]:
+    """Plugin modules this deployment actually uses."""
+    modules = [
+        plugin_module(STT_PROVIDER),
+        plugin_module(LLM_PROVIDER),
+        plugin_module(TTS_PROVIDER),
+        VAD_MODULE,
+        TURN_DETECTOR_MODULE,
+    ]
+    if avatar_enabled():
+        modules.append(TAVUS_MODULE)
+    return list(dict.fromkeys(modules))
+
+
+def load_plugins(modules: list[str] | None = None) -> None:
+    """Import plugin modules. Must run on the main thread, where LiveKit registers plugins."""
+    for module in required_plugins() if modules is None else modules:
+        importlib.import_module(module)
+
+
+def _provider(name: str) -> ModuleType:
+    return importlib.import_module(plugin_module(name))
+
+
+# ---- Builders: import a plugin only when a session needs it ----
+
+def build_stt():
+    return _provider(STT_PROVIDER).STT(model=STT_MODEL)
+
+
+def build_llm():
+    kwargs = {}
+    if LLM_PROVIDER == "anthropic" and LLM_PROMPT_CACHING:
+        # Cache breakpoints after the tools, the system prompt and the latest turn
+        kwargs["caching"] = "ephemeral"
+    return _provider(LLM_PROVIDER).LLM(model=LLM_MODEL, **kwargs)
+
+
+def build_tts():
+    kwargs = {"voice": TTS_VOICE} if TTS_VOICE else {}
+    return _provider(TTS_PROVIDER).TTS(model=TTS_MODEL, **kwargs)
+
+
+def build_turn_detection():
+    return importlib.import_module(TURN_DETECTOR_MODULE).MultilingualModel()
+
+
+def build_avatar():
+    tavus = importlib.import_module(TAVUS_MODULE)
+    return tavus.AvatarSession(replica_id=TAVUS_REPLICA_ID, persona_id=TAVUS_PERSONA_ID)
@@ -0,0 +1,182 @@
+import importlib
+import logging
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+import telemetry
+from plugins import VAD_MODULE
+from config import SUPABASE_URL, SUPABASE_KEY, STORAGE_BACKEND, PREWARM_TIMEOUT_SECONDS, STT_PROVIDER, LLM_PROVIDER, TTS_PROVIDER
+
+logger = logging.getLogger("prewarm")
+
+# API hosts of the providers we know, resolved ahead of time so the first call doesn't wait on DNS
+PROVIDER_HOSTS = {
+    "deepgram": "api.deepgram.com",
+    "anthropic": "api.anthropic.com",
+    "cartesia": "api.cartesia.ai",
+    "openai": "api.openai.com",
+    "elevenlabs": "api.elevenlabs.io",
+}
+
+
+class PrewarmError(RuntimeError):
+    """A required component failed to load; the process must not take jobs."""
+
+
+@dataclass
+class Component:
+    """One thing to load before the process accepts a job.
+
+    `load` runs in a worker thread; its return value is stored in
+    `proc.userdata[name]` unless it is None.
+    """
+    name: str
+    load: Callable[[], object]
+    required: bool = False
+
+
+@dataclass
+class PrewarmReport:
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    total_ms: float = 0.0
+    ready: bool = False
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "total_ms": round(self.total_ms, 1),
+            "timings_ms": {k: round(v, 1) for k, v in self.timings_ms.items()},
+            "errors": self.errors,
+        }
+
+
+def _timed(load: Callable[[], object]) -> tuple[object, float]:
+    start = time.perf_counter()
+    value = load()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def run_prewarm(
+    components: list[Component],
+    userdata: dict,
+    imports: Iterable[str] = (),
+    timeout: float = PREWARM_TIMEOUT_SECONDS,
+) -> PrewarmReport:
+    """Load all components concurrently and report how long each took.
+
+    `imports` are imported first on the calling thread, because LiveKit plugins
+    must register on the main thread.
+    Optional components that fail or time out are logged and skipped (their
+    first use will simply be cold). If a required one fails, raises PrewarmError
+    so LiveKit does not hand the process any jobs.
+    """
+    report = PrewarmReport()
+    start = time.perf_counter()
+    for module in imports:
+        importlib.import_module(module)
+    report.timings_ms["imports"] = (time.perf_counter() - start) * 1000
+    pool = ThreadPoolExecutor(max_workers=len(components) or 1, thread_name_prefix="prewarm")
+    try:
+        futures = {pool.submit(_timed, c.load): c for c in components}
+        wait(futures, timeout=timeout)
+        for future, component in futures.items():
+            if not future.done():
+                report.errors[component.name] = f"timed out after {timeout}s"
+                continue
+            try:
+                value, ms = future.result()
+            except Exception as e:
+                report.errors[component.name] = f"{type(e).__name__}: {e}"
+                continue
+            report.timings_ms[component.name] = ms
+            telemetry.record(f"prewarm.{component.name}", ms)
+            if value is not None:
+                userdata[component.name] = value
+    finally:
+        # Don't let a hung optional component hold up the process
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    report.total_ms = (time.perf_counter() - start) * 1000
+    failed_required = [c.name for c in components if c.required and c.name in report.errors]
+    report.ready = not failed_required
+    userdata["prewarm"] = report
+
+    if report.errors:
+        logger.warning(f"Prewarm errors: {report.errors}")
+    logger.info(f"Prewarm: {report.as_dict()}")
+    if failed_required:
+        raise PrewarmError(f"Required components failed to load: {', '.join(failed_required)}")
+    return report
+
+
+# ---- Components ----
+
+def _load_vad():
+    return importlib.import_module(VAD_MODULE).VAD.load()
+
+
+def _check_turn_detector() -> None:
+    """Make sure the turn-detector files are on disk (and in the page cache).
+
+    The ONNX model itself runs in the worker's shared inference process; each
+    session's MultilingualModel only reads its language table, and fails if
+    `download-files` was never run.
+    """
+    from huggingface_hub import hf_hub_download
+    from livekit.plugins.turn_detector.base import HG_MODEL, MODEL_REVISIONS
+    hf_hub_download(HG_MODEL, "languages.json", revision=MODEL_REVISIONS["multilingual"], local_files_only=True)
+
+
+def _warm_database() -> None:
+    """Create the Supabase client and open its pooled HTTPS connection."""
+    from db.supabase_client import get_supabase
+    get_supabase().table("patients").select("phone_number").limit(1).execute()
+
+
+def _open_embedded_store() -> None:
+    """Open the SQLite store and create its schema before the first call needs it."""
+    from db.storage import get_store
+    get_store()
+
+
+def _build_slot_calendars() -> None:
+    from tools.clinic_time import clinic_today
+    from tools.slot_generator import get_calendars
+    get_calendars(clinic_today())
+
+
+def _resolve_provider_hosts() -> None:
+    for provider in {STT_PROVIDER, LLM_PROVIDER, TTS_PROVIDER}:
+        if provider in PROVIDER_HOSTS:
+            socket.getaddrinfo(PROVIDER_HOSTS[provider], 443, type=socket.SOCK_STREAM)
+
+
+def _warm_audio_cache() -> None:
+    """Fault the cached greeting and filler audio into memory, so the first words play at once.
+
+    Phrases not cached yet are synthesized by the first session (see agent.py).
+    """
+    from audio_cache import cache_key, fixed_phrases, get_audio_cache
+    from plugins import build_tts
+    sample_rate = build_tts().sample_rate  # Constructing the plugin makes no request
+    phrases = fixed_phrases()
+    found = get_audio_cache().warm([cache_key(text, sample_rate) for text in phrases])
+    logger.info(f"Audio cache: {found}/{len(phrases)} fixed phrases cached")
+
+
+def default_components() -> list[Component]:
+    components = [
+        Component("vad", _load_vad, required=True),
+        Component("turn_detector", _check_turn_detector, required=True),
+        Component("slot_calendar", _build_slot_calendars),
+        Component("provider_dns", _resolve_provider_hosts),
+        Component("audio_cache", _warm_audio_cache),
+    ]
+    if STORAGE_BACKEND == "sqlite":
+        components.append(Component("database", _open_embedded_store, required=True))
+    elif SUPABASE_URL and SUPABASE_KEY:
+        components.append(Component("database", _warm_database))
+    return components
@@ -0,0 +1,46 @@
+import hashlib
+import json
+from datetime import date
+from functools import lru_cache
+from livekit.agents import llm
+from tools.clinic_time import clinic_today
+from tools.schedules import get_schedules
+from config import SYSTEM_PROMPT_PREFIX, SYSTEM_PROMPT_DOCTORS, SYSTEM_PROMPT_DATE_SUFFIX
+
+
+def doctor_roster() -> str:
+    """One line per configured doctor, for the static part of the prompt."""
+    return "\n".join(
+        f"- {s.name}" + (f" ({s.clinic})" if s.clinic else "") + f", {s.slot_duration}-minute appointments"
+        for s in get_schedules()
+    )
+
+
+@lru_cache(maxsize=4)
+def _render(today: date, roster: str) -> str:
+    return (
+        SYSTEM_PROMPT_PREFIX
+        + SYSTEM_PROMPT_DOCTORS.format(doctors=roster)
+        + SYSTEM_PROMPT_DATE_SUFFIX.format(today=today.strftime("%A, %B %d, %Y"))
+    )
+
+
+def build_system_prompt(today: date | None = None) -> str:
+    """System prompt for a new session.
+
+    The static prefix and doctor roster are byte-identical for every session so the
+    LLM provider can serve them from its prompt cache; only the date suffix changes,
+    and it is rendered once per clinic-local day.
+    """
+    return _render(today or clinic_today(), doctor_roster())
+
+
+def prefix_fingerprint(instructions: str, tools: list) -> str:
+    """Short hash of the cacheable request prefix: tool schemas plus system prompt.
+
+    Logged for every session; if it differs between sessions on the same day,
+    something is changing the prefix and defeating the provider's prompt cache.
+    """
+    schemas = llm.ToolContext(tools).parse_function_tools("anthropic")
+    payload = json.dumps(schemas) + instructions
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
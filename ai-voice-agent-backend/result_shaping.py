@@ -0,0 +1,131 @@
+import json
+import math
+from datetime import date
+import telemetry
+from tools.schedules import slot_minutes as doctor_slot_minutes
+from config import SLOT_CONFIG, TOOL_RESULT_TOKEN_BUDGETS
+
+# Appointment columns the LLM needs to talk about and act on an appointment
+APPOINTMENT_FIELDS = ("id", "appointment_date", "appointment_time", "doctor_name", "reason")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: about 4 characters per token for English and JSON."""
+    return math.ceil(len(text) / 4)
+
+
+def _to_json(result) -> str:
+    return json.dumps(result, default=str, separators=(",", ":"))
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm[:5].split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def time_ranges(times: list[str], step: int) -> str:
+    """Collapse sorted start times `step` minutes apart into "09:00-11:30, 14:00"."""
+    runs: list[list[str]] = []
+    for t in times:
+        if runs and _minutes(t) - _minutes(runs[-1][1]) == step:
+            runs[-1][1] = t
+        else:
+            runs.append([t, t])
+    return ", ".join(first if first == last else f"{first}-{last}" for first, last in runs)
+
+
+def compact_slots(slots: list[dict], slot_minutes: int | None = None) -> dict:
+    """Group slots by day into ranges of start times.
+
+    With a single doctor: {"doctor": ..., "days": {"Mon 2026-10-19": "09:00-11:30, 14:00-16:30"}};
+    with several, each day maps doctor -> ranges. Ranges step by each doctor's slot
+    length unless `slot_minutes` is given; "slot_minutes" maps doctor -> length
+    when the doctors' lengths differ.
+    """
+    by_day: dict[str, dict[str, list[str]]] = {}
+    for slot in slots:
+        by_day.setdefault(slot["date"], {}).setdefault(slot["doctor"], []).append(slot["time"])
+    doctors = list(dict.fromkeys(doctor for per_doctor in by_day.values() for doctor in per_doctor))
+    steps = {doctor: slot_minutes or doctor_slot_minutes(doctor) for doctor in doctors}
+
+    days = {}
+    for day, per_doctor in by_day.items():
+        label = f"{date.fromisoformat(day):%a} {day}"
+        ranges = {doctor: time_ranges(times, steps[doctor]) for doctor, times in per_doctor.items()}
+        days[label] = next(iter(ranges.values())) if len(doctors) == 1 else ranges
+
+    if len(set(steps.values())) > 1:
+        minutes = steps
+    else:
+        minutes = next(iter(steps.values()), slot_minutes or SLOT_CONFIG["slot_duration"])
+    result = {"slot_minutes": minutes, "days": days, "total_available": len(slots)}
+    if len(doctors) == 1:
+        result["doctor"] = doctors[0]
+    return result
+
+
+def project_appointment(row: dict) -> dict:
+    """Only the columns the LLM needs, with times as HH:MM."""
+    projected = {k: row[k] for k in APPOINTMENT_FIELDS if row.get(k) is not None}
+    if "appointment_time" in projected:
+        projected["appointment_time"] = str(projected["appointment_time"])[:5]
+    return projected
+
+
+def fit_to_budget(result: dict, key: str, budget: int) -> dict:
+    """Drop trailing entries of `result[key]` until the JSON fits in `budget` tokens.
+
+    Records how many were left out, so the LLM knows to ask for a narrower query.
+    """
+    entries = result[key]
+    items = list(entries.items()) if isinstance(entries, dict) else list(entries)
+    kept = len(items)
+    while kept > 1 and estimate_tokens(_to_json(result)) > budget:
+        kept -= 1
+        result[key] = dict(items[:kept]) if isinstance(entries, dict) else items[:kept]
+        result["omitted"] = len(items) - kept
+    return result
+
+
+def _finish(tool: str, raw, shaped: dict) -> dict:
+    telemetry.record_result_tokens(tool, estimate_tokens(_to_json(raw)), estimate_tokens(_to_json(shaped)))
+    return shaped
+
+
+def shape_slots(slots: list[dict]) -> dict:
+    """fetch_slots result: compact day ranges within the tool's token budget."""
+    shaped = fit_to_budget(compact_slots(slots), "days", TOOL_RESULT_TOKEN_BUDGETS["fetch_slots"])
+    return _finish("fetch_slots", {"slots": slots, "total_available": len(slots)}, shaped)
+
+
+def shape_appointments(appointments: list[dict]) -> dict:
+    """retrieve_appointments result: projected rows within the tool's token budget."""
+    shaped = fit_to_budget(
+        {"appointments": [project_appointment(a) for a in appointments], "count": len(appointments)},
+        "appointments",
+        TOOL_RESULT_TOKEN_BUDGETS["retrieve_appointments"],
+    )
+    return _finish("retrieve_appointments", {"appointments": appointments, "count": len(appointments)}, shaped)
+
+
+def shape_write_result(tool: str, result: dict) -> dict:
+    """book/cancel/modify result with the affected row projected."""
+    shaped = {
+        k: project_appointment(v) if k in ("appointment", "cancelled", "updated") and isinstance(v, dict) else v
+        for k, v in result.items()
+    }
+    return _finish(tool, result, shaped)
+
+
+# Tools whose busy result must say the change may have gone through anyway
+_WRITE_TOOLS = ("book_appointment", "cancel_appointment", "modify_appointment")
+
+
+def system_busy(tool: str) -> dict:
+    """Result for a tool call that failed fast because storage is slow or down, phrased to be spoken."""
+    if tool in _WRITE_TOOLS:
+        message = ("The appointment system is busy right now, so the change could not be confirmed. "
+                   "Check the patient's appointments before trying again.")
+    else:
+        message = "The appointment system is busy right now, so this could not be looked up. Try again shortly."
+    return {"success": False, "error": "system_busy", "message": message}
@@ -0,0 +1,64 @@
+import asyncio
+from dataclasses import dataclass, field
+from tools.phone import normalize_phone
+
+
+def _sort_key(appointment: dict) -> tuple[str, str]:
+    return str(appointment.get("appointment_date", "")), str(appointment.get("appointment_time", ""))
+
+
+@dataclass
+class SessionState:
+    """Per-call state shared by the AppointmentAgent tools via `session.userdata`.
+
+    Holds what the session already knows about the caller so tools don't look it
+    up again, and is updated write-through by the booking tools.
+    """
+    caller: dict | None = None               # identify_user result for this call
+    appointments: list[dict] | None = None   # caller's scheduled appointments, once loaded
+    # Speculative lookups in flight, keyed by (kind, argument)
+    prefetched: dict[tuple[str, str], asyncio.Task] = field(default_factory=dict)
+    # Monotonic time after which each prefetched result is too old to answer from
+    prefetch_expires: dict[tuple[str, str], float] = field(default_factory=dict)
+    speculations: int = 0  # Transcript-driven lookups started this call
+
+    def is_caller(self, phone_number: str) -> bool:
+        return self.caller is not None and self.caller.get("phone") == normalize_phone(phone_number)
+
+    def cached_appointments(self, phone_number: str) -> list[dict] | None:
+        """The caller's appointment list, or None if it has not been loaded."""
+        if self.is_caller(phone_number):
+            return self.appointments
+        return None
+
+    def set_appointments(self, phone_number: str, appointments: list[dict]) -> None:
+        if self.is_caller(phone_number):
+            self.appointments = list(appointments)
+
+    # ---- Write-through updates from the mutating tools ----
+
+    def record_booking(self, appointment: dict) -> None:
+        phone = appointment.get("phone_number")
+        if self.caller is None or not self.caller.get("found"):
+            # A first-time caller becomes a known patient once they book
+            self.caller = {"found": True, "name": appointment.get("patient_name"), "phone": phone}
+        if self.appointments is not None and self.is_caller(phone):
+            self.appointments = sorted([*self.appointments, appointment], key=_sort_key)
+
+    def record_cancellation(self, appointment_id: str) -> None:
+        if self.appointments is not None:
+            self.appointments = [a for a in self.appointments if a.get("id") != appointment_id]
+
+    def record_update(self, appointment: dict) -> None:
+        if self.appointments is not None:
+            others = [a for a in self.appointments if a.get("id") != appointment.get("id")]
+            self.appointments = sorted([*others, appointment], key=_sort_key)
+
+    # ---- Speculative prefetch ----
+
+    def invalidate_prefetched(self) -> None:
+        """Drop speculative results after a write so no tool answers from stale data."""
+        for task in self.prefetched.values():
+            task.cancel()
+        self.prefetched.clear()
+        self.prefetch_expires.clear()
@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import prometheus_client
+from config import TELEMETRY_MAX_SAMPLES
+
+logger = logging.getLogger("telemetry")
+
+# Scraped through the worker's prometheus endpoint (WorkerOptions.prometheus_port)
+SPAN_SECONDS = prometheus_client.Histogram(
+    "appointment_agent_span_seconds",
+    "Duration of instrumented tool, database, serialization and publish spans",
+    ["span"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+LLM_TOKENS = prometheus_client.Counter(
+    "appointment_agent_llm_tokens",
+    "LLM tokens by kind (prompt includes cached and cache-creation tokens)",
+    ["kind"],
+)
+LLM_PROMPT_CACHE = prometheus_client.Counter(
+    "appointment_agent_llm_prompt_cache_requests",
+    "LLM requests that did or did not read their prefix from the provider's prompt cache",
+    ["result"],
+)
+
+TOOL_RESULT_TOKENS = prometheus_client.Counter(
+    "appointment_agent_tool_result_tokens",
+    "Estimated LLM tokens in tool results, before (raw) and after (shaped) result shaping",
+    ["tool", "stage"],
+)
+
+STORE_EVENTS = prometheus_client.Counter(
+    "appointment_agent_store_events",
+    "Storage resilience events: hedged reads sent and won, budget timeouts, errors, breaker rejections",
+    ["event"],
+)
+
+# Outermost span of the current task (usually the tool call)
+_root_span: ContextVar[str | None] = ContextVar("root_span", default=None)
+
+
+class LatencyHistogram:
+    """Latency samples for one span name, with exact percentiles over recent samples."""
+
+    def __init__(self, max_samples: int = TELEMETRY_MAX_SAMPLES):
+        self._samples: deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self._samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (q in 0-100) of the retained samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+        }
+
+
+_histograms: dict[str, LatencyHistogram] = {}
+_llm_usage: dict[str, int] = {}
+_result_tokens: dict[str, dict[str, int]] = {}
+_store_events: dict[str, int] = {}
+
+
+def record(name: str, ms: float) -> None:
+    """Record one duration for span `name`."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = LatencyHistogram()
+    histogram.observe(ms)
+    SPAN_SECONDS.labels(span=name).observe(ms / 1000)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as span `name`.
+
+    Inside another span the duration is also recorded as "<root>/<name>", so a
+    tool's time can be broken down into database, serialization and publishing.
+    """
+    root = _root_span.get()
+    token = _root_span.set(name) if root is None else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        record(name, ms)
+        if root is not None:
+            record(f"{root}/{name}", ms)
+        if token is not None:
+            _root_span.reset(token)
+
+
+def detached_task(coro) -> asyncio.Task:
+    """Start a background task outside the current span, so the time it runs after the
+    span ends is not broken down under that span."""
+    context = contextvars.copy_context()
+    context.run(_root_span.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+def traced(name: str):
+    """Decorator: time every call of an async function as span `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(llm_metrics) -> None:
+    """Count tokens and prompt-cache hits from one LLMMetrics event."""
+    hit = llm_metrics.prompt_cached_tokens > 0
+    tokens = {
+        "prompt": llm_metrics.prompt_tokens,
+        "cached": llm_metrics.prompt_cached_tokens,
+        "cache_creation": llm_metrics.cache_creation_tokens,
+        "completion": llm_metrics.completion_tokens,
+    }
+    for kind, count in tokens.items():
+        LLM_TOKENS.labels(kind=kind).inc(count)
+        _llm_usage[f"{kind}_tokens"] = _llm_usage.get(f"{kind}_tokens", 0) + count
+    LLM_PROMPT_CACHE.labels(result="hit" if hit else "miss").inc()
+    _llm_usage["requests"] = _llm_usage.get("requests", 0) + 1
+    _llm_usage["cache_hits"] = _llm_usage.get("cache_hits", 0) + hit
+
+
+def llm_usage() -> dict:
+    """LLM request, token and prompt-cache totals since the last reset."""
+    usage = dict(_llm_usage)
+    prompt = usage.get("prompt_tokens", 0)
+    usage["cached_token_ratio"] = round(usage.get("cached_tokens", 0) / prompt, 3) if prompt else 0.0
+    return usage
+
+
+def record_result_tokens(tool: str, raw: int, shaped: int) -> None:
+    """Count estimated tokens of one tool result before and after shaping."""
+    TOOL_RESULT_TOKENS.labels(tool=tool, stage="raw").inc(raw)
+    TOOL_RESULT_TOKENS.labels(tool=tool, stage="shaped").inc(shaped)
+    totals = _result_tokens.setdefault(tool, {"calls": 0, "raw": 0, "shaped": 0})
+    totals["calls"] += 1
+    totals["raw"] += raw
+    totals["shaped"] += shaped
+
+
+def result_tokens() -> dict[str, dict]:
+    """Per-tool result token totals since the last reset."""
+    return {tool: dict(totals) for tool, totals in sorted(_result_tokens.items())}
+
+
+def percentile(name: str, q: float, min_samples: int = 1) -> float | None:
+    """Percentile q of span `name` in ms, or None until it has `min_samples` samples."""
+    histogram = _histograms.get(name)
+    if histogram is None or histogram.count < min_samples:
+        return None
+    return histogram.percentile(q)
+
+
+def record_store_event(event: str) -> None:
+    """Count one storage resilience event (hedge, hedge_won, timeout, error, rejected)."""
+    STORE_EVENTS.labels(event=event).inc()
+    _store_events[event] = _store_events.get(event, 0) + 1
+
+
+def store_events() -> dict[str, int]:
+    """Storage resilience event counts since the last reset."""
+    return dict(sorted(_store_events.items()))
+
+
+def snapshot() -> dict[str, dict]:
+    """Per-span count, mean and p50/p95/p99 in milliseconds."""
+    return {name: h.summary() for name, h in sorted(_histograms.items())}
+
+
+def log_snapshot() -> None:
+    """Emit the span histograms as one structured log line."""
+    logger.info(f"Span latency: {json.dumps(snapshot())}")
+    if _llm_usage:
+        logger.info(f"LLM usage: {json.dumps(llm_usage())}")
+    if _result_tokens:
+        logger.info(f"Tool result tokens: {json.dumps(result_tokens())}")
+    if _store_events:
+        logger.info(f"Store events: {json.dumps(store_events())}")
+
+
+def reset() -> None:
+    """Forget recorded in-process samples (the prometheus histogram is cumulative)."""
+    _histograms.clear()
+    _llm_usage.clear()
+    _result_tokens.clear()
+    _store_events.clear()
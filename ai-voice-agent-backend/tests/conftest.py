@@ -38,6 +38,9 @@ class MockSupabaseQuery:
     def gte(self, *args, **kwargs):
         return self
 
+    def lte(self, *args, **kwargs):
+        return self
+
     def order(self, *args, **kwargs):
         return self
 
@@ -45,6 +48,9 @@ class MockSupabaseQuery:
         return self
 
     def execute(self):
+        # An exception in place of data simulates a failed query (e.g. a constraint violation)
+        if isinstance(self._response_data, Exception):
+            raise self._response_data
         return MockSupabaseResponse(data=self._response_data)
 
 
@@ -62,11 +68,105 @@ class MockSupabaseClient:
         return MockSupabaseQuery(getattr(self, "_next_response", []))
 
 
+class MockTTS:
+    """TTS plugin stand-in: `synthesize` streams two 20 ms frames of a constant sample per text."""
+
+    sample_rate = 24000
+
+    def __init__(self, fail: str | None = None):
+        self.requests: list[str] = []
+        self._fail = fail
+
+    def synthesize(self, text: str):
+        self.requests.append(text)
+        if text == self._fail:
+            raise ConnectionError("tts unavailable")
+        return _MockTTSStream(text, self.sample_rate)
+
+
+class _MockTTSStream:
+    def __init__(self, text: str, sample_rate: int):
+        self._text = text
+        self._sample_rate = sample_rate
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        from types import SimpleNamespace
+        from livekit import rtc
+        samples = self._sample_rate // 50
+        value = (len(self._text) % 100).to_bytes(2, "little")
+        for _ in range(2):
+            yield SimpleNamespace(frame=rtc.AudioFrame(value * samples, self._sample_rate, 1, samples))
+
+
+@pytest.fixture(autouse=True)
+def fresh_availability_index(monkeypatch):
+    """Give every test its own empty availability index."""
+    from tools import availability_index
+    monkeypatch.setattr(availability_index, "_index", None)
+
+
+@pytest.fixture(autouse=True)
+def supabase_store(monkeypatch):
+    """Run tests against the Supabase store (patched via get_supabase) whatever STORAGE_BACKEND says."""
+    from db import storage
+    from db.supabase_store import SupabaseStore
+    monkeypatch.setattr(storage, "_store", SupabaseStore())
+
+
+@pytest.fixture
+def sqlite_store(monkeypatch):
+    """Swap in a fresh embedded in-memory SQLite store."""
+    from db import storage
+    from db.sqlite_store import SQLiteStore
+    store = SQLiteStore()
+    monkeypatch.setattr(storage, "_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def audio_cache_dir(tmp_path, monkeypatch):
+    """Keep synthesized audio in a per-test directory instead of the deployment's cache."""
+    import audio_cache
+    cache = audio_cache.AudioCache(str(tmp_path / "audio"), 1024 * 1024)
+    monkeypatch.setattr(audio_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_patient_cache():
+    """Clear cached caller lookups between tests."""
+    from tools import appointment_tools
+    appointment_tools._patient_cache.clear()
+
+
+@pytest.fixture
+def two_doctors(monkeypatch):
+    """Configure Dr. Smith (Main, weekdays 9-17, 30 min) and Dr. Lee (Northside, Mon-Sat 8-12, 20 min)."""
+    from tools import schedules
+    from tools.schedules import DoctorSchedule, parse_schedule
+    doctors = (
+        DoctorSchedule.weekdays("Dr. Smith", 9, 17, 30, clinic="Main"),
+        parse_schedule({
+            "name": "Dr. Lee", "clinic": "Northside", "slot_duration": 20,
+            "hours": {day: ["08:00-12:00"] for day in ("mon", "tue", "wed", "thu", "fri", "sat")},
+        }),
+    )
+    monkeypatch.setattr(schedules, "_schedules", doctors)
+    return doctors
+
+
 @pytest.fixture
 def mock_supabase():
     """Provides a mock Supabase client and patches get_supabase."""
     client = MockSupabaseClient()
-    with patch("tools.appointment_tools.get_supabase", return_value=client):
+    with patch("db.supabase_store.get_supabase", return_value=client):
         yield client
 
 
@@ -2,15 +2,22 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+import asyncio
 import json
+from datetime import date
 import pytest
-from unittest.mock import patch, AsyncMock, MagicMock
-from agent_definition import AppointmentAgent
+from unittest.mock import patch, AsyncMock, MagicMock, PropertyMock
+from agent_definition import AppointmentAgent, phone_from_metadata, preidentify_caller, speculate_from_transcript
+from session_state import SessionState
+from event_publisher import flush_publisher
+from result_shaping import estimate_tokens
+from config import TOOL_RESULT_TOKEN_BUDGETS, GREETING_TEXT
 
 
 def _make_mock_ctx():
     """Create a mock RunContext with session.room_io.room."""
     ctx = MagicMock()
+    ctx.userdata = SessionState()
     ctx.session.room_io.room = MagicMock()
     ctx.session.room_io.room.local_participant = MagicMock()
     ctx.session.room_io.room.local_participant.publish_data = AsyncMock()
@@ -43,8 +50,13 @@ class TestAppointmentAgentTools:
         parsed = json.loads(result)
         assert parsed["found"] is True
         assert parsed["name"] == "John"
-        # Verify data channel events published (started + completed)
-        assert mock_ctx.session.room_io.room.local_participant.publish_data.call_count == 2
+        # Started + completed arrive within one coalescing window, so the frontend
+        # gets a single frame carrying only the completed event
+        await flush_publisher(mock_ctx.session.room_io.room)
+        publish_data = mock_ctx.session.room_io.room.local_participant.publish_data
+        assert publish_data.call_count == 1
+        event = json.loads(publish_data.call_args.kwargs["payload"])
+        assert (event["tool_name"], event["status"]) == ("identify_user", "completed")
 
     # ---- fetch_slots ----
 
@@ -60,18 +72,36 @@ class TestAppointmentAgentTools:
 
         parsed = json.loads(result)
         assert parsed["total_available"] == 2
-        assert len(parsed["slots"]) == 2
+        assert parsed["days"] == {"Tue 2026-02-10": "09:00-09:30"}
 
     @pytest.mark.asyncio
-    async def test_fetch_slots_limits_to_10(self, agent, mock_ctx):
+    async def test_fetch_slots_stays_within_token_budget(self, agent, mock_ctx):
         with patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as mock_fn:
-            mock_fn.return_value = [{"date": "2026-02-10", "time": f"{9+i//2:02d}:{(i%2)*30:02d}", "doctor": "Dr. Smith"} for i in range(16)]
+            mock_fn.return_value = [
+                {"date": f"2026-02-{day:02d}", "time": f"{9+i//2:02d}:{(i%2)*30:02d}", "doctor": "Dr. Smith"}
+                for day in range(9, 28) for i in range(0, 16, 3)
+            ]
 
             result = await agent.fetch_slots(mock_ctx)
 
         parsed = json.loads(result)
-        assert len(parsed["slots"]) == 10  # Capped at 10
-        assert parsed["total_available"] == 16  # Total is accurate
+        assert estimate_tokens(result) <= TOOL_RESULT_TOKEN_BUDGETS["fetch_slots"]
+        assert parsed["total_available"] == 19 * 6  # Total is accurate
+        assert parsed["omitted"] == 19 - len(parsed["days"])
+
+    @pytest.mark.asyncio
+    async def test_fetch_slots_passes_narrowing_arguments(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as mock_fn:
+            mock_fn.return_value = [{"date": "2026-02-11", "time": "14:00", "doctor": "Dr. Smith"}]
+
+            await agent.fetch_slots(mock_ctx, after="2026-02-10 17:00", earliest_time="13:00", limit=1)
+
+        mock_fn.assert_awaited_once_with(None, None, "13:00", None, "2026-02-10 17:00", 1, None, None)
+
+    @pytest.mark.asyncio
+    async def test_fetch_slots_invalid_arguments_return_error(self, agent, mock_ctx):
+        result = json.loads(await agent.fetch_slots(mock_ctx, earliest_time="afternoon"))
+        assert "HH:MM" in result["error"]
 
     # ---- book_appointment ----
 
@@ -89,7 +119,7 @@ class TestAppointmentAgentTools:
                 reason="Checkup",
             )
 
-        mock_fn.assert_called_once_with("+123", "John", "2026-02-10", "09:00", "Checkup")
+        mock_fn.assert_called_once_with("+123", "John", "2026-02-10", "09:00", "Checkup", None)
         parsed = json.loads(result)
         assert parsed["success"] is True
 
@@ -108,7 +138,7 @@ class TestAppointmentAgentTools:
             )
 
         # Empty reason should be passed as None
-        mock_fn.assert_called_once_with("+123", "John", "2026-02-10", "09:00", None)
+        mock_fn.assert_called_once_with("+123", "John", "2026-02-10", "09:00", None, None)
 
     # ---- retrieve_appointments ----
 
@@ -159,7 +189,7 @@ class TestAppointmentAgentTools:
                 mock_ctx, appointment_id="abc", new_date="2026-02-12", new_time="14:00"
             )
 
-        mock_fn.assert_called_once_with("abc", "2026-02-12", "14:00")
+        mock_fn.assert_called_once_with("abc", "2026-02-12", "14:00", None)
         parsed = json.loads(result)
         assert parsed["success"] is True
 
@@ -170,7 +200,7 @@ class TestAppointmentAgentTools:
 
             await agent.modify_appointment(mock_ctx, appointment_id="abc", new_date="", new_time="14:00")
 
-        mock_fn.assert_called_once_with("abc", None, "14:00")
+        mock_fn.assert_called_once_with("abc", None, "14:00", None)
 
     # ---- end_conversation ----
 
@@ -182,6 +212,7 @@ class TestAppointmentAgentTools:
         assert parsed["summary"] == "Booked appointment for Feb 10"
         assert parsed["message"] == "Conversation ended"
         # Should publish: tool_call started, call_summary, tool_call completed = 3 publish_data calls
+        await flush_publisher(mock_ctx.session.room_io.room)
         assert mock_ctx.session.room_io.room.local_participant.publish_data.call_count == 3
 
 
@@ -195,7 +226,8 @@ class TestPublishToolEvent:
 
         from models import ToolCallEvent
         event = ToolCallEvent.now("test_tool", "started", {"key": "value"})
-        await agent._publish_tool_event(ctx, event)
+        agent._publish_tool_event(ctx, event)
+        await flush_publisher(ctx.session.room_io.room)
 
         call_args = ctx.session.room_io.room.local_participant.publish_data.call_args
         payload = call_args.kwargs.get("payload") or call_args[1].get("payload") or call_args[0][0]
@@ -213,7 +245,7 @@ class TestPublishToolEvent:
         from models import ToolCallEvent
         event = ToolCallEvent.now("test", "started", {})
         # Should not raise
-        await agent._publish_tool_event(ctx, event)
+        agent._publish_tool_event(ctx, event)
 
     @pytest.mark.asyncio
     async def test_handles_publish_error_gracefully(self):
@@ -225,4 +257,354 @@ class TestPublishToolEvent:
         from models import ToolCallEvent
         event = ToolCallEvent.now("test", "started", {})
         # Should not raise
-        await agent._publish_tool_event(ctx, event)
+        agent._publish_tool_event(ctx, event)
+        await flush_publisher(ctx.session.room_io.room)
+
+
+class TestSpeculativePrefetch:
+    """identify_user should warm the lookups the LLM usually makes next."""
+
+    @pytest.fixture
+    def agent(self):
+        return AppointmentAgent()
+
+    @pytest.fixture
+    def mock_ctx(self):
+        return _make_mock_ctx()
+
+    @pytest.mark.asyncio
+    async def test_identify_prefetches_appointments_and_slots(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch:
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            retrieve.return_value = [{"id": "1"}]
+            fetch.return_value = [{"date": "2026-02-10", "time": "09:00", "doctor": "Dr. Smith"}]
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+
+            appointments = json.loads(await agent.retrieve_appointments(mock_ctx, phone_number="+123"))
+            slots = json.loads(await agent.fetch_slots(mock_ctx))
+
+        assert appointments["count"] == 1
+        assert slots["total_available"] == 1
+        # Both tool calls were answered from the prefetch, not a new lookup
+        retrieve.assert_awaited_once_with("+123")
+        assert fetch.call_count == 3  # all-slots, today, tomorrow; no live fetch
+
+    @pytest.mark.asyncio
+    async def test_unknown_caller_skips_appointment_prefetch(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch:
+            identify.return_value = {"found": False, "phone": "+123"}
+            fetch.return_value = []
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            await asyncio.sleep(0)
+
+        retrieve.assert_not_awaited()
+        assert fetch.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_prefetch(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch, \
+                patch("agent_definition.appointment_tools.cancel_appointment", new_callable=AsyncMock) as cancel:
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            retrieve.return_value = [{"id": "1"}]
+            fetch.return_value = []
+            cancel.return_value = {"success": True, "cancelled": {"id": "1"}}
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            await agent.cancel_appointment(mock_ctx, appointment_id="1")
+            retrieve.return_value = []
+            result = json.loads(await agent.retrieve_appointments(mock_ctx, phone_number="+123"))
+
+        assert result["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_prefetch_falls_back_to_live_call(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch:
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            retrieve.side_effect = [Exception("timeout"), [{"id": "1"}]]
+            fetch.return_value = []
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            result = json.loads(await agent.retrieve_appointments(mock_ctx, phone_number="+123"))
+
+        assert result["count"] == 1
+        assert retrieve.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_prefetch_is_not_served(self, agent, mock_ctx):
+        """A snapshot taken at identify time would miss other callers' bookings once old."""
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch, \
+                patch("agent_definition.PREFETCH_TTL_SECONDS", -1):
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            fetch.return_value = [{"date": "2026-02-10", "time": "09:00", "doctor": "Dr. Smith"}]
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            await asyncio.gather(*mock_ctx.userdata.prefetched.values())
+            fetch.return_value = []
+            slots = json.loads(await agent.fetch_slots(mock_ctx))
+
+        assert slots["total_available"] == 0
+        assert fetch.await_count == 4  # Three prefetches, then a live fetch
+
+
+class TestTranscriptSpeculation:
+    """Lookups for a phone number or date should start while the caller is still talking."""
+
+    @pytest.fixture
+    def agent(self):
+        return AppointmentAgent()
+
+    @pytest.fixture
+    def mock_ctx(self):
+        return _make_mock_ctx()
+
+    @pytest.mark.asyncio
+    async def test_spoken_phone_number_answers_identify_user(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock):
+            identify.return_value = {"found": True, "name": "John", "phone": "+15551234567"}
+            speculate_from_transcript(mock_ctx.userdata, "it's 555 123 4567 and")
+            result = json.loads(await agent.identify_user(mock_ctx, phone_number="+1 555-123-4567"))
+
+        assert result["name"] == "John"
+        identify.assert_awaited_once_with("+15551234567")
+
+    @pytest.mark.asyncio
+    async def test_spoken_date_answers_fetch_slots(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch, \
+                patch("agent_definition.clinic_today", return_value=date(2026, 10, 17)):
+            fetch.return_value = [{"date": "2026-10-20", "time": "09:00", "doctor": "Dr. Smith"}]
+            speculate_from_transcript(mock_ctx.userdata, "October 20th please")
+            speculate_from_transcript(mock_ctx.userdata, "October 20th please", final=True)
+            result = json.loads(await agent.fetch_slots(mock_ctx, preferred_date="2026-10-20"))
+
+        assert result["total_available"] == 1
+        fetch.assert_awaited_once_with("2026-10-20")
+
+    @pytest.mark.asyncio
+    async def test_incomplete_interim_number_is_not_looked_up(self, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify:
+            speculate_from_transcript(mock_ctx.userdata, "it's 555 123 4567")
+            await asyncio.sleep(0)
+        identify.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_expired_speculation_goes_live(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock), \
+                patch("agent_definition.SPECULATION_TTL_SECONDS", -1):
+            identify.return_value = {"found": False, "phone": "+15551234567"}
+            speculate_from_transcript(mock_ctx.userdata, "5551234567", final=True)
+            await asyncio.sleep(0.01)  # The speculative lookup finishes but is too old to use
+            await agent.identify_user(mock_ctx, phone_number="5551234567")
+
+        assert identify.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_speculation_is_capped_per_call(self, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.SPECULATION_MAX_PER_CALL", 1):
+            speculate_from_transcript(mock_ctx.userdata, "555 123 4567", final=True)
+            speculate_from_transcript(mock_ctx.userdata, "555 765 4321", final=True)
+            await asyncio.sleep(0)
+        identify.assert_awaited_once_with("+15551234567")
+
+    @pytest.mark.asyncio
+    async def test_writes_are_never_speculated(self, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.book_appointment", new_callable=AsyncMock) as book, \
+                patch("agent_definition.appointment_tools.cancel_appointment", new_callable=AsyncMock) as cancel:
+            speculate_from_transcript(mock_ctx.userdata, "book me tomorrow, 555 123 4567, cancel the other", final=True)
+            await asyncio.sleep(0)
+        book.assert_not_awaited()
+        cancel.assert_not_awaited()
+        assert {kind for kind, _ in mock_ctx.userdata.prefetched} == {"caller", "slots"}
+
+
+class TestSessionStateCaching:
+    """Tools should reuse what the session already knows about the caller."""
+
+    @pytest.fixture
+    def agent(self):
+        return AppointmentAgent()
+
+    @pytest.fixture
+    def mock_ctx(self):
+        return _make_mock_ctx()
+
+    @pytest.mark.asyncio
+    async def test_repeat_identify_is_served_from_session(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock):
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            result = json.loads(await agent.identify_user(mock_ctx, phone_number="+123"))
+
+        identify.assert_awaited_once()
+        assert result["name"] == "John"
+        assert mock_ctx.userdata.caller["name"] == "John"
+
+    @pytest.mark.asyncio
+    async def test_appointments_cached_after_first_retrieve(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock):
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            retrieve.return_value = [{"id": "1", "appointment_date": "2026-02-10"}]
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            await agent.retrieve_appointments(mock_ctx, phone_number="+123")
+            result = json.loads(await agent.retrieve_appointments(mock_ctx, phone_number="+123"))
+
+        retrieve.assert_awaited_once()
+        assert result["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_booking_writes_through_to_appointment_list(self, agent, mock_ctx):
+        """A new caller's booking should show up without another lookup."""
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as retrieve, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.book_appointment", new_callable=AsyncMock) as book:
+            identify.return_value = {"found": False, "phone": "+123"}
+            book.return_value = {"success": True, "appointment": {
+                "id": "abc", "phone_number": "+123", "patient_name": "Jane",
+                "appointment_date": "2026-02-10", "appointment_time": "09:00"}}
+
+            await agent.identify_user(mock_ctx, phone_number="+123")
+            await agent.book_appointment(mock_ctx, "+123", "Jane", "2026-02-10", "09:00")
+            result = json.loads(await agent.retrieve_appointments(mock_ctx, phone_number="+123"))
+
+        retrieve.assert_not_awaited()
+        assert [a["id"] for a in result["appointments"]] == ["abc"]
+        assert mock_ctx.userdata.caller == {"found": True, "name": "Jane", "phone": "+123"}
+
+    @pytest.mark.asyncio
+    async def test_failed_booking_leaves_state_untouched(self, agent, mock_ctx):
+        with patch("agent_definition.appointment_tools.book_appointment", new_callable=AsyncMock) as book:
+            book.return_value = {"success": False, "error": "Slot is already booked."}
+            await agent.book_appointment(mock_ctx, "+123", "Jane", "2026-02-10", "09:00")
+
+        assert mock_ctx.userdata.caller is None
+
+
+class TestPreidentifyCaller:
+    """The caller is identified from participant metadata before the first turn."""
+
+    def test_phone_from_metadata(self):
+        assert phone_from_metadata('{"phoneNumber": "+15551234567"}') == "+15551234567"
+        assert phone_from_metadata('{"phoneNumber": ""}') is None
+        assert phone_from_metadata("") is None
+        assert phone_from_metadata("not json") is None
+        assert phone_from_metadata("[]") is None
+
+    @pytest.mark.asyncio
+    async def test_preidentify_populates_session_and_publishes(self):
+        state = SessionState()
+        room = MagicMock()
+        room.local_participant.publish_data = AsyncMock()
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock):
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            result = await preidentify_caller(state, '{"phoneNumber": "+123"}', room)
+            await flush_publisher(room)
+
+        assert result["name"] == "John"
+        assert state.caller == result
+        assert ("appointments", "+123") in state.prefetched
+        payload = json.loads(room.local_participant.publish_data.call_args[1]["payload"])
+        assert payload["tool_name"] == "identify_user"
+        assert payload["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_preidentify_without_phone_does_nothing(self):
+        state = SessionState()
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify:
+            assert await preidentify_caller(state, "{}") is None
+
+        identify.assert_not_awaited()
+        assert state.caller is None
+
+    @pytest.mark.asyncio
+    async def test_identify_tool_reuses_preidentified_caller(self):
+        ctx = _make_mock_ctx()
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock), \
+                patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock):
+            identify.return_value = {"found": True, "name": "John", "phone": "+123"}
+            await preidentify_caller(ctx.userdata, '{"phoneNumber": "+123"}')
+            result = json.loads(await AppointmentAgent().identify_user(ctx, phone_number="+123"))
+
+        identify.assert_awaited_once()
+        assert result["name"] == "John"
+
+    @pytest.mark.asyncio
+    async def test_on_enter_adds_caller_note_before_greeting(self):
+        lookup = asyncio.get_running_loop().create_future()
+        lookup.set_result({"found": True, "name": "John", "phone": "+123"})
+        agent = AppointmentAgent(caller_lookup=lookup)
+        session = MagicMock()
+        with patch.object(AppointmentAgent, "session", new_callable=PropertyMock, return_value=session), \
+                patch.object(agent, "update_chat_ctx", new_callable=AsyncMock) as update:
+            await agent.on_enter()
+
+        chat_ctx = update.call_args[0][0]
+        assert "John" in chat_ctx.items[-1].text_content
+        session.generate_reply.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_on_enter_greets_without_caller_when_lookup_is_slow(self):
+        lookup = asyncio.get_running_loop().create_future()
+        agent = AppointmentAgent(caller_lookup=lookup)
+        session = MagicMock()
+        with patch("agent_definition.PREIDENTIFY_TIMEOUT_SECONDS", 0.01), \
+                patch.object(AppointmentAgent, "session", new_callable=PropertyMock, return_value=session), \
+                patch.object(agent, "update_chat_ctx", new_callable=AsyncMock) as update:
+            await agent.on_enter()
+
+        update.assert_not_awaited()
+        # An unidentified caller hears the fixed greeting, without an LLM round trip
+        session.say.assert_called_once()
+        assert session.say.call_args.args == (GREETING_TEXT,)
+        session.generate_reply.assert_not_called()
+        assert not lookup.cancelled()
+        lookup.cancel()
+
+    @pytest.mark.asyncio
+    async def test_lookup_failing_after_the_timeout_is_logged(self, caplog):
+        lookup = asyncio.get_running_loop().create_future()
+        agent = AppointmentAgent(caller_lookup=lookup)
+        with patch("agent_definition.PREIDENTIFY_TIMEOUT_SECONDS", 0.01), \
+                patch.object(AppointmentAgent, "session", new_callable=PropertyMock, return_value=MagicMock()):
+            await agent.on_enter()
+
+        lookup.set_exception(ConnectionError("database unreachable"))
+        await asyncio.sleep(0)  # Let the done-callbacks run
+        # Retrieved and logged, rather than "exception was never retrieved" at garbage collection
+        assert "Caller lookup failed after the greeting: database unreachable" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_on_enter_generates_greeting_when_fixed_greeting_disabled(self):
+        agent = AppointmentAgent()
+        session = MagicMock()
+        with patch("agent_definition.GREETING_TEXT", ""), \
+                patch.object(AppointmentAgent, "session", new_callable=PropertyMock, return_value=session):
+            await agent.on_enter()
+
+        session.say.assert_not_called()
+        session.generate_reply.assert_called_once()
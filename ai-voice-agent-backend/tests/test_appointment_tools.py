@@ -3,27 +3,35 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from datetime import date
-from tests.conftest import MockSupabaseClient, MockSupabaseQuery, MockSupabaseResponse
 from tools import appointment_tools
+from tools.slot_generator import build_slot_calendar
 
 
-# --- Helper to create a mock client with specific chained responses ---
+@pytest.fixture(autouse=True)
+def store(sqlite_store):
+    """Run the tools against a real (in-memory SQLite) database on Monday 2026-02-09.
 
-class SequentialMockClient:
-    """Mock client that returns different responses for sequential table() calls."""
+    Supabase-specific behavior (table names, PostgREST errors) is covered in
+    test_supabase_tools.py.
+    """
+    with patch("tools.appointment_tools.clinic_today", return_value=date(2026, 2, 9)), \
+            patch("tools.availability_index.clinic_today", return_value=date(2026, 2, 9)):
+        yield sqlite_store
 
-    def __init__(self, responses: list[list]):
-        self._responses = responses
-        self._call_index = 0
 
-    def table(self, name: str):
-        if self._call_index < len(self._responses):
-            data = self._responses[self._call_index]
-            self._call_index += 1
-            return MockSupabaseQuery(data)
-        return MockSupabaseQuery([])
+async def _seed(store, day: str, time: str, doctor: str = "Dr. Smith", duration: int = 30,
+                phone: str = "+15550000002", name: str = "Bo") -> str:
+    """Book a slot directly in the database, behind the tools' back; returns its id."""
+    row = await store.reserve({"phone_number": phone, "patient_name": name, "appointment_date": day,
+                               "appointment_time": time, "doctor_name": doctor, "duration_minutes": duration})
+    return row["id"]
+
+
+def _calendar(days_ahead: int = 1, end_hour: int = 10, slot_duration: int = 30):
+    """A small slot calendar starting Monday 2026-02-09 at 09:00."""
+    return build_slot_calendar(date(2026, 2, 9), days_ahead, 9, end_hour, slot_duration, "Dr. Smith")
 
 
 # ============================================================
@@ -33,24 +41,47 @@ class SequentialMockClient:
 class TestIdentifyUser:
 
     @pytest.mark.asyncio
-    async def test_found_user(self, mock_supabase):
+    async def test_found_user(self, store):
         """Should return found=True with name when user exists."""
-        mock_supabase.set_response([
-            {"patient_name": "John Doe", "phone_number": "+1234567890"}
-        ])
+        await _seed(store, "2026-02-10", "09:00", phone="+1234567890", name="John Doe")
         result = await appointment_tools.identify_user_by_phone("+1234567890")
         assert result["found"] is True
         assert result["name"] == "John Doe"
         assert result["phone"] == "+1234567890"
 
     @pytest.mark.asyncio
-    async def test_user_not_found(self, mock_supabase):
+    async def test_user_not_found(self):
         """Should return found=False when no matching phone number."""
-        mock_supabase.set_response([])
         result = await appointment_tools.identify_user_by_phone("+9999999999")
         assert result["found"] is False
         assert result["phone"] == "+9999999999"
 
+    @pytest.mark.asyncio
+    async def test_lookup_uses_normalized_phone(self, store):
+        await _seed(store, "2026-02-10", "09:00", phone="+15551234567", name="John Doe")
+        result = await appointment_tools.identify_user_by_phone("(555) 123-4567")
+        assert result == {"found": True, "name": "John Doe", "phone": "+15551234567"}
+
+    @pytest.mark.asyncio
+    async def test_repeat_lookup_is_cache_hit(self, store):
+        """Differently formatted numbers for the same caller share a cache entry."""
+        await _seed(store, "2026-02-10", "09:00", phone="+15551234567", name="John Doe")
+        with patch.object(store, "find_patient", wraps=store.find_patient) as find_patient:
+            await appointment_tools.identify_user_by_phone("+15551234567")
+            result = await appointment_tools.identify_user_by_phone("555 123 4567")
+        assert find_patient.await_count == 1
+        assert result["name"] == "John Doe"
+
+    @pytest.mark.asyncio
+    async def test_booking_replaces_cached_miss(self, store):
+        """A caller not found earlier should be found right after booking."""
+        with patch.object(store, "find_patient", wraps=store.find_patient) as find_patient:
+            assert (await appointment_tools.identify_user_by_phone("+15551234567"))["found"] is False
+            await appointment_tools.book_appointment("+15551234567", "Jane", "2026-02-10", "09:00")
+            result = await appointment_tools.identify_user_by_phone("+15551234567")
+        assert result == {"found": True, "name": "Jane", "phone": "+15551234567"}
+        assert find_patient.await_count == 1
+
 
 # ============================================================
 # fetch_available_slots
@@ -59,17 +90,11 @@ class TestIdentifyUser:
 class TestFetchAvailableSlots:
 
     @pytest.mark.asyncio
-    async def test_returns_slots_excluding_booked(self, mock_supabase):
+    async def test_returns_slots_excluding_booked(self, store):
         """Should filter out already-booked slots."""
-        mock_supabase.set_response([
-            {"appointment_date": "2026-02-09", "appointment_time": "09:00:00"}
-        ])
-        with patch("tools.appointment_tools.generate_all_slots") as mock_gen:
-            mock_gen.return_value = [
-                {"date": "2026-02-09", "time": "09:00", "doctor": "Dr. Smith"},
-                {"date": "2026-02-09", "time": "09:30", "doctor": "Dr. Smith"},
-                {"date": "2026-02-09", "time": "10:00", "doctor": "Dr. Smith"},
-            ]
+        await _seed(store, "2026-02-09", "09:00")
+        # 2026-02-09: 09:00, 09:30, 10:00, 10:30
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar(end_hour=11)]):
             result = await appointment_tools.fetch_available_slots()
 
         # 09:00 should be filtered out (booked)
@@ -79,47 +104,194 @@ class TestFetchAvailableSlots:
         assert "10:00" in times
 
     @pytest.mark.asyncio
-    async def test_filters_by_preferred_date(self, mock_supabase):
+    async def test_filters_by_preferred_date(self):
         """Should only return slots for the preferred date."""
-        mock_supabase.set_response([])
-        with patch("tools.appointment_tools.generate_all_slots") as mock_gen:
-            mock_gen.return_value = [
-                {"date": "2026-02-09", "time": "09:00", "doctor": "Dr. Smith"},
-                {"date": "2026-02-10", "time": "09:00", "doctor": "Dr. Smith"},
-            ]
+        # 09:00 on 2026-02-09 and 2026-02-10
+        with patch("tools.appointment_tools.get_calendars",
+                   return_value=[_calendar(days_ahead=2, slot_duration=60)]):
             result = await appointment_tools.fetch_available_slots("2026-02-09")
 
         assert len(result) == 1
         assert result[0]["date"] == "2026-02-09"
 
     @pytest.mark.asyncio
-    async def test_all_booked_returns_empty(self, mock_supabase):
+    async def test_all_booked_returns_empty(self, store):
         """Should return empty list if all slots are booked."""
-        mock_supabase.set_response([
-            {"appointment_date": "2026-02-09", "appointment_time": "09:00:00"},
-        ])
-        with patch("tools.appointment_tools.generate_all_slots") as mock_gen:
-            mock_gen.return_value = [
-                {"date": "2026-02-09", "time": "09:00", "doctor": "Dr. Smith"},
-            ]
+        await _seed(store, "2026-02-09", "09:00", duration=60)
+        # Only 09:00 on 2026-02-09
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar(slot_duration=60)]):
             result = await appointment_tools.fetch_available_slots()
 
         assert result == []
 
     @pytest.mark.asyncio
-    async def test_no_booked_returns_all(self, mock_supabase):
+    async def test_no_booked_returns_all(self):
         """Should return all slots when nothing is booked."""
-        mock_supabase.set_response([])
-        with patch("tools.appointment_tools.generate_all_slots") as mock_gen:
-            mock_gen.return_value = [
-                {"date": "2026-02-09", "time": "09:00", "doctor": "Dr. Smith"},
-                {"date": "2026-02-09", "time": "09:30", "doctor": "Dr. Smith"},
-            ]
+        # 09:00 and 09:30 on 2026-02-09
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar()]):
             result = await appointment_tools.fetch_available_slots()
 
         assert len(result) == 2
 
 
+class TestFetchAvailableSlotsIndex:
+
+    @pytest.fixture
+    def loads(self, store):
+        """Spy on the availability index's database loads."""
+        with patch.object(store, "scheduled_between", wraps=store.scheduled_between) as spy:
+            yield spy
+
+    @pytest.mark.asyncio
+    async def test_repeated_fetches_reuse_index(self, loads):
+        """Only the first fetch within the TTL should query the database."""
+        await appointment_tools.fetch_available_slots()
+        await appointment_tools.fetch_available_slots()
+        assert loads.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_booking_updates_index_without_requery(self, loads):
+        """A successful booking should remove the slot from the next fetch."""
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar()]):
+            assert len(await appointment_tools.fetch_available_slots()) == 2
+            await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "09:00")
+            result = await appointment_tools.fetch_available_slots()
+
+        assert [s["time"] for s in result] == ["09:30"]
+        assert loads.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cancellation_frees_slot_in_index(self, store, loads):
+        appointment_id = await _seed(store, "2026-02-09", "09:00", duration=60)
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar(slot_duration=60)]):
+            assert await appointment_tools.fetch_available_slots() == []
+            await appointment_tools.cancel_appointment(appointment_id)
+            result = await appointment_tools.fetch_available_slots()
+
+        assert len(result) == 1
+        assert loads.await_count == 1
+
+
+class TestFetchAvailableSlotsQuery:
+
+    @pytest.fixture(autouse=True)
+    def week(self):
+        # Mon 2026-02-09 to Fri 2026-02-13, 09:00-11:00 every hour
+        with patch("tools.appointment_tools.get_calendars",
+                   return_value=[_calendar(days_ahead=5, end_hour=12, slot_duration=60)]):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_date_range_and_time_window(self, store):
+        await _seed(store, "2026-02-11", "10:00", duration=60)
+        result = await appointment_tools.fetch_available_slots(
+            "2026-02-10", end_date="2026-02-11", earliest_time="10:00", latest_time="11:00"
+        )
+        assert [(s["date"], s["time"]) for s in result] == [
+            ("2026-02-10", "10:00"), ("2026-02-10", "11:00"), ("2026-02-11", "11:00"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_first_n_after(self):
+        result = await appointment_tools.fetch_available_slots(after="2026-02-10 10:00", limit=3)
+        assert [(s["date"], s["time"]) for s in result] == [
+            ("2026-02-10", "11:00"), ("2026-02-11", "09:00"), ("2026-02-11", "10:00"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_invalid_bounds_raise(self):
+        with pytest.raises(ValueError, match="HH:MM"):
+            await appointment_tools.fetch_available_slots(earliest_time="morning")
+
+
+class TestMultipleDoctors:
+    """Dr. Smith (weekdays 9-17, 30 min) and Dr. Lee (Mon-Sat 8-12, 20 min), from Mon 2026-02-09."""
+
+    @pytest.fixture(autouse=True)
+    def doctors(self, two_doctors):
+        return two_doctors
+
+    @pytest.mark.asyncio
+    async def test_fetch_merges_doctors_in_time_order(self):
+        result = await appointment_tools.fetch_available_slots("2026-02-09", earliest_time="08:40", limit=4)
+        assert [(s["time"], s["doctor"]) for s in result] == [
+            ("08:40", "Dr. Lee"), ("09:00", "Dr. Smith"), ("09:00", "Dr. Lee"), ("09:20", "Dr. Lee"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_booked_slot_only_blocks_its_doctor(self, store):
+        await _seed(store, "2026-02-09", "09:00", doctor="Dr. Lee", duration=20)
+        result = await appointment_tools.fetch_available_slots("2026-02-09", earliest_time="09:00", latest_time="09:00")
+        assert [s["doctor"] for s in result] == ["Dr. Smith"]
+
+    @pytest.mark.asyncio
+    async def test_long_booking_blocks_every_slot_it_overlaps(self, store):
+        await _seed(store, "2026-02-09", "09:00", duration=60)
+        result = await appointment_tools.fetch_available_slots("2026-02-09", doctor="Dr. Smith", limit=1)
+        assert result == [{"date": "2026-02-09", "time": "10:00", "doctor": "Dr. Smith"}]
+
+    @pytest.mark.asyncio
+    async def test_filter_by_doctor(self):
+        result = await appointment_tools.fetch_available_slots("2026-02-10", doctor="Dr. Lee")
+        assert {s["doctor"] for s in result} == {"Dr. Lee"}
+        assert len(result) == 12  # 8-12 in 20-minute slots
+
+    @pytest.mark.asyncio
+    async def test_unknown_doctor_raises(self):
+        with pytest.raises(ValueError, match="Unknown doctor"):
+            await appointment_tools.fetch_available_slots(doctor="Dr. Who")
+
+    @pytest.mark.asyncio
+    async def test_booking_assigns_first_free_doctor(self, store):
+        await _seed(store, "2026-02-09", "09:00", phone="+15550000000", name="Jane")
+        first = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "09:00")
+        second = await appointment_tools.book_appointment("+1987654321", "Ann", "2026-02-09", "09:00")
+
+        assert first["success"] is True
+        assert first["appointment"]["doctor_name"] == "Dr. Lee"
+        # Both doctors are now taken at 09:00
+        assert second["success"] is False
+        assert second["alternatives"][0] == {"date": "2026-02-09", "time": "08:40", "doctor": "Dr. Lee"}
+
+    @pytest.mark.asyncio
+    async def test_booking_inside_a_longer_appointment_conflicts(self, store):
+        """A slot that starts inside another booking's time range is rejected by the overlap rule."""
+        await _seed(store, "2026-02-09", "09:00", phone="+15550000000", name="Jane", duration=60)
+        result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "09:30",
+                                                          doctor_name="Dr. Smith")
+
+        assert result["success"] is False
+        assert result["alternatives"][0] == {"date": "2026-02-09", "time": "10:00", "doctor": "Dr. Smith"}
+
+    @pytest.mark.asyncio
+    async def test_booking_stores_the_doctors_slot_length(self):
+        result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "09:00",
+                                                          doctor_name="Dr. Lee")
+        assert result["appointment"]["duration_minutes"] == 20
+
+    @pytest.mark.asyncio
+    async def test_booking_outside_every_doctors_hours_is_rejected(self, store):
+        with patch.object(store, "reserve", wraps=store.reserve) as reserve:
+            sunday = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-15", "10:00")
+            lee_afternoon = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "14:00",
+                                                                     doctor_name="Dr. Lee")
+        assert "outside the doctors' working hours" in sunday["error"]
+        assert "outside Dr. Lee's working hours" in lee_afternoon["error"]
+        reserve.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_booking_goes_to_the_doctor_working_then(self):
+        result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-14", "08:00")
+        assert result["appointment"]["doctor_name"] == "Dr. Lee"  # Saturday: only Dr. Lee works
+
+    @pytest.mark.asyncio
+    async def test_booking_unknown_doctor_is_an_error(self):
+        result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "09:00",
+                                                          doctor_name="Dr. Who")
+        assert result["success"] is False
+        assert "Unknown doctor" in result["error"]
+
+
 # ============================================================
 # book_appointment
 # ============================================================
@@ -129,46 +301,70 @@ class TestBookAppointment:
     @pytest.mark.asyncio
     async def test_successful_booking(self):
         """Should insert and return success when slot is free."""
-        client = SequentialMockClient([
-            [],  # First call: check existing (empty = slot is free)
-            [{"id": "abc-123", "phone_number": "+1234567890", "patient_name": "John",
-              "appointment_date": "2026-02-10", "appointment_time": "09:00",
-              "reason": "Checkup", "status": "scheduled"}],  # Second call: insert
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.book_appointment(
-                "+1234567890", "John", "2026-02-10", "09:00", "Checkup"
-            )
+        result = await appointment_tools.book_appointment(
+            "+1234567890", "John", "2026-02-10", "09:00", "Checkup"
+        )
         assert result["success"] is True
         assert result["appointment"]["patient_name"] == "John"
+        assert result["appointment"]["reason"] == "Checkup"
 
     @pytest.mark.asyncio
-    async def test_double_booking_rejected(self):
+    async def test_double_booking_rejected(self, store):
         """Should reject booking when slot is already taken."""
-        client = SequentialMockClient([
-            [{"id": "existing-123"}],  # First call: slot already booked
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.book_appointment(
-                "+1234567890", "John", "2026-02-10", "09:00"
-            )
+        await _seed(store, "2026-02-10", "09:00")
+        result = await appointment_tools.book_appointment(
+            "+1234567890", "John", "2026-02-10", "09:00"
+        )
         assert result["success"] is False
         assert "already booked" in result["error"]
 
+    @pytest.mark.asyncio
+    async def test_single_round_trip(self, store):
+        """Booking should be one insert with no separate availability check."""
+        with patch.object(store, "reserve", wraps=store.reserve) as reserve, \
+                patch.object(store, "scheduled_between", wraps=store.scheduled_between) as loads:
+            await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "09:00")
+        assert reserve.await_count == 1
+        loads.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_malformed_date_rejected_before_write(self, store):
+        with patch.object(store, "reserve", wraps=store.reserve) as reserve:
+            result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-30", "09:00")
+        assert result["success"] is False
+        assert "2026-02-30" in result["error"]
+        reserve.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_conflict_reloads_availability_index(self, store):
+        """A rejected booking means our index missed a write; it should reload."""
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar()]):
+            await appointment_tools.fetch_available_slots()  # Index shows nothing booked
+            await _seed(store, "2026-02-09", "09:00")  # Another worker's booking
+            with patch.object(store, "scheduled_between", wraps=store.scheduled_between) as loads:
+                await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "09:00")
+                result = await appointment_tools.fetch_available_slots()
+        assert [s["time"] for s in result] == ["09:30"]
+        assert loads.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_conflict_offers_nearest_alternatives(self, store):
+        await _seed(store, "2026-02-09", "10:00")
+        await _seed(store, "2026-02-09", "10:30")
+        # 09:00-11:30 every 30 minutes on 2026-02-09
+        with patch("tools.appointment_tools.get_calendars", return_value=[_calendar(end_hour=12)]):
+            result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-09", "10:00")
+        assert result["success"] is False
+        assert [s["time"] for s in result["alternatives"]] == ["09:30", "09:00", "11:00"]
+
     @pytest.mark.asyncio
     async def test_default_reason(self):
         """Should use 'General checkup' when no reason provided."""
-        client = SequentialMockClient([
-            [],  # slot is free
-            [{"id": "abc", "reason": "General checkup", "phone_number": "+1234567890",
-              "patient_name": "Jane", "appointment_date": "2026-02-10",
-              "appointment_time": "10:00", "status": "scheduled"}],
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.book_appointment(
-                "+1234567890", "Jane", "2026-02-10", "10:00", None
-            )
+        result = await appointment_tools.book_appointment(
+            "+1234567890", "Jane", "2026-02-10", "10:00", None
+        )
         assert result["success"] is True
+        assert result["appointment"]["reason"] == "General checkup"
 
 
 # ============================================================
@@ -178,21 +374,19 @@ class TestBookAppointment:
 class TestRetrieveAppointments:
 
     @pytest.mark.asyncio
-    async def test_returns_scheduled_appointments(self, mock_supabase):
+    async def test_returns_scheduled_appointments(self, store):
         """Should return list of scheduled appointments."""
-        mock_supabase.set_response([
-            {"id": "1", "appointment_date": "2026-02-10", "appointment_time": "09:00",
-             "status": "scheduled", "patient_name": "John"},
-            {"id": "2", "appointment_date": "2026-02-11", "appointment_time": "10:00",
-             "status": "scheduled", "patient_name": "John"},
-        ])
+        await _seed(store, "2026-02-10", "09:00", phone="+1234567890", name="John")
+        await _seed(store, "2026-02-11", "10:00", phone="+1234567890", name="John")
+        cancelled = await _seed(store, "2026-02-12", "10:00", phone="+1234567890", name="John")
+        await store.cancel(cancelled)
         result = await appointment_tools.retrieve_appointments("+1234567890")
-        assert len(result) == 2
+        assert [a["appointment_date"] for a in result] == ["2026-02-10", "2026-02-11"]
 
     @pytest.mark.asyncio
-    async def test_no_appointments_returns_empty(self, mock_supabase):
+    async def test_no_appointments_returns_empty(self, store):
         """Should return empty list when user has no appointments."""
-        mock_supabase.set_response([])
+        await _seed(store, "2026-02-10", "09:00", phone="+1234567890", name="John")
         result = await appointment_tools.retrieve_appointments("+9999999999")
         assert result == []
 
@@ -204,19 +398,17 @@ class TestRetrieveAppointments:
 class TestCancelAppointment:
 
     @pytest.mark.asyncio
-    async def test_successful_cancellation(self, mock_supabase):
+    async def test_successful_cancellation(self, store):
         """Should return success when appointment found and cancelled."""
-        mock_supabase.set_response([
-            {"id": "abc-123", "status": "cancelled"}
-        ])
-        result = await appointment_tools.cancel_appointment("abc-123")
+        appointment_id = await _seed(store, "2026-02-10", "09:00")
+        result = await appointment_tools.cancel_appointment(appointment_id)
         assert result["success"] is True
-        assert result["cancelled"]["id"] == "abc-123"
+        assert result["cancelled"]["id"] == appointment_id
+        assert result["cancelled"]["status"] == "cancelled"
 
     @pytest.mark.asyncio
-    async def test_cancel_nonexistent(self, mock_supabase):
+    async def test_cancel_nonexistent(self):
         """Should return error when appointment not found."""
-        mock_supabase.set_response([])
         result = await appointment_tools.cancel_appointment("nonexistent-id")
         assert result["success"] is False
         assert "not found" in result["error"]
@@ -229,41 +421,36 @@ class TestCancelAppointment:
 class TestModifyAppointment:
 
     @pytest.mark.asyncio
-    async def test_successful_modification(self):
+    async def test_successful_modification(self, store):
         """Should update and return success when new slot is available."""
-        client = SequentialMockClient([
-            # 1st: get current appointment
-            [{"appointment_date": "2026-02-10", "appointment_time": "09:00:00"}],
-            # 2nd: check if new slot is available (empty = free)
-            [],
-            # 3rd: perform update
-            [{"id": "abc-123", "appointment_date": "2026-02-11",
-              "appointment_time": "10:00", "status": "scheduled"}],
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.modify_appointment(
-                "abc-123", new_date="2026-02-11", new_time="10:00"
-            )
+        appointment_id = await _seed(store, "2026-02-10", "09:00")
+        result = await appointment_tools.modify_appointment(
+            appointment_id, new_date="2026-02-11", new_time="10:00"
+        )
         assert result["success"] is True
+        assert (result["updated"]["appointment_date"], result["updated"]["appointment_time"]) == ("2026-02-11", "10:00:00")
 
     @pytest.mark.asyncio
-    async def test_modify_to_booked_slot_rejected(self):
+    async def test_modify_to_booked_slot_rejected(self, store):
         """Should reject modification when new slot is already booked."""
-        client = SequentialMockClient([
-            # 1st: get current appointment
-            [{"appointment_date": "2026-02-10", "appointment_time": "09:00:00"}],
-            # 2nd: check new slot (occupied)
-            [{"id": "other-appointment"}],
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.modify_appointment(
-                "abc-123", new_date="2026-02-11", new_time="10:00"
-            )
+        appointment_id = await _seed(store, "2026-02-10", "09:00")
+        await _seed(store, "2026-02-11", "10:00", phone="+15550000003", name="Cy")
+        result = await appointment_tools.modify_appointment(
+            appointment_id, new_date="2026-02-11", new_time="10:00"
+        )
         assert result["success"] is False
         assert "already booked" in result["error"]
 
     @pytest.mark.asyncio
-    async def test_no_changes_specified(self, mock_supabase):
+    async def test_malformed_time_rejected_before_write(self, store):
+        with patch.object(store, "reschedule", wraps=store.reschedule) as reschedule:
+            result = await appointment_tools.modify_appointment("abc-123", new_time="25:00")
+        assert result["success"] is False
+        assert "25:00" in result["error"]
+        reschedule.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_no_changes_specified(self):
         """Should return error when neither date nor time provided."""
         result = await appointment_tools.modify_appointment("abc-123")
         assert result["success"] is False
@@ -272,12 +459,67 @@ class TestModifyAppointment:
     @pytest.mark.asyncio
     async def test_modify_nonexistent_appointment(self):
         """Should return error when appointment doesn't exist."""
-        client = SequentialMockClient([
-            [],  # 1st: appointment not found
-        ])
-        with patch("tools.appointment_tools.get_supabase", return_value=client):
-            result = await appointment_tools.modify_appointment(
-                "nonexistent", new_date="2026-02-11"
-            )
+        result = await appointment_tools.modify_appointment(
+            "nonexistent", new_date="2026-02-11"
+        )
         assert result["success"] is False
         assert "not found" in result["error"]
+
+
+# ============================================================
+# Full flows
+# ============================================================
+
+class TestEmbeddedStore:
+    """The appointment tools end to end against a real (in-memory SQLite) database."""
+
+    @pytest.mark.asyncio
+    async def test_book_fetch_modify_cancel(self, sqlite_store):
+        booked = await appointment_tools.book_appointment("(555) 000-0001", "Ann", "2026-02-10", "09:00")
+        assert booked["success"] is True
+        appointment_id = booked["appointment"]["id"]
+
+        slots = await appointment_tools.fetch_available_slots("2026-02-10", limit=1)
+        assert slots[0]["time"] == "09:30"
+        assert (await appointment_tools.identify_user_by_phone("+15550000001"))["name"] == "Ann"
+
+        moved = await appointment_tools.modify_appointment(appointment_id, new_time="11:00")
+        assert moved["updated"]["appointment_time"] == "11:00:00"
+        assert [a["appointment_time"] for a in await appointment_tools.retrieve_appointments("5550000001")] == ["11:00:00"]
+
+        assert (await appointment_tools.cancel_appointment(appointment_id))["success"] is True
+        assert await appointment_tools.retrieve_appointments("5550000001") == []
+
+    @pytest.mark.asyncio
+    async def test_conflict_comes_from_the_database(self, sqlite_store):
+        """A booking the index never saw (another worker's) is still rejected, with alternatives."""
+        await appointment_tools.fetch_available_slots("2026-02-10")  # Load the index first
+        await sqlite_store.reserve({"phone_number": "+15550000002", "patient_name": "Bo",
+                                    "appointment_date": "2026-02-10", "appointment_time": "09:00",
+                                    "doctor_name": "Dr. Smith", "duration_minutes": 60})
+
+        result = await appointment_tools.book_appointment("+15550000001", "Ann", "2026-02-10", "09:30")
+
+        assert result["success"] is False
+        assert result["alternatives"][0] == {"date": "2026-02-10", "time": "10:00", "doctor": "Dr. Smith"}
+
+    @pytest.mark.asyncio
+    async def test_booking_at_night_or_on_sunday_is_rejected(self, sqlite_store):
+        for day, time in (("2026-02-15", "10:00"), ("2026-02-10", "03:15"), ("2026-02-10", "09:15")):
+            result = await appointment_tools.book_appointment("+15550000001", "Ann", day, time)
+            assert result["success"] is False
+            assert "working hours" in result["error"]
+        assert await appointment_tools.retrieve_appointments("+15550000001") == []
+
+    @pytest.mark.asyncio
+    async def test_move_outside_working_hours_is_rejected(self, sqlite_store):
+        booked = await appointment_tools.book_appointment("+15550000001", "Ann", "2026-02-10", "09:00")
+        appointment_id = booked["appointment"]["id"]
+
+        # Only the time, only the date, and both: the rest comes from the stored booking
+        for change in ({"new_time": "03:15"}, {"new_date": "2026-02-15"}, {"new_date": "2026-02-11", "new_time": "17:00"}):
+            result = await appointment_tools.modify_appointment(appointment_id, **change)
+            assert result["success"] is False, change
+            assert "working hours" in result["error"]
+        stored = await appointment_tools.retrieve_appointments("+15550000001")
+        assert [(a["appointment_date"], a["appointment_time"]) for a in stored] == [("2026-02-10", "09:00:00")]
@@ -0,0 +1,122 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from unittest.mock import MagicMock
+import audio_cache
+from audio_cache import AudioCache, cache_key, fixed_phrases, synthesize_missing
+from tests.conftest import MockTTS
+from config import GREETING_TEXT, FILLER_PHRASES, FILLER_PROGRESS_PHRASE
+
+FRAME_BYTES = 24000 // 50 * 2  # 20 ms of mono 16-bit audio at 24 kHz
+
+
+class TestCacheKey:
+
+    def test_same_text_and_rate_same_key(self):
+        assert cache_key("Hello", 24000) == cache_key("Hello", 24000)
+
+    def test_text_and_sample_rate_change_key(self):
+        assert len({cache_key("Hello", 24000), cache_key("Hello!", 24000), cache_key("Hello", 16000)}) == 3
+
+    def test_voice_and_model_change_key(self, monkeypatch):
+        before = cache_key("Hello", 24000)
+        monkeypatch.setattr(audio_cache, "TTS_VOICE", "another-voice")
+        with_voice = cache_key("Hello", 24000)
+        monkeypatch.setattr(audio_cache, "TTS_MODEL", "another-model")
+        assert len({before, with_voice, cache_key("Hello", 24000)}) == 3
+
+    def test_fixed_phrases_cover_greeting_and_fillers(self):
+        assert set(fixed_phrases()) == {GREETING_TEXT, *FILLER_PHRASES.values(), FILLER_PROGRESS_PHRASE}
+
+
+class TestAudioCache:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return AudioCache(str(tmp_path), max_bytes=10 * FRAME_BYTES)
+
+    @pytest.mark.asyncio
+    async def test_put_then_play_in_frames(self, cache):
+        cache.put("k", b"\x01\x00" * 1200, 24000, 1)  # 50 ms
+        frames = [frame async for frame in cache.playback("k")]
+        assert [f.samples_per_channel for f in frames] == [480, 480, 240]
+        assert all(f.sample_rate == 24000 and f.num_channels == 1 for f in frames)
+        assert bytes(frames[0].data)[:2] == b"\x01\x00"
+
+    def test_missing_entry(self, cache):
+        assert "k" not in cache
+        assert cache.playback("k") is None
+
+    def test_corrupt_entry_is_a_miss(self, cache, tmp_path):
+        (tmp_path / "k.pcm").write_bytes(b"garbage" * 10)
+        assert cache.playback("k") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = AudioCache(str(tmp_path), max_bytes=13 * FRAME_BYTES)  # Room for three entries
+        for key in ("a", "b", "c"):
+            cache.put(key, b"\x00" * 4 * FRAME_BYTES, 24000, 1)
+            os.utime(tmp_path / f"{key}.pcm", (0, {"a": 1, "b": 2, "c": 3}[key]))
+        # Reading "a" makes "b" the least recently used
+        cache.warm(["a"])
+        cache.put("d", b"\x00" * 4 * FRAME_BYTES, 24000, 1)
+        assert ["a" in cache, "b" in cache, "c" in cache, "d" in cache] == [True, False, True, True]
+
+    def test_warm_counts_cached_entries(self, cache):
+        cache.put("a", b"\x00" * FRAME_BYTES, 24000, 1)
+        assert cache.warm(["a", "missing"]) == 1
+
+    def test_entries_are_shared_through_the_directory(self, cache, tmp_path):
+        cache.put("a", b"\x00" * FRAME_BYTES, 24000, 1)
+        assert "a" in AudioCache(str(tmp_path), cache.max_bytes)
+
+
+class TestSynthesizeMissing:
+
+    @pytest.mark.asyncio
+    async def test_each_text_synthesized_once(self, audio_cache_dir):
+        tts = MockTTS()
+        assert await synthesize_missing(tts, ["One", "Two"]) == 2
+        assert await synthesize_missing(tts, ["One", "Two"]) == 0
+        assert tts.requests == ["One", "Two"]
+        assert cache_key("One", tts.sample_rate) in audio_cache_dir
+
+    @pytest.mark.asyncio
+    async def test_failed_text_is_skipped(self, audio_cache_dir):
+        tts = MockTTS(fail="One")
+        assert await synthesize_missing(tts, ["One", "Two"]) == 1
+        assert cache_key("One", tts.sample_rate) not in audio_cache_dir
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_skipped(self, audio_cache_dir, monkeypatch):
+        put = audio_cache_dir.put
+
+        def fail_first(key, *args):
+            if key == cache_key("One", MockTTS.sample_rate):
+                raise OSError(28, "No space left on device")
+            put(key, *args)
+
+        monkeypatch.setattr(audio_cache_dir, "put", fail_first)
+        assert await synthesize_missing(MockTTS(), ["One", "Two"]) == 1
+        assert cache_key("Two", MockTTS.sample_rate) in audio_cache_dir
+
+
+class TestSay:
+
+    @pytest.mark.asyncio
+    async def test_cached_phrase_plays_stored_audio(self):
+        await synthesize_missing(MockTTS(), ["Hello"])
+        session = MagicMock()
+        session.tts.sample_rate = MockTTS.sample_rate
+        audio_cache.say(session, "Hello")
+        call = session.say.call_args
+        assert call.args == ("Hello",)
+        assert call.kwargs["add_to_chat_ctx"] is True
+        assert len([frame async for frame in call.kwargs["audio"]]) == 2
+
+    def test_uncached_phrase_falls_back_to_live_tts(self):
+        session = MagicMock()
+        session.tts.sample_rate = MockTTS.sample_rate
+        audio_cache.say(session, "Hello", add_to_chat_ctx=False)
+        session.say.assert_called_once_with("Hello", add_to_chat_ctx=False)
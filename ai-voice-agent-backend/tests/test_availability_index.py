@@ -0,0 +1,153 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from unittest.mock import AsyncMock
+from tools.availability_index import AvailabilityIndex
+
+
+def _loader(rows: list[dict]) -> AsyncMock:
+    return AsyncMock(return_value=rows)
+
+
+class TestAvailabilityIndex:
+
+    @pytest.mark.asyncio
+    async def test_loads_booked_slots(self):
+        """Rows from the loader should mark their (doctor, date, time) as booked."""
+        index = AvailabilityIndex()
+        await index.ensure_fresh(_loader([
+            {"id": "a", "appointment_date": "2026-02-09", "appointment_time": "09:00:00"},
+        ]))
+        assert index.is_booked("Dr. Smith", "2026-02-09", "09:00")
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "09:30")
+        assert not index.is_booked("Dr. Smith", "2026-02-10", "09:00")
+
+    @pytest.mark.asyncio
+    async def test_does_not_reload_within_ttl(self):
+        """A fresh index should answer from memory without calling the loader."""
+        index = AvailabilityIndex(ttl=60)
+        loader = _loader([])
+        await index.ensure_fresh(loader)
+        await index.ensure_fresh(loader)
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_reloads_after_ttl(self):
+        """An expired index should be rebuilt from the loader."""
+        index = AvailabilityIndex(ttl=0)
+        loader = _loader([])
+        await index.ensure_fresh(loader)
+        await index.ensure_fresh(loader)
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_reload(self):
+        index = AvailabilityIndex(ttl=60)
+        loader = _loader([])
+        await index.ensure_fresh(loader)
+        index.invalidate()
+        await index.ensure_fresh(loader)
+        assert loader.await_count == 2
+
+    def test_record_booking_and_cancellation(self):
+        """Incremental updates should book and free slots without a reload."""
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+        assert index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+
+        index.record_cancellation("a")
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+
+    def test_record_reschedule_moves_slot(self):
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+        index.record_reschedule({"id": "a", "appointment_date": "2026-02-10", "appointment_time": "11:00:00"})
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+        assert index.is_booked("Dr. Smith", "2026-02-10", "11:00")
+
+    def test_cancel_keeps_slot_held_by_another_booking(self):
+        """If two rows share a slot, cancelling one must not free it."""
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+        index.record_booking({"id": "b", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+        index.record_cancellation("a")
+        assert index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+
+    def test_slots_are_per_doctor(self):
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00",
+                              "doctor_name": "Dr. Lee"})
+        assert index.is_booked("Dr. Lee", "2026-02-09", "10:00")
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+
+        index.record_reschedule({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00",
+                                 "doctor_name": "Dr. Smith"})
+        assert not index.is_booked("Dr. Lee", "2026-02-09", "10:00")
+        assert index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+
+    def test_rows_without_doctor_use_default(self):
+        """Rows without doctor_name belong to the column default, the first configured doctor."""
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+        assert index.booked_times("Dr. Smith", "2026-02-09") == {"10:00"}
+
+    @pytest.mark.asyncio
+    async def test_write_during_refresh_is_replayed(self):
+        """A booking recorded while a reload is in flight is kept, without another reload."""
+        index = AvailabilityIndex(ttl=60)
+
+        async def racing_loader(from_date):
+            index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "10:00"})
+            return []
+
+        await index.ensure_fresh(racing_loader)
+        assert index.booked_times("Dr. Smith", "2026-02-09") == {"10:00"}
+        assert not index.is_stale()
+
+    @pytest.mark.asyncio
+    async def test_replay_is_idempotent_against_the_snapshot(self):
+        """Writes the snapshot already reflects are not applied twice."""
+        index = AvailabilityIndex(ttl=60)
+        moved = {"id": "a", "appointment_date": "2026-02-09", "appointment_time": "11:00"}
+
+        async def racing_loader(from_date):
+            index.record_booking({"id": "b", "appointment_date": "2026-02-09", "appointment_time": "09:00"})
+            index.record_cancellation("b")
+            index.record_reschedule(moved)
+            return [moved, {"id": "b", "appointment_date": "2026-02-09", "appointment_time": "09:00"}]
+
+        await index.ensure_fresh(racing_loader)
+        assert index.booked_times("Dr. Smith", "2026-02-09") == {"11:00"}
+        index.record_cancellation("a")
+        assert index.booked_times("Dr. Smith", "2026-02-09") == set()
+
+    @pytest.mark.asyncio
+    async def test_other_workers_change_during_refresh_triggers_reload(self):
+        index = AvailabilityIndex(ttl=60)
+
+        async def racing_loader(from_date):
+            index._on_change('{"origin": "other", "dates": ["2026-02-09"]}')
+            return []
+
+        await index.ensure_fresh(racing_loader)
+        assert index.is_stale()
+
+    def test_long_booking_blocks_overlapping_slots(self):
+        """A 60-minute booking covers the following 30-minute slot too."""
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "09:00",
+                              "duration_minutes": 60})
+        assert index.is_booked("Dr. Smith", "2026-02-09", "09:30")
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "10:00")
+        assert index.is_booked("Dr. Smith", "2026-02-09", "08:45", duration=30)
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "08:30", duration=30)
+        assert index.booked_times("Dr. Smith", "2026-02-09") == {"09:00"}
+
+    def test_cancel_frees_whole_interval(self):
+        index = AvailabilityIndex()
+        index.record_booking({"id": "a", "appointment_date": "2026-02-09", "appointment_time": "09:00",
+                              "duration_minutes": 60})
+        index.record_cancellation("a")
+        assert not index.is_booked("Dr. Smith", "2026-02-09", "09:30")
@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from benchmarks.import_profile import profile_imports, cumulative_ms
+
+# Cold import budgets for one job process (override on slow CI machines)
+COLD_IMPORT_BUDGET_MS = float(os.getenv("COLD_IMPORT_BUDGET_MS", "6000"))
+# What this repo adds on top of importing livekit.agents itself
+APP_IMPORT_BUDGET_MS = float(os.getenv("APP_IMPORT_BUDGET_MS", "500"))
+
+
+@pytest.fixture(scope="module")
+def timings():
+    """Import profile of agent.py in a fresh interpreter, as a job process sees it."""
+    return profile_imports("agent")
+
+
+class TestColdStart:
+
+    def test_importing_agent_loads_no_provider_plugins(self, timings):
+        loaded = [t.module for t in timings if t.module.startswith("livekit.plugins.")]
+        assert loaded == []
+
+    def test_importing_agent_skips_supabase_sdk(self, timings):
+        assert "supabase" not in {t.module for t in timings}
+
+    def test_cold_import_within_budget(self, timings):
+        assert cumulative_ms(timings, "agent") < COLD_IMPORT_BUDGET_MS
+
+    def test_app_import_overhead_within_budget(self, timings):
+        overhead = cumulative_ms(timings, "agent") - cumulative_ms(timings, "livekit.agents")
+        assert overhead < APP_IMPORT_BUDGET_MS
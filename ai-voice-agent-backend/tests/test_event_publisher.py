@@ -0,0 +1,147 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from models import ToolCallEvent
+from event_publisher import ToolEventPublisher, encode_frame, publisher_for, close_publisher
+
+
+def _room(publish_data=None):
+    room = MagicMock()
+    room.local_participant.publish_data = publish_data or AsyncMock()
+    return room
+
+
+def _payloads(room) -> list:
+    return [json.loads(c.kwargs["payload"]) for c in room.local_participant.publish_data.call_args_list]
+
+
+class TestToolEventPublisher:
+
+    @pytest.mark.asyncio
+    async def test_publish_does_not_block(self):
+        """publish() should return before the data channel send happens."""
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=1.0)
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        room.local_participant.publish_data.assert_not_called()
+        await publisher.aclose()
+        room.local_participant.publish_data.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_burst_is_sent_as_one_frame(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=1.0)
+        publisher.publish(ToolCallEvent.now("identify_user", "completed", {}, {"found": True}))
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        await publisher.flush()
+
+        payloads = _payloads(room)
+        assert len(payloads) == 1
+        assert [e["tool_name"] for e in payloads[0]] == ["identify_user", "fetch_slots"]
+
+    @pytest.mark.asyncio
+    async def test_started_superseded_by_result_in_same_frame(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=1.0)
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        publisher.publish(ToolCallEvent.now("fetch_slots", "completed", {}, {"slots": []}))
+        await publisher.flush()
+
+        payloads = _payloads(room)
+        assert len(payloads) == 1
+        assert payloads[0]["status"] == "completed"
+        assert publisher.stats.coalesced == 1
+
+    @pytest.mark.asyncio
+    async def test_events_after_window_are_sent_separately(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=0.001)
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        await asyncio.sleep(0.02)
+        publisher.publish(ToolCallEvent.now("fetch_slots", "completed", {}, {}))
+        await publisher.flush()
+
+        assert [p["status"] for p in _payloads(room)] == ["started", "completed"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest_started(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=1.0, max_pending=2)
+        publisher.publish(ToolCallEvent.now("identify_user", "started", {}))
+        publisher.publish(ToolCallEvent.now("identify_user", "completed", {}, {}))
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        await publisher.flush()
+
+        frame = _payloads(room)[0]
+        assert [(e["tool_name"], e["status"]) for e in frame] == [
+            ("identify_user", "completed"), ("fetch_slots", "started"),
+        ]
+        assert publisher.stats.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_large_bursts_are_split_into_frames(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=1.0, max_batch=2)
+        for i in range(5):
+            publisher.publish(ToolCallEvent.now(f"tool_{i}", "started", {}))
+        await publisher.flush()
+        assert room.local_participant.publish_data.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_records_latency(self):
+        room = _room()
+        publisher = ToolEventPublisher(room, coalesce_window=0.01)
+        publisher.publish(ToolCallEvent.now("fetch_slots", "started", {}))
+        await asyncio.sleep(0.05)  # let the coalescing window elapse instead of flushing
+        stats = publisher.stats.as_dict()
+        assert stats["frames"] == 1
+        assert stats["events"] == 1
+        assert stats["max_latency_ms"] >= 5
+
+    @pytest.mark.asyncio
+    async def test_publish_error_does_not_stop_worker(self):
+        publish_data = AsyncMock(side_effect=[Exception("Network error"), None])
+        room = _room(publish_data)
+        publisher = ToolEventPublisher(room, coalesce_window=0.001)
+        publisher.publish(ToolCallEvent.now("a", "started", {}))
+        await publisher.flush()
+        publisher.publish(ToolCallEvent.now("b", "started", {}))
+        await publisher.flush()
+        assert publish_data.call_count == 2
+        assert publisher.stats.frames == 1
+
+
+class TestPublisherRegistry:
+
+    @pytest.mark.asyncio
+    async def test_one_publisher_per_room(self):
+        room = _room()
+        assert publisher_for(room) is publisher_for(room)
+        assert publisher_for(room) is not publisher_for(_room())
+        await close_publisher(room)
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_events(self):
+        room = _room()
+        publisher_for(room).publish(ToolCallEvent.now("a", "started", {}))
+        await close_publisher(room)
+        room.local_participant.publish_data.assert_called_once()
+
+
+class TestEncodeFrame:
+
+    def test_single_event_is_bare_object(self):
+        payload = json.loads(encode_frame([ToolCallEvent.now("a", "started", {})]))
+        assert payload["tool_name"] == "a"
+
+    def test_multiple_events_are_array(self):
+        payload = json.loads(encode_frame([
+            ToolCallEvent.now("a", "started", {}),
+            ToolCallEvent.now("b", "started", {}),
+        ]))
+        assert [e["tool_name"] for e in payload] == ["a", "b"]
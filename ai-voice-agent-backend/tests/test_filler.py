@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import audio_cache
+import filler
+from agent_definition import AppointmentAgent
+from session_state import SessionState
+from tests.conftest import MockTTS
+from config import FILLER_PHRASES, FILLER_PROGRESS_PHRASE
+
+
+@pytest.fixture
+def fast_fillers(monkeypatch):
+    monkeypatch.setattr(filler, "FILLER_DELAY_MS", 20)
+    monkeypatch.setattr(filler, "FILLER_PROGRESS_MS", 60)
+
+
+def _ctx():
+    ctx = MagicMock()
+    ctx.userdata = SessionState()
+    ctx.session.tts.sample_rate = MockTTS.sample_rate
+    ctx.session.room_io.room.local_participant.publish_data = AsyncMock()
+    return ctx
+
+
+def _slow(seconds: float, result):
+    """A tool function stand-in that takes `seconds` to return `result`."""
+    async def tool(*args):
+        await asyncio.sleep(seconds)
+        return result
+    return tool
+
+
+class TestMaskedTools:
+
+    @pytest.mark.asyncio
+    async def test_fast_tool_says_nothing(self, fast_fillers):
+        ctx = _ctx()
+        with patch("agent_definition.appointment_tools.retrieve_appointments", new_callable=AsyncMock) as fn:
+            fn.return_value = []
+            await AppointmentAgent().retrieve_appointments(ctx, phone_number="+123")
+        await asyncio.sleep(0.08)
+        ctx.session.say.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_slow_tool_says_filler_then_answers(self, fast_fillers):
+        ctx = _ctx()
+        with patch("agent_definition.appointment_tools.fetch_available_slots",
+                   side_effect=_slow(0.04, [])):
+            result = json.loads(await AppointmentAgent().fetch_slots(ctx))
+        assert "days" in result
+        ctx.session.say.assert_called_once_with(FILLER_PHRASES["fetch_slots"], add_to_chat_ctx=False)
+        # The progress update is cancelled along with the tool
+        await asyncio.sleep(0.06)
+        assert ctx.session.say.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_very_slow_tool_adds_progress_update(self, fast_fillers):
+        ctx = _ctx()
+        booked = {"success": True, "appointment": {"id": "1", "phone_number": "+123"}}
+        with patch("agent_definition.appointment_tools.book_appointment", side_effect=_slow(0.1, booked)):
+            await AppointmentAgent().book_appointment(ctx, "+123", "Ann", "2026-02-10", "09:00")
+        said = [call.args[0] for call in ctx.session.say.call_args_list]
+        assert said == [FILLER_PHRASES["book_appointment"], FILLER_PROGRESS_PHRASE]
+
+    @pytest.mark.asyncio
+    async def test_cached_audio_is_replayed(self, fast_fillers):
+        await audio_cache.synthesize_missing(MockTTS(), [FILLER_PHRASES["cancel_appointment"]])
+        ctx = _ctx()
+        with patch("agent_definition.appointment_tools.cancel_appointment",
+                   side_effect=_slow(0.04, {"success": False, "error": "not found"})):
+            await AppointmentAgent().cancel_appointment(ctx, appointment_id="1")
+        call = ctx.session.say.call_args
+        assert call.args == (FILLER_PHRASES["cancel_appointment"],)
+        assert call.kwargs["add_to_chat_ctx"] is False
+        assert len([frame async for frame in call.kwargs["audio"]]) == 2
+
+    @pytest.mark.asyncio
+    async def test_failing_say_does_not_fail_the_tool(self, fast_fillers):
+        ctx = _ctx()
+        ctx.session.say.side_effect = RuntimeError("session closing")
+        with patch("agent_definition.appointment_tools.retrieve_appointments",
+                   side_effect=_slow(0.04, [])):
+            result = json.loads(await AppointmentAgent().retrieve_appointments(ctx, phone_number="+123"))
+        assert result["count"] == 0
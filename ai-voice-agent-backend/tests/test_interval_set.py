@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from tools.interval_set import IntervalSet
+from benchmarks.interval_index import measure
+
+
+class TestIntervalSet:
+
+    def test_half_open_overlap(self):
+        intervals = IntervalSet()
+        intervals.add(540, 600, "a")  # 09:00-10:00
+        assert intervals.overlaps(570, 600)
+        assert intervals.overlaps(530, 541)
+        assert not intervals.overlaps(600, 630)
+        assert not intervals.overlaps(510, 540)
+
+    def test_long_interval_found_behind_short_ones(self):
+        """A long booking must still be found when many short ones start after it."""
+        intervals = IntervalSet()
+        intervals.add(0, 600, "long")
+        for n in range(1, 20):
+            intervals.add(n * 30, n * 30 + 10, str(n))
+        assert intervals.overlaps(585, 590)
+        assert not intervals.overlaps(600, 610)
+
+    def test_remove_by_key_keeps_shared_start(self):
+        intervals = IntervalSet()
+        intervals.add(540, 570, "a")
+        intervals.add(540, 570, "b")
+        assert intervals.remove(540, "a")
+        assert not intervals.remove(540, "a")
+        assert intervals.overlaps(540, 570)
+        assert intervals.remove(540, "b")
+        assert not intervals.overlaps(540, 570)
+        assert len(intervals) == 0
+
+    def test_starts_are_sorted(self):
+        intervals = IntervalSet()
+        for start in (600, 540, 570):
+            intervals.add(start, start + 30, str(start))
+        assert intervals.starts() == [540, 570, 600]
+
+
+class TestIntervalIndexBenchmark:
+
+    @pytest.mark.parametrize("size", [10, 1000])
+    def test_measure_agrees_with_scan(self, size):
+        """measure() asserts the index matches a linear scan before timing it."""
+        result = measure(size, probes=20, repeat=1, seed=1)
+        assert result["bookings"] == size
+        assert result["interval_index_us"] > 0
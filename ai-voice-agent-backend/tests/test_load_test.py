@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from db import supabase_store
+from db.supabase_client import is_unique_violation, is_slot_conflict
+from benchmarks.fake_backend import InMemorySupabase
+from benchmarks.load_test import LoadTestConfig, run_load_test
+
+
+class TestInMemorySupabase:
+
+    def test_select_filters_orders_and_limits(self):
+        db = InMemorySupabase()
+        db.seed_appointment("+15550000002", "B", "2026-02-11", "10:00")
+        db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00")
+
+        rows = db.table("appointments").select("*").eq("status", "scheduled").order("appointment_date").limit(1).execute().data
+
+        assert len(rows) == 1
+        assert rows[0]["patient_name"] == "A"
+        assert rows[0]["appointment_time"] == "09:00:00"
+
+    def test_duplicate_scheduled_slot_raises_unique_violation(self):
+        db = InMemorySupabase()
+        db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00")
+
+        with pytest.raises(Exception) as exc_info:
+            db.table("appointments").insert({
+                "phone_number": "+15550000002", "patient_name": "B",
+                "appointment_date": "2026-02-10", "appointment_time": "09:00",
+            }).execute()
+
+        assert is_unique_violation(exc_info.value)
+
+    def test_overlapping_booking_raises_exclusion_violation(self):
+        db = InMemorySupabase()
+        db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00", duration_minutes=60)
+
+        with pytest.raises(Exception) as exc_info:
+            db.table("appointments").insert({
+                "phone_number": "+15550000002", "patient_name": "B",
+                "appointment_date": "2026-02-10", "appointment_time": "09:30",
+            }).execute()
+
+        assert exc_info.value.code == "23P01"
+        assert is_slot_conflict(exc_info.value)
+
+    def test_adjacent_bookings_do_not_overlap(self):
+        db = InMemorySupabase()
+        db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00", duration_minutes=60)
+        db.seed_appointment("+15550000002", "B", "2026-02-10", "10:00")
+
+        assert len(db.tables["appointments"]) == 2
+
+    def test_cancelled_slot_can_be_rebooked(self):
+        db = InMemorySupabase()
+        row = db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00")
+        db.table("appointments").update({"status": "cancelled"}).eq("id", row["id"]).execute()
+
+        db.table("appointments").insert({
+            "phone_number": "+15550000002", "patient_name": "B",
+            "appointment_date": "2026-02-10", "appointment_time": "09:00",
+        }).execute()
+
+        assert len(db.tables["appointments"]) == 2
+
+    def test_booking_upserts_patient(self):
+        db = InMemorySupabase()
+        db.seed_appointment("+15550000001", "A", "2026-02-10", "09:00")
+        db.seed_appointment("+15550000001", "A. Renamed", "2026-02-11", "09:00")
+
+        assert db.tables["patients"] == [{"phone_number": "+15550000001", "patient_name": "A. Renamed"}]
+
+
+class TestLoadTest:
+
+    @pytest.mark.asyncio
+    async def test_small_run_completes_without_failures(self):
+        report = await run_load_test(LoadTestConfig(
+            calls=20, concurrency=10, db_latency_ms=0, db_jitter_ms=0,
+            publish_latency_ms=0, days_ahead=5,
+        ))
+
+        assert report["failures"] == {}
+        assert sum(report["outcomes"].get(s, 0) for s in ("book", "check", "reschedule", "cancel")) == 20
+        assert report["tool_latency_ms"]["identify_user"]["count"] == 20
+        assert report["db_queries"] > 0
+
+    @pytest.mark.asyncio
+    async def test_fillers_are_spoken_without_errors(self, monkeypatch, caplog):
+        import filler
+        monkeypatch.setattr(filler, "FILLER_DELAY_MS", 1)
+        await run_load_test(LoadTestConfig(calls=4, concurrency=4, db_latency_ms=5, db_jitter_ms=0,
+                                           publish_latency_ms=0))
+
+        assert not [r for r in caplog.records if r.name == "filler"]
+
+    @pytest.mark.asyncio
+    async def test_restores_patched_client(self):
+        await run_load_test(LoadTestConfig(calls=2, concurrency=2, db_latency_ms=0, db_jitter_ms=0,
+                                           publish_latency_ms=0))
+
+        assert not isinstance(supabase_store.get_supabase, InMemorySupabase)
+        assert supabase_store.get_supabase.__module__ == "db.supabase_client"
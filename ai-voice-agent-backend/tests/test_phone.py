@@ -0,0 +1,27 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tools.phone import normalize_phone
+
+
+class TestNormalizePhone:
+
+    def test_e164_is_unchanged(self):
+        assert normalize_phone("+15551234567") == "+15551234567"
+
+    def test_strips_formatting(self):
+        assert normalize_phone("+1 (555) 123-4567") == "+15551234567"
+
+    def test_national_number_gets_country_code(self):
+        assert normalize_phone("555-123-4567") == "+15551234567"
+        assert normalize_phone("5551234567", country_code="44") == "+445551234567"
+
+    def test_international_00_prefix(self):
+        assert normalize_phone("0044 20 7946 0958") == "+442079460958"
+
+    def test_number_with_country_code_but_no_plus(self):
+        assert normalize_phone("15551234567") == "+15551234567"
+
+    def test_no_digits_returned_stripped(self):
+        assert normalize_phone("  unknown ") == "unknown"
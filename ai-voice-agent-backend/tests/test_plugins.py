@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from unittest.mock import MagicMock, patch
+import plugins
+
+
+class TestRequiredPlugins:
+
+    def test_configured_providers_vad_and_turn_detector(self):
+        with patch.object(plugins, "TAVUS_REPLICA_ID", None):
+            modules = plugins.required_plugins()
+
+        assert modules == [
+            "livekit.plugins.deepgram",
+            "livekit.plugins.anthropic",
+            "livekit.plugins.cartesia",
+            plugins.VAD_MODULE,
+            plugins.TURN_DETECTOR_MODULE,
+        ]
+
+    def test_tavus_only_when_configured(self):
+        with patch.object(plugins, "TAVUS_REPLICA_ID", "r1"), patch.object(plugins, "TAVUS_PERSONA_ID", "p1"):
+            assert plugins.TAVUS_MODULE in plugins.required_plugins()
+
+    def test_same_provider_listed_once(self):
+        with patch.object(plugins, "STT_PROVIDER", "openai"), patch.object(plugins, "LLM_PROVIDER", "openai"), \
+                patch.object(plugins, "TTS_PROVIDER", "openai"):
+            assert plugins.required_plugins().count("livekit.plugins.openai") == 1
+
+
+class TestBuildLLM:
+
+    def test_anthropic_enables_prompt_caching(self):
+        provider = MagicMock()
+        with patch.object(plugins, "_provider", return_value=provider), \
+                patch.object(plugins, "LLM_PROVIDER", "anthropic"), patch.object(plugins, "LLM_PROMPT_CACHING", True):
+            plugins.build_llm()
+
+        assert provider.LLM.call_args.kwargs["caching"] == "ephemeral"
+
+    def test_other_providers_get_no_caching_flag(self):
+        provider = MagicMock()
+        with patch.object(plugins, "_provider", return_value=provider), patch.object(plugins, "LLM_PROVIDER", "openai"):
+            plugins.build_llm()
+
+        assert "caching" not in provider.LLM.call_args.kwargs
@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+import telemetry
+from audio_cache import fixed_phrases, synthesize_missing
+from prewarm import Component, PrewarmError, run_prewarm, _warm_audio_cache
+from tests.conftest import MockTTS
+
+
+class TestRunPrewarm:
+
+    def test_stores_values_and_timings(self):
+        userdata = {}
+        report = run_prewarm([
+            Component("vad", lambda: "vad-model", required=True),
+            Component("dns", lambda: None),
+        ], userdata)
+
+        assert report.ready
+        assert userdata["vad"] == "vad-model"
+        assert "dns" not in userdata
+        assert userdata["prewarm"] is report
+        assert set(report.timings_ms) == {"imports", "vad", "dns"}
+        assert telemetry.snapshot()["prewarm.vad"]["count"] >= 1
+
+    def test_components_load_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+        # Each loader waits for the others; a sequential pipeline would break the barrier
+        components = [Component(f"c{i}", barrier.wait) for i in range(3)]
+
+        report = run_prewarm(components, {})
+
+        assert report.errors == {}
+
+    def test_optional_failure_is_reported_not_raised(self):
+        def fail():
+            raise ConnectionError("db down")
+
+        report = run_prewarm([Component("database", fail)], {})
+
+        assert report.ready
+        assert "db down" in report.errors["database"]
+
+    def test_required_failure_raises(self):
+        def fail():
+            raise FileNotFoundError("model missing")
+
+        userdata = {}
+        with pytest.raises(PrewarmError, match="vad"):
+            run_prewarm([Component("vad", fail, required=True)], userdata)
+        assert userdata["prewarm"].ready is False
+
+    def test_slow_component_times_out(self):
+        release = threading.Event()
+        try:
+            start = time.perf_counter()
+            report = run_prewarm([Component("slow", release.wait)], {}, timeout=0.05)
+            elapsed = time.perf_counter() - start
+        finally:
+            release.set()
+
+        assert "timed out" in report.errors["slow"]
+        assert elapsed < 1
+
+
+class TestAudioCacheWarmup:
+
+    def test_warms_cached_fixed_phrases(self, audio_cache_dir, caplog):
+        asyncio.run(synthesize_missing(MockTTS(), fixed_phrases()[:2]))
+
+        with patch("plugins.build_tts", return_value=MockTTS()), caplog.at_level("INFO", logger="prewarm"):
+            _warm_audio_cache()
+
+        assert f"2/{len(fixed_phrases())} fixed phrases cached" in caplog.text
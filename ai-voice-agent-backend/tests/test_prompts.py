@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+from prompts import build_system_prompt, prefix_fingerprint
+from tools.clinic_time import clinic_today
+from config import SYSTEM_PROMPT_PREFIX
+
+
+class TestBuildSystemPrompt:
+
+    def test_static_prefix_is_identical_across_days(self):
+        monday = build_system_prompt(date(2026, 2, 9))
+        tuesday = build_system_prompt(date(2026, 2, 10))
+
+        assert monday.startswith(SYSTEM_PROMPT_PREFIX)
+        assert tuesday.startswith(SYSTEM_PROMPT_PREFIX)
+        assert monday != tuesday
+
+    def test_includes_the_date(self):
+        assert "Monday, February 09, 2026" in build_system_prompt(date(2026, 2, 9))
+
+    def test_rendered_once_per_day(self):
+        assert build_system_prompt(date(2026, 2, 9)) is build_system_prompt(date(2026, 2, 9))
+
+    def test_lists_configured_doctors(self, two_doctors):
+        prompt = build_system_prompt(date(2026, 2, 9))
+        assert "- Dr. Smith (Main), 30-minute appointments" in prompt
+        assert "- Dr. Lee (Northside), 20-minute appointments" in prompt
+
+    def test_defaults_to_clinic_today(self):
+        with patch("prompts.clinic_today", return_value=date(2026, 3, 2)):
+            assert "Monday, March 02, 2026" in build_system_prompt()
+
+    def test_agent_gets_current_prompt(self):
+        from agent_definition import AppointmentAgent
+        with patch("prompts.clinic_today", return_value=date(2026, 3, 2)):
+            agent = AppointmentAgent()
+
+        assert "March 02, 2026" in agent.instructions
+
+
+class TestClinicToday:
+
+    def test_uses_clinic_timezone(self):
+        now = datetime(2026, 1, 1, 5, 0, tzinfo=timezone.utc)
+        with patch("tools.clinic_time.CLINIC_TZ", ZoneInfo("America/Los_Angeles")):
+            assert clinic_today(now) == date(2025, 12, 31)
+
+    def test_utc_clinic(self):
+        now = datetime(2026, 1, 1, 5, 0, tzinfo=timezone.utc)
+        with patch("tools.clinic_time.CLINIC_TZ", ZoneInfo("UTC")):
+            assert clinic_today(now) == date(2026, 1, 1)
+
+
+class TestPrefixFingerprint:
+
+    def test_stable_across_sessions(self):
+        from agent_definition import AppointmentAgent
+        first, second = AppointmentAgent(), AppointmentAgent()
+
+        assert prefix_fingerprint(first.instructions, first.tools) == prefix_fingerprint(second.instructions, second.tools)
+
+    def test_changes_with_prompt(self):
+        from agent_definition import AppointmentAgent
+        tools = AppointmentAgent().tools
+
+        assert prefix_fingerprint("a", tools) != prefix_fingerprint("b", tools)
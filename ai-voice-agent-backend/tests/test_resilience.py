@@ -0,0 +1,259 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import telemetry
+from agent_definition import AppointmentAgent, _within_budget
+from session_state import SessionState
+from db import storage
+from db.resilience import CircuitBreaker, ResilientStore, latency_budget, remaining_budget
+from db.sqlite_store import SQLiteStore
+from db.storage import AppointmentStore, SlotConflict, InvalidRequest, StoreUnavailable
+from config import TOOL_LATENCY_BUDGETS_MS, STORE_TIMEOUT_SECONDS
+
+
+class ScriptedStore(AppointmentStore):
+    """Store whose calls take scripted delays (seconds) or raise, one entry per call."""
+
+    def __init__(self, script: list):
+        self.script = list(script)
+        self.calls = 0
+
+    async def _next(self, answer):
+        self.calls += 1
+        step = self.script.pop(0) if self.script else 0
+        if isinstance(step, Exception):
+            raise step
+        await asyncio.sleep(step)
+        return answer
+
+    async def find_patient(self, phone_number: str):
+        return await self._next({"patient_name": f"call {self.calls + 1}", "phone_number": phone_number})
+
+    async def appointments_for(self, phone_number: str):
+        return await self._next([])
+
+    async def reserve(self, appointment: dict):
+        return await self._next({"id": "1", **appointment})
+
+    async def cancel(self, appointment_id: str):
+        return await self._next({"id": appointment_id, "status": "cancelled"})
+
+    async def scheduled_between(self, from_date: str, to_date: str | None = None):
+        return await self._next([])
+
+    async def reschedule(self, appointment_id: str, updates: dict):
+        return await self._next({"id": appointment_id, **updates})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_telemetry():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+class TestLatencyBudget:
+
+    def test_outside_budget_uses_store_timeout(self):
+        assert remaining_budget() == STORE_TIMEOUT_SECONDS
+
+    def test_budget_counts_down_and_resets(self):
+        with latency_budget(1.0):
+            assert 0.9 < remaining_budget() <= 1.0
+        assert remaining_budget() == STORE_TIMEOUT_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_slow_call_past_budget_is_unavailable(self):
+        store = ResilientStore(ScriptedStore([1.0]))
+        with latency_budget(0.05), pytest.raises(StoreUnavailable):
+            await store.reserve({"patient_name": "Ann"})
+        assert telemetry.store_events() == {"timeout": 1}
+
+    @pytest.mark.asyncio
+    async def test_errors_surface_as_unavailable(self):
+        store = ResilientStore(ScriptedStore([ConnectionError("reset")]))
+        with pytest.raises(StoreUnavailable, match="reset"):
+            await store.find_patient("+1")
+
+    @pytest.mark.asyncio
+    async def test_slot_conflict_passes_through_and_counts_as_healthy(self):
+        store = ResilientStore(ScriptedStore([SlotConflict("taken")]), CircuitBreaker(threshold=1))
+        with pytest.raises(SlotConflict):
+            await store.reserve({})
+        assert store.breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_invalid_input_passes_through_and_counts_as_healthy(self):
+        store = ResilientStore(ScriptedStore([InvalidRequest("invalid date")] * 3), CircuitBreaker(threshold=1))
+        for _ in range(3):
+            with pytest.raises(InvalidRequest):
+                await store.reserve({})
+        assert store.breaker.state == "closed"
+
+
+class TestHedgedReads:
+
+    @pytest.mark.asyncio
+    async def test_fast_read_is_not_hedged(self):
+        inner = ScriptedStore([0])
+        row = await ResilientStore(inner).find_patient("+1")
+        assert row["patient_name"] == "call 1"
+        assert inner.calls == 1
+        assert telemetry.snapshot()["store.find_patient"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_read_is_hedged_and_duplicate_wins(self, monkeypatch):
+        monkeypatch.setattr("db.resilience.HEDGE_DEFAULT_DELAY_MS", 20)
+        inner = ScriptedStore([1.0, 0])
+        row = await ResilientStore(inner).find_patient("+1")
+        assert row["patient_name"] == "call 2"
+        assert inner.calls == 2
+        assert telemetry.store_events() == {"hedge": 1, "hedge_won": 1}
+
+    @pytest.mark.asyncio
+    async def test_hedge_waits_for_observed_p95(self, monkeypatch):
+        monkeypatch.setattr("db.resilience.HEDGE_MIN_SAMPLES", 3)
+        for _ in range(3):
+            telemetry.record("store.appointments_for", 200)
+        inner = ScriptedStore([0.05])
+        # Slower than the default delay, but well within the 200 ms p95
+        await ResilientStore(inner).appointments_for("+1")
+        assert inner.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_first_attempt_failing_after_hedge_uses_duplicate(self, monkeypatch):
+        monkeypatch.setattr("db.resilience.HEDGE_DEFAULT_DELAY_MS", 10)
+
+        class FailsLate(ScriptedStore):
+            async def find_patient(self, phone_number):
+                self.calls += 1
+                if self.calls == 1:
+                    await asyncio.sleep(0.05)
+                    raise ConnectionError("reset")
+                await asyncio.sleep(0.1)
+                return {"patient_name": "Ann", "phone_number": phone_number}
+
+        row = await ResilientStore(FailsLate([])).find_patient("+1")
+        assert row["patient_name"] == "Ann"
+
+    @pytest.mark.asyncio
+    async def test_writes_are_never_duplicated(self, monkeypatch):
+        monkeypatch.setattr("db.resilience.HEDGE_DEFAULT_DELAY_MS", 10)
+        inner = ScriptedStore([0.05])
+        await ResilientStore(inner).reserve({"patient_name": "Ann"})
+        assert inner.calls == 1
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_then_half_opens_for_one_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=2, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        clock.now = 10
+        assert breaker.allow()       # The trial
+        assert not breaker.allow()   # Everyone else still fails fast
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    def test_abandoned_trial_is_released(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, reset_seconds=1, clock=clock)
+        breaker.record_failure()
+        clock.now = 1
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.allow()
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast_without_calling_store(self):
+        inner = ScriptedStore([ConnectionError("down")])
+        store = ResilientStore(inner, CircuitBreaker(threshold=1))
+        with pytest.raises(StoreUnavailable):
+            await store.find_patient("+1")
+        with pytest.raises(StoreUnavailable, match="circuit open"):
+            await store.find_patient("+1")
+        assert inner.calls == 1
+        assert telemetry.store_events() == {"error": 1, "rejected": 1}
+
+
+class TestSystemBusyResult:
+    """Tools answer with a speakable busy result instead of failing the call."""
+
+    @pytest.fixture
+    def mock_ctx(self):
+        ctx = MagicMock()
+        ctx.userdata = SessionState()
+        ctx.session.room_io.room.local_participant.publish_data = AsyncMock()
+        return ctx
+
+    @pytest.fixture
+    def down_store(self, monkeypatch):
+        store = ResilientStore(ScriptedStore([ConnectionError("down")] * 10), CircuitBreaker(threshold=1))
+        monkeypatch.setattr(storage, "_store", store)
+        return store
+
+    @pytest.mark.asyncio
+    async def test_lookup_returns_system_busy(self, mock_ctx, down_store):
+        result = json.loads(await AppointmentAgent().retrieve_appointments(mock_ctx, phone_number="+15550000001"))
+        assert result["error"] == "system_busy"
+        assert "busy" in result["message"]
+
+    @pytest.mark.asyncio
+    async def test_write_busy_result_warns_change_may_have_happened(self, mock_ctx, down_store):
+        result = json.loads(await AppointmentAgent().cancel_appointment(mock_ctx, appointment_id="abc"))
+        assert result == {"success": False, "error": "system_busy", "message": result["message"]}
+        assert "could not be confirmed" in result["message"]
+        assert down_store.breaker.state == "open"
+
+    @pytest.mark.asyncio
+    async def test_slow_store_answers_within_tool_budget(self, mock_ctx, monkeypatch):
+        monkeypatch.setitem(TOOL_LATENCY_BUDGETS_MS, "identify_user", 50)
+        monkeypatch.setattr(storage, "_store", ResilientStore(ScriptedStore([5.0, 5.0])))
+
+        # The budget is read when a tool is defined, so guard a fresh one
+        async def identify(self, context, phone_number: str):
+            return await storage.get_store().find_patient(phone_number)
+
+        guarded = _within_budget("identify_user")(identify)
+        agent = AppointmentAgent()
+        started = asyncio.get_running_loop().time()
+        result = json.loads(await guarded(agent, mock_ctx, phone_number="+1"))
+        assert result["error"] == "system_busy"
+        assert asyncio.get_running_loop().time() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_healthy_store_is_unaffected(self, mock_ctx, monkeypatch):
+        monkeypatch.setattr(storage, "_store", ResilientStore(SQLiteStore()))
+        result = json.loads(await AppointmentAgent().retrieve_appointments(mock_ctx, phone_number="+15550000001"))
+        assert result["count"] == 0
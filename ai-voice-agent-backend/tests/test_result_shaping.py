@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import pytest
+import telemetry
+from result_shaping import (
+    compact_slots,
+    estimate_tokens,
+    fit_to_budget,
+    project_appointment,
+    shape_appointments,
+    shape_slots,
+    shape_write_result,
+    time_ranges,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_telemetry():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+def _slot(day, time, doctor="Dr. Smith"):
+    return {"date": day, "time": time, "doctor": doctor}
+
+
+class TestTimeRanges:
+
+    def test_merges_consecutive_slots(self):
+        times = ["09:00", "09:30", "10:00", "14:00", "14:30", "16:00"]
+        assert time_ranges(times, 30) == "09:00-10:00, 14:00-14:30, 16:00"
+
+    def test_respects_slot_length(self):
+        assert time_ranges(["09:00", "09:30"], 45) == "09:00, 09:30"
+        assert time_ranges(["09:00", "09:45", "10:30"], 45) == "09:00-10:30"
+
+    def test_empty(self):
+        assert time_ranges([], 30) == ""
+
+
+class TestCompactSlots:
+
+    def test_groups_by_day_for_one_doctor(self):
+        slots = [_slot("2026-10-19", "09:00"), _slot("2026-10-19", "09:30"), _slot("2026-10-20", "14:00")]
+
+        result = compact_slots(slots, 30)
+
+        assert result == {
+            "slot_minutes": 30,
+            "days": {"Mon 2026-10-19": "09:00-09:30", "Tue 2026-10-20": "14:00"},
+            "total_available": 3,
+            "doctor": "Dr. Smith",
+        }
+
+    def test_splits_days_by_doctor_when_several(self):
+        slots = [_slot("2026-10-19", "09:00", "Dr. Smith"), _slot("2026-10-19", "09:00", "Dr. Lee")]
+
+        result = compact_slots(slots, 30)
+
+        assert result["days"] == {"Mon 2026-10-19": {"Dr. Smith": "09:00", "Dr. Lee": "09:00"}}
+        assert "doctor" not in result
+
+    def test_no_slots(self):
+        assert compact_slots([], 30) == {"slot_minutes": 30, "days": {}, "total_available": 0}
+
+    def test_steps_by_each_doctors_slot_length(self, two_doctors):
+        slots = [
+            _slot("2026-10-19", "09:00", "Dr. Smith"), _slot("2026-10-19", "09:30", "Dr. Smith"),
+            _slot("2026-10-19", "08:00", "Dr. Lee"), _slot("2026-10-19", "08:20", "Dr. Lee"),
+        ]
+
+        result = compact_slots(slots)
+
+        assert result["slot_minutes"] == {"Dr. Smith": 30, "Dr. Lee": 20}
+        assert result["days"] == {"Mon 2026-10-19": {"Dr. Smith": "09:00-09:30", "Dr. Lee": "08:00-08:20"}}
+
+
+class TestProjection:
+
+    def test_project_appointment_keeps_needed_columns(self):
+        row = {
+            "id": "abc", "patient_name": "John", "phone_number": "+1555", "appointment_date": "2026-10-19",
+            "appointment_time": "09:00:00", "doctor_name": "Dr. Smith", "reason": None, "status": "scheduled",
+            "created_at": "2026-10-01T00:00:00Z", "updated_at": "2026-10-01T00:00:00Z", "duration_minutes": 30,
+        }
+
+        assert project_appointment(row) == {
+            "id": "abc", "appointment_date": "2026-10-19", "appointment_time": "09:00", "doctor_name": "Dr. Smith",
+        }
+
+    def test_write_result_projects_affected_row(self):
+        result = {"success": True, "cancelled": {"id": "abc", "status": "cancelled", "created_at": "x"}}
+        assert shape_write_result("cancel_appointment", result) == {"success": True, "cancelled": {"id": "abc"}}
+
+    def test_write_error_passes_through(self):
+        result = {"success": False, "error": "Slot is already booked."}
+        assert shape_write_result("book_appointment", result) == result
+
+
+class TestBudget:
+
+    def test_drops_trailing_days_to_fit(self):
+        result = {"days": {f"day{i}": "09:00-16:30" for i in range(20)}, "total_available": 320}
+
+        fitted = fit_to_budget(result, "days", 60)
+
+        assert estimate_tokens(json.dumps(fitted, separators=(",", ":"))) <= 60
+        assert list(fitted["days"])[0] == "day0"
+        assert fitted["omitted"] == 20 - len(fitted["days"])
+
+    def test_under_budget_is_untouched(self):
+        result = {"appointments": [{"id": "a"}], "count": 1}
+        assert fit_to_budget(dict(result), "appointments", 100) == result
+
+    def test_keeps_at_least_one_entry(self):
+        result = fit_to_budget({"appointments": [{"id": "x" * 400}, {"id": "y"}]}, "appointments", 10)
+        assert len(result["appointments"]) == 1
+
+
+class TestTokenAccounting:
+
+    def test_shaped_slots_are_smaller_than_raw(self):
+        slots = [_slot("2026-10-19", f"{9 + i // 2:02d}:{(i % 2) * 30:02d}") for i in range(16)]
+
+        shape_slots(slots)
+
+        tokens = telemetry.result_tokens()["fetch_slots"]
+        assert tokens["calls"] == 1
+        assert tokens["shaped"] < tokens["raw"] / 4
+
+    def test_shape_appointments_counts_tokens(self):
+        shape_appointments([{"id": "a", "appointment_date": "2026-10-19", "appointment_time": "09:00:00",
+                             "created_at": "2026-10-01T00:00:00Z"}])
+
+        tokens = telemetry.result_tokens()["retrieve_appointments"]
+        assert tokens["shaped"] < tokens["raw"]
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import pytest
+from datetime import date
+from tools.schedules import DoctorSchedule, parse_schedule, load_schedules, select_schedules, slot_minutes
+
+
+class TestParseSchedule:
+
+    def test_breaks_split_working_hours(self):
+        schedule = parse_schedule({
+            "name": "Dr. Lee", "slot_duration": 30,
+            "hours": {"mon": ["09:00-13:00"]}, "breaks": ["11:00-11:45"],
+        })
+        assert schedule.weekly_hours[0] == ((9 * 60, 11 * 60), (11 * 60 + 45, 13 * 60))
+        assert schedule.weekly_hours[1] == ()
+
+    def test_slots_restart_after_break_and_never_overrun(self):
+        schedule = parse_schedule({
+            "name": "Dr. Lee", "slot_duration": 30,
+            "hours": {"mon": ["09:00-13:00"]}, "breaks": ["11:00-11:45"],
+        })
+        times = [f"{m // 60:02d}:{m % 60:02d}" for m in schedule.slot_starts(0)]
+        assert times == ["09:00", "09:30", "10:00", "10:30", "11:45", "12:15"]
+
+    def test_shared_and_own_holidays(self):
+        schedule = parse_schedule({"name": "Dr. Lee", "holidays": ["2026-12-24"]}, frozenset({date(2026, 12, 25)}))
+        assert schedule.holidays == {date(2026, 12, 24), date(2026, 12, 25)}
+
+    def test_unknown_weekday_rejected(self):
+        with pytest.raises(ValueError, match="monday"):
+            parse_schedule({"name": "Dr. Lee", "hours": {"monday": ["09:00-17:00"]}})
+
+    def test_weekdays_helper(self):
+        schedule = DoctorSchedule.weekdays("Dr. Smith", 9, 17, 30)
+        assert len(schedule.slot_starts(0)) == 16
+        assert schedule.slot_starts(5) == []
+
+    def test_offers_respects_hours_breaks_and_holidays(self):
+        schedule = parse_schedule({
+            "name": "Dr. Lee", "slot_duration": 30, "holidays": ["2026-02-16"],
+            "hours": {"mon": ["09:00-13:00"]}, "breaks": ["11:00-11:45"],
+        })
+        monday = date(2026, 2, 9)
+        assert schedule.offers(monday, 9 * 60)
+        assert not schedule.offers(monday, 9 * 60 + 15)   # Not a slot boundary
+        assert not schedule.offers(monday, 11 * 60)       # Break
+        assert not schedule.offers(monday, 3 * 60)        # Night
+        assert not schedule.offers(date(2026, 2, 10), 9 * 60)  # Not a working day
+        assert not schedule.offers(date(2026, 2, 16), 9 * 60)  # Holiday
+
+
+class TestLoadSchedules:
+
+    def test_example_file(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "doctors.example.json")
+        schedules = load_schedules(path)
+        assert [s.name for s in schedules] == ["Dr. Smith", "Dr. Lee"]
+        assert all(date(2026, 12, 25) in s.holidays for s in schedules)
+
+    def test_empty_doctor_list_rejected(self, tmp_path):
+        path = tmp_path / "doctors.json"
+        path.write_text(json.dumps({"doctors": []}))
+        with pytest.raises(ValueError, match="No doctors"):
+            load_schedules(str(path))
+
+
+class TestSelectSchedules:
+
+    def test_all_by_default(self, two_doctors):
+        assert select_schedules() == list(two_doctors)
+
+    @pytest.mark.parametrize("name", ["Dr. Lee", "dr lee", "Lee", "Dr.Lee"])
+    def test_matches_doctor_name_loosely(self, two_doctors, name):
+        assert [s.name for s in select_schedules(name)] == ["Dr. Lee"]
+
+    def test_by_clinic(self, two_doctors):
+        assert [s.name for s in select_schedules(clinic="northside")] == ["Dr. Lee"]
+
+    def test_unknown_doctor_lists_choices(self, two_doctors):
+        with pytest.raises(ValueError, match="Doctors: Dr. Smith, Dr. Lee"):
+            select_schedules("Dr. Who")
+
+    def test_unknown_clinic_lists_choices(self, two_doctors):
+        with pytest.raises(ValueError, match="Clinics: Main, Northside"):
+            select_schedules(clinic="Uptown")
+
+    def test_slot_minutes(self, two_doctors):
+        assert slot_minutes("Dr. Lee") == 20
+        assert slot_minutes("Dr. Who") == 30
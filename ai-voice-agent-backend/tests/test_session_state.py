@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from session_state import SessionState
+
+
+def _appointment(id: str, day: str, time: str = "09:00", phone: str = "+123") -> dict:
+    return {"id": id, "phone_number": phone, "patient_name": "John",
+            "appointment_date": day, "appointment_time": time}
+
+
+class TestSessionState:
+
+    def test_cached_appointments_only_for_identified_caller(self):
+        state = SessionState(caller={"found": True, "name": "John", "phone": "+123"})
+        state.set_appointments("+123", [_appointment("1", "2026-02-10")])
+        assert state.cached_appointments("+123") == [_appointment("1", "2026-02-10")]
+        assert state.cached_appointments("+999") is None
+
+    def test_set_appointments_ignores_other_callers(self):
+        state = SessionState(caller={"found": True, "name": "John", "phone": "+123"})
+        state.set_appointments("+999", [_appointment("1", "2026-02-10")])
+        assert state.appointments is None
+
+    def test_record_booking_keeps_list_sorted(self):
+        state = SessionState(caller={"found": True, "name": "John", "phone": "+123"},
+                             appointments=[_appointment("1", "2026-02-12")])
+        state.record_booking(_appointment("2", "2026-02-10"))
+        assert [a["id"] for a in state.appointments] == ["2", "1"]
+
+    def test_record_booking_identifies_new_caller(self):
+        state = SessionState(caller={"found": False, "phone": "+123"}, appointments=[])
+        state.record_booking(_appointment("1", "2026-02-10"))
+        assert state.caller == {"found": True, "name": "John", "phone": "+123"}
+        assert len(state.appointments) == 1
+
+    def test_record_cancellation_removes_appointment(self):
+        state = SessionState(appointments=[_appointment("1", "2026-02-10"), _appointment("2", "2026-02-11")])
+        state.record_cancellation("1")
+        assert [a["id"] for a in state.appointments] == ["2"]
+
+    def test_record_update_replaces_and_resorts(self):
+        state = SessionState(appointments=[_appointment("1", "2026-02-10"), _appointment("2", "2026-02-11")])
+        state.record_update(_appointment("1", "2026-02-12"))
+        assert [(a["id"], a["appointment_date"]) for a in state.appointments] == [
+            ("2", "2026-02-11"), ("1", "2026-02-12"),
+        ]
+
+    def test_updates_are_noops_before_appointments_load(self):
+        state = SessionState()
+        state.record_cancellation("1")
+        state.record_update(_appointment("1", "2026-02-12"))
+        assert state.appointments is None
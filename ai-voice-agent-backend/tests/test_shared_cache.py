@@ -0,0 +1,266 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import time
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from tools.availability_index import AvailabilityIndex
+from tools.cache_server import serve
+from tools.shared_cache import SharedCache, InMemorySharedCache, RespSharedCache, create_shared_cache
+
+TODAY = date(2026, 2, 9)  # Monday: the default horizon is 2026-02-09 .. 2026-02-13
+
+
+@pytest.fixture(autouse=True)
+def fixed_today():
+    with patch("tools.availability_index.clinic_today", return_value=TODAY):
+        yield
+
+
+@pytest.fixture
+async def server_url():
+    server = await serve()
+    port = server.sockets[0].getsockname()[1]
+    yield f"redis://127.0.0.1:{port}"
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+async def stalled_port():
+    """A server that accepts connections but never reads or replies."""
+    connections = []
+
+    async def hang(reader, writer):
+        connections.append(writer)
+        await asyncio.Event().wait()
+
+    server = await asyncio.start_server(hang, "127.0.0.1", 0)
+    yield server.sockets[0].getsockname()[1]
+    for writer in connections:
+        writer.close()
+    server.close()
+
+
+def _row(appointment_id: str, day: str, time: str) -> dict:
+    return {"id": appointment_id, "appointment_date": day, "appointment_time": time,
+            "duration_minutes": 30, "doctor_name": "Dr. Smith"}
+
+
+async def _settle():
+    """Let published messages reach the subscribers' sockets."""
+    for _ in range(20):
+        await asyncio.sleep(0.005)
+
+
+class TestCreateSharedCache:
+
+    def test_unset_means_no_cache(self):
+        assert create_shared_cache(None) is None
+        assert create_shared_cache("") is None
+
+    def test_schemes(self):
+        assert isinstance(create_shared_cache("memory://"), InMemorySharedCache)
+        assert isinstance(create_shared_cache("redis://:secret@cache:6380"), RespSharedCache)
+
+    def test_unknown_scheme(self):
+        with pytest.raises(ValueError, match="memcached"):
+            create_shared_cache("memcached://cache")
+
+    def test_incomplete_backend_fails_at_construction(self):
+        class WriteOnlyCache(SharedCache):
+            async def set_many(self, items, ttl):
+                pass
+
+        with pytest.raises(TypeError, match="mget"):
+            WriteOnlyCache()
+
+
+class TestInMemorySharedCache:
+
+    @pytest.mark.asyncio
+    async def test_set_get_delete_and_expiry(self):
+        cache = InMemorySharedCache()
+        await cache.set_many({"a": "1", "b": "2"}, ttl=60)
+        await cache.set_many({"c": "3"}, ttl=0)
+        assert await cache.mget(["a", "b", "c", "d"]) == ["1", "2", None, None]
+        await cache.delete(["a"])
+        assert await cache.mget(["a", "b"]) == [None, "2"]
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_subscribers(self):
+        cache = InMemorySharedCache()
+        received = []
+        await cache.subscribe("changes", received.append)
+        await cache.publish("changes", "hello")
+        await cache.publish("other", "ignored")
+        assert received == ["hello"]
+
+
+class TestRespSharedCache:
+
+    @pytest.mark.asyncio
+    async def test_commands_against_stand_in_server(self, server_url):
+        cache = RespSharedCache.from_url(server_url)
+        await cache.set_many({"a": "1", "b": "two words"}, ttl=60)
+        assert await cache.mget(["a", "b", "missing"]) == ["1", "two words", None]
+        await cache.delete(["a"])
+        assert await cache.mget(["a"]) == [None]
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_pub_sub_between_clients(self, server_url):
+        publisher, subscriber = RespSharedCache.from_url(server_url), RespSharedCache.from_url(server_url)
+        received = []
+        await subscriber.subscribe("changes", received.append)
+        await publisher.publish("changes", '{"dates": ["2026-02-10"]}')
+        await _settle()
+        assert received == ['{"dates": ["2026-02-10"]}']
+        await publisher.close()
+        await subscriber.close()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_server_raises(self, unused_tcp_port):
+        cache = RespSharedCache("127.0.0.1", unused_tcp_port)
+        with pytest.raises(OSError):
+            await cache.mget(["a"])
+
+    @pytest.mark.asyncio
+    async def test_stalled_server_times_out(self, stalled_port):
+        """Neither a missing reply nor a write the server never reads hangs the caller."""
+        cache = RespSharedCache("127.0.0.1", stalled_port, timeout=0.1)
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.mget(["a"]), 2)
+        with pytest.raises(asyncio.TimeoutError):
+            # Far more than the socket buffers hold, so the drain waits on the server
+            await asyncio.wait_for(cache.set_many({"big": "x" * (64 << 20)}, ttl=60), 2)
+        assert time.monotonic() - started < 1
+        await cache.close()
+
+
+class TestSharedAvailability:
+
+    @pytest.mark.asyncio
+    async def test_second_worker_reads_from_cache(self):
+        cache = InMemorySharedCache()
+        loader = AsyncMock(return_value=[_row("a", "2026-02-10", "09:00:00")])
+        first, second = AvailabilityIndex(cache=cache), AvailabilityIndex(cache=cache)
+
+        await first.ensure_fresh(loader)
+        await second.ensure_fresh(loader)
+
+        assert loader.await_count == 1
+        assert loader.await_args.args == ("2026-02-09", "2026-02-13")
+        assert second.is_booked("Dr. Smith", "2026-02-10", "09:00")
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_other_workers_and_only_reloads_that_day(self):
+        cache = InMemorySharedCache()
+        loader = AsyncMock(return_value=[])
+        writer, reader = AvailabilityIndex(cache=cache), AvailabilityIndex(cache=cache)
+        await writer.ensure_fresh(loader)
+        await reader.ensure_fresh(loader)
+
+        writer.record_booking(_row("a", "2026-02-11", "10:00:00"))
+        await writer.announce(["2026-02-11"])
+
+        assert not writer.is_stale()
+        assert reader.is_stale()
+        loader.return_value = [_row("a", "2026-02-11", "10:00:00")]
+        await reader.ensure_fresh(loader)
+        assert loader.await_args.args == ("2026-02-11", "2026-02-11")
+        assert reader.is_booked("Dr. Smith", "2026-02-11", "10:00")
+
+    @pytest.mark.asyncio
+    async def test_unknown_date_announces_every_day(self):
+        cache = InMemorySharedCache()
+        index = AvailabilityIndex(cache=cache)
+        await index.ensure_fresh(AsyncMock(return_value=[]))
+        await index.announce([None])
+        assert await cache.mget(["availability:day:2026-02-09", "availability:day:2026-02-13"]) == [None, None]
+
+    @pytest.mark.asyncio
+    async def test_cross_process_invalidation_over_stand_in_server(self, server_url):
+        caches = [RespSharedCache.from_url(server_url), RespSharedCache.from_url(server_url)]
+        writer, reader = AvailabilityIndex(cache=caches[0]), AvailabilityIndex(cache=caches[1])
+        loader = AsyncMock(return_value=[])
+        await writer.ensure_fresh(loader)
+        await reader.ensure_fresh(loader)
+        assert loader.await_count == 1
+
+        writer.record_booking(_row("a", "2026-02-12", "14:00:00"))
+        await writer.announce(["2026-02-12"])
+        await _settle()
+
+        assert reader.is_stale()
+        loader.return_value = [_row("a", "2026-02-12", "14:00:00")]
+        await reader.ensure_fresh(loader)
+        assert reader.is_booked("Dr. Smith", "2026-02-12", "14:00")
+        for cache in caches:
+            await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_outage_falls_back_to_database(self, unused_tcp_port):
+        """Without the cache the index behaves as if none were configured: database load, TTL reloads."""
+        cache = RespSharedCache("127.0.0.1", unused_tcp_port, retry_delay=60)
+        index = AvailabilityIndex(cache=cache)
+        loader = AsyncMock(return_value=[_row("a", "2026-02-10", "09:00:00")])
+
+        await index.ensure_fresh(loader)
+        await index.announce(["2026-02-10"])
+
+        assert loader.await_args.args == ("2026-02-09",)
+        assert index.is_booked("Dr. Smith", "2026-02-10", "09:00")
+        assert not index.is_stale()
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_lost_subscription_invalidates(self):
+        index = AvailabilityIndex(cache=InMemorySharedCache())
+        await index.ensure_fresh(AsyncMock(return_value=[]))
+        index._on_change(None)
+        assert index.is_stale()
+
+
+class TestWritesAnnounceChanges:
+
+    @pytest.mark.asyncio
+    async def test_book_cancel_and_modify_publish_their_days(self, monkeypatch):
+        import json
+        from benchmarks.fake_backend import InMemorySupabase
+        from tools import appointment_tools, availability_index
+        cache = InMemorySharedCache()
+        monkeypatch.setattr(availability_index, "_index", AvailabilityIndex(cache=cache))
+        published = []
+        await cache.subscribe("availability:changes", lambda m: published.append(json.loads(m)["dates"]))
+
+        with patch("db.supabase_store.get_supabase", return_value=InMemorySupabase()):
+            booked = await appointment_tools.book_appointment("+15550000001", "Ann", "2026-02-10", "09:00")
+            appointment_id = booked["appointment"]["id"]
+            await appointment_tools.modify_appointment(appointment_id, new_date="2026-02-12")
+            await appointment_tools.cancel_appointment(appointment_id)
+
+        assert published == [["2026-02-10"], ["2026-02-10", "2026-02-12"], ["2026-02-12"]]
+
+    @pytest.mark.asyncio
+    async def test_modify_on_worker_without_the_booking_announces_every_day(self, monkeypatch):
+        import json
+        from benchmarks.fake_backend import InMemorySupabase
+        from tools import appointment_tools, availability_index
+        cache = InMemorySharedCache()
+        published = []
+        await cache.subscribe("availability:changes", lambda m: published.append(json.loads(m)["dates"]))
+
+        with patch("db.supabase_store.get_supabase", return_value=InMemorySupabase()):
+            monkeypatch.setattr(availability_index, "_index", AvailabilityIndex(cache=cache))
+            booked = await appointment_tools.book_appointment("+15550000001", "Ann", "2026-02-10", "09:00")
+            # A freshly started worker whose index has never loaded the booking
+            monkeypatch.setattr(availability_index, "_index", AvailabilityIndex(cache=cache))
+            result = await appointment_tools.modify_appointment(booked["appointment"]["id"], new_date="2026-02-12", new_time="10:00")
+
+        assert result["success"] is True
+        assert published[-1] == ["2026-02-09", "2026-02-10", "2026-02-11", "2026-02-12", "2026-02-13"]
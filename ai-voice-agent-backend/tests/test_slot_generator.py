@@ -3,7 +3,12 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from datetime import date
-from tools.slot_generator import generate_all_slots
+from unittest.mock import patch
+from tools import slot_generator
+from tools.slot_generator import (
+    generate_all_slots, get_slot_calendar, get_calendars, build_slot_calendar, build_doctor_calendar, horizon_end,
+)
+from tools.schedules import parse_schedule
 
 
 class TestSlotGenerator:
@@ -93,3 +98,93 @@ class TestSlotGenerator:
             assert len(slot["date"]) == 10
             # Time format: HH:MM
             assert len(slot["time"]) == 5
+
+
+class TestSlotCalendar:
+    """Tests for the memoized, array-backed slot calendar."""
+
+    def test_memoized_per_date(self):
+        """Repeated lookups for the same date should reuse one calendar."""
+        assert get_slot_calendar(date(2026, 2, 9)) is get_slot_calendar(date(2026, 2, 9))
+        assert get_slot_calendar(date(2026, 2, 9)) is not get_slot_calendar(date(2026, 2, 10))
+
+    def test_cache_cleared_when_day_changes(self):
+        """Calendars cached on a previous day should be rebuilt."""
+        first = get_slot_calendar(date(2026, 2, 9))
+        with patch.object(slot_generator, "_cache_day", date(2000, 1, 1)):
+            assert get_slot_calendar(date(2026, 2, 9)) is not first
+
+    def test_generate_all_slots_returns_fresh_dicts(self):
+        """Callers mutating the returned slots must not corrupt the cache."""
+        slots = generate_all_slots(date(2026, 2, 9), days_ahead=1)
+        slots[0]["time"] = "00:00"
+        assert generate_all_slots(date(2026, 2, 9), days_ahead=1)[0]["time"] == "09:00"
+
+    def test_indices_for_date(self):
+        calendar = get_slot_calendar(date(2026, 2, 9), days_ahead=2)
+        monday = calendar.indices_for_date("2026-02-09")
+        assert len(monday) == 16
+        assert calendar.key(monday[0]) == ("2026-02-09", "09:00")
+        assert calendar.key(monday[-1]) == ("2026-02-09", "16:30")
+        assert len(calendar.indices_for_date("2026-02-14")) == 0
+
+    def test_dates_skip_weekends(self):
+        calendar = get_slot_calendar(date(2026, 2, 13), days_ahead=2)
+        assert calendar.dates() == ["2026-02-13", "2026-02-16"]
+
+    def test_slot_materializes_dict(self):
+        calendar = get_slot_calendar(date(2026, 2, 9), days_ahead=1)
+        assert calendar.slot(1) == {"date": "2026-02-09", "time": "09:30", "doctor": "Dr. Smith"}
+
+    def test_uneven_duration_does_not_overrun_end_hour(self):
+        """45-minute slots from 9:00 should stop at 15:45 (16:30 would end at 17:15)."""
+        calendar = build_slot_calendar(date(2026, 2, 9), 1, 9, 17, 45, "Dr. Smith")
+        assert calendar.key(len(calendar) - 1) == ("2026-02-09", "15:45")
+
+
+class TestDoctorCalendars:
+    """Per-doctor calendars built from schedules."""
+
+    def test_holidays_and_weekend_hours(self):
+        schedule = parse_schedule({
+            "name": "Dr. Lee", "slot_duration": 60,
+            "hours": {"fri": ["09:00-11:00"], "sat": ["09:00-10:00"]},
+            "holidays": ["2026-02-13"],
+        })
+        # Thu 2026-02-12 to Mon 2026-02-16
+        calendar = build_doctor_calendar(schedule, date(2026, 2, 12), date(2026, 2, 17))
+        assert calendar.dates() == ["2026-02-14"]
+        assert calendar.slot(0) == {"date": "2026-02-14", "time": "09:00", "doctor": "Dr. Lee"}
+        assert calendar.slot_duration == 60
+
+    def test_has_slot(self):
+        calendar = get_slot_calendar(date(2026, 2, 9), days_ahead=1)
+        assert calendar.has_slot(date(2026, 2, 9), 9 * 60 + 30)
+        assert not calendar.has_slot(date(2026, 2, 9), 9 * 60 + 10)
+        assert not calendar.has_slot(date(2026, 2, 10), 9 * 60)
+
+    def test_horizon_counts_business_days(self):
+        assert horizon_end(date(2026, 2, 13), 2) == date(2026, 2, 17)  # Fri + Mon
+        assert horizon_end(date(2026, 2, 14), 1) == date(2026, 2, 17)  # Sat start -> Mon only
+
+    def test_one_calendar_per_doctor_sharing_the_horizon(self, two_doctors):
+        smith, lee = get_calendars(date(2026, 2, 13), days_ahead=2)
+        assert (smith.doctor, lee.doctor) == ("Dr. Smith", "Dr. Lee")
+        # Dr. Lee also works the Saturday inside the Fri-Mon horizon
+        assert lee.dates() == ["2026-02-13", "2026-02-14", "2026-02-16"]
+        assert smith.dates() == ["2026-02-13", "2026-02-16"]
+
+    def test_filter_by_doctor_or_clinic(self, two_doctors):
+        assert [c.doctor for c in get_calendars(date(2026, 2, 9), doctor="lee")] == ["Dr. Lee"]
+        assert [c.doctor for c in get_calendars(date(2026, 2, 9), clinic="Main")] == ["Dr. Smith"]
+
+    def test_calendars_memoized_per_doctor(self, two_doctors):
+        first = get_calendars(date(2026, 2, 9), days_ahead=40)
+        again = get_calendars(date(2026, 2, 9), days_ahead=40)
+        assert all(a is b for a, b in zip(first, again))
+
+    def test_generate_all_slots_merges_doctors_by_time(self, two_doctors):
+        slots = generate_all_slots(date(2026, 2, 9), days_ahead=1)
+        assert slots[0] == {"date": "2026-02-09", "time": "08:00", "doctor": "Dr. Lee"}
+        assert len(slots) == 16 + 12
+        assert [(s["date"], s["time"]) for s in slots] == sorted((s["date"], s["time"]) for s in slots)
@@ -0,0 +1,121 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from datetime import date, datetime
+from tools.slot_generator import build_slot_calendar
+from tools.slot_query import SlotQuery, find_free_slots, nearest_free_slots
+
+
+def _calendar():
+    """Mon 2026-02-09 to Fri 2026-02-13 plus Mon 2026-02-16, 09:00-16:30 every 30 minutes."""
+    return build_slot_calendar(date(2026, 2, 9), 6, 9, 17, 30, "Dr. Smith")
+
+
+def _free_except(*booked):
+    return lambda calendar, i: calendar.key(i) not in booked
+
+
+def _keys(calendar, indices):
+    return [calendar.key(i) for i in indices]
+
+
+class TestSlotQueryParse:
+
+    def test_lone_start_date_means_that_day(self):
+        query = SlotQuery.parse("2026-02-10")
+        assert query.start_date == query.end_date == date(2026, 2, 10)
+
+    def test_times_and_after(self):
+        query = SlotQuery.parse(earliest_time="13:00", latest_time="15:30:00", after="2026-02-10 14:00")
+        assert (query.earliest_minute, query.latest_minute) == (13 * 60, 15 * 60 + 30)
+        assert query.after == datetime(2026, 2, 10, 14, 0)
+
+    def test_zero_limit_means_no_limit(self):
+        assert SlotQuery.parse(limit=0).limit is None
+
+    @pytest.mark.parametrize("kwargs, message", [
+        ({"start_date": "next week"}, "YYYY-MM-DD"),
+        ({"earliest_time": "afternoon"}, "HH:MM"),
+        ({"after": "tomorrow"}, "YYYY-MM-DD HH:MM"),
+        ({"start_date": "2026-02-12", "end_date": "2026-02-10"}, "before start date"),
+    ])
+    def test_invalid_input(self, kwargs, message):
+        with pytest.raises(ValueError, match=message):
+            SlotQuery.parse(**kwargs)
+
+
+class TestPosition:
+
+    def test_exact_and_between_slots(self):
+        calendar = _calendar()
+        assert calendar.key(calendar.position(date(2026, 2, 10), 9 * 60)) == ("2026-02-10", "09:00")
+        assert calendar.key(calendar.position(date(2026, 2, 10), 9 * 60 + 10)) == ("2026-02-10", "09:30")
+
+    def test_after_last_slot_of_day_rolls_to_next_day(self):
+        calendar = _calendar()
+        assert calendar.key(calendar.position(date(2026, 2, 13), 17 * 60)) == ("2026-02-16", "09:00")
+
+    def test_weekend_and_out_of_range(self):
+        calendar = _calendar()
+        assert calendar.key(calendar.position(date(2026, 2, 14))) == ("2026-02-16", "09:00")
+        assert calendar.position(date(2026, 2, 1)) == 0
+        assert calendar.position(date(2026, 3, 1)) == len(calendar)
+
+
+class TestFindFreeSlots:
+
+    def test_no_bounds_returns_everything_free(self):
+        calendar = _calendar()
+        found = find_free_slots(calendar, _free_except(("2026-02-09", "09:00")), SlotQuery())
+        assert len(found) == len(calendar) - 1
+
+    def test_date_range(self):
+        calendar = _calendar()
+        found = find_free_slots(calendar, _free_except(), SlotQuery.parse("2026-02-12", "2026-02-16"))
+        assert {calendar.key(i)[0] for i in found} == {"2026-02-12", "2026-02-13", "2026-02-16"}
+
+    def test_time_window_on_every_day(self):
+        calendar = _calendar()
+        query = SlotQuery.parse(earliest_time="16:00", latest_time="16:30")
+        assert len(find_free_slots(calendar, _free_except(), query)) == 6 * 2
+
+    def test_first_n_after_skips_booked(self):
+        calendar = _calendar()
+        is_free = _free_except(("2026-02-13", "16:30"), ("2026-02-16", "09:00"))
+        query = SlotQuery.parse(after="2026-02-13 16:00", limit=2)
+        assert _keys(calendar, find_free_slots(calendar, is_free, query)) == [
+            ("2026-02-16", "09:30"), ("2026-02-16", "10:00"),
+        ]
+
+    def test_after_combined_with_window(self):
+        calendar = _calendar()
+        query = SlotQuery.parse(earliest_time="09:00", latest_time="09:30", after="2026-02-10 09:00", limit=3)
+        assert _keys(calendar, find_free_slots(calendar, _free_except(), query)) == [
+            ("2026-02-10", "09:30"), ("2026-02-11", "09:00"), ("2026-02-11", "09:30"),
+        ]
+
+
+class TestNearestFreeSlots:
+
+    def test_closest_first_in_both_directions(self):
+        calendar = _calendar()
+        is_free = _free_except(("2026-02-10", "12:00"), ("2026-02-10", "12:30"))
+        found = nearest_free_slots(calendar, is_free, date(2026, 2, 10), 12 * 60 + 30)
+        # Ties go to the earlier slot
+        assert _keys(calendar, found) == [
+            ("2026-02-10", "13:00"), ("2026-02-10", "11:30"), ("2026-02-10", "13:30"),
+        ]
+
+    def test_crosses_into_next_day(self):
+        calendar = _calendar()
+        is_free = lambda calendar, i: calendar.key(i)[0] != "2026-02-09"  # noqa: E731
+        found = nearest_free_slots(calendar, is_free, date(2026, 2, 9), 16 * 60 + 30, count=1)
+        assert _keys(calendar, found) == [("2026-02-10", "09:00")]
+
+    def test_fewer_than_count_when_calendar_is_full(self):
+        calendar = _calendar()
+        is_free = _free_except(*[calendar.key(i) for i in range(1, len(calendar))])
+        found = nearest_free_slots(calendar, is_free, date(2026, 2, 16), 16 * 60)
+        assert _keys(calendar, found) == [("2026-02-09", "09:00")]
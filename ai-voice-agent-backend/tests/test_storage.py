@@ -0,0 +1,154 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import sqlite3
+import pytest
+from unittest.mock import patch
+from benchmarks.fake_backend import InMemorySupabase
+from db.storage import AppointmentStore, SlotConflict, InvalidRequest, create_store
+from db.sqlite_store import SQLiteStore
+from db.supabase_store import SupabaseStore
+
+
+@pytest.fixture(params=["sqlite", "supabase"])
+def store(request):
+    """Every store must pass the same contract; Supabase runs against the in-memory fake."""
+    if request.param == "sqlite":
+        store = SQLiteStore()
+        yield store
+        store.close()
+    else:
+        with patch("db.supabase_store.get_supabase", return_value=InMemorySupabase()):
+            yield SupabaseStore()
+
+
+def _appointment(time: str = "09:00", day: str = "2026-02-10", doctor: str = "Dr. Smith", **extra) -> dict:
+    return {"phone_number": "+15550000001", "patient_name": "Ann", "appointment_date": day,
+            "appointment_time": time, "doctor_name": doctor, "duration_minutes": 30, **extra}
+
+
+class TestStoreContract:
+
+    @pytest.mark.asyncio
+    async def test_reserve_returns_stored_row(self, store):
+        row = await store.reserve(_appointment("09:00"))
+        assert row["id"]
+        assert row["status"] == "scheduled"
+        assert row["appointment_time"] == "09:00:00"
+
+    @pytest.mark.asyncio
+    async def test_same_slot_conflicts(self, store):
+        await store.reserve(_appointment("09:00"))
+        with pytest.raises(SlotConflict):
+            await store.reserve(_appointment("09:00", phone_number="+15550000002"))
+
+    @pytest.mark.asyncio
+    async def test_overlapping_range_conflicts_adjacent_does_not(self, store):
+        await store.reserve(_appointment("09:00", duration_minutes=60))
+        with pytest.raises(SlotConflict):
+            await store.reserve(_appointment("09:30"))
+        await store.reserve(_appointment("10:00"))
+        await store.reserve(_appointment("09:30", doctor="Dr. Lee"))
+
+    @pytest.mark.asyncio
+    async def test_cancel_frees_slot_once(self, store):
+        row = await store.reserve(_appointment("09:00"))
+        cancelled = await store.cancel(row["id"])
+        assert cancelled["status"] == "cancelled"
+        assert await store.cancel(row["id"]) is None
+        await store.reserve(_appointment("09:00"))
+
+    @pytest.mark.asyncio
+    async def test_reschedule(self, store):
+        first = await store.reserve(_appointment("09:00"))
+        await store.reserve(_appointment("10:00"))
+
+        moved = await store.reschedule(first["id"], {"appointment_time": "09:15"})
+        assert moved["appointment_time"] == "09:15:00"
+        with pytest.raises(SlotConflict):
+            await store.reschedule(first["id"], {"appointment_time": "09:45"})
+
+        await store.cancel(first["id"])
+        assert await store.reschedule(first["id"], {"appointment_time": "11:00"}) is None
+
+    @pytest.mark.asyncio
+    async def test_booking_upserts_patient(self, store):
+        assert await store.find_patient("+15550000001") is None
+        await store.reserve(_appointment("09:00"))
+        await store.reserve(_appointment("10:00", patient_name="Ann Renamed"))
+        patient = await store.find_patient("+15550000001")
+        assert patient == {"patient_name": "Ann Renamed", "phone_number": "+15550000001"}
+
+    @pytest.mark.asyncio
+    async def test_scheduled_between_and_appointments_for(self, store):
+        await store.reserve(_appointment("10:00", day="2026-02-11"))
+        await store.reserve(_appointment("09:00", day="2026-02-10"))
+        late = await store.reserve(_appointment("09:00", day="2026-02-13"))
+        cancelled = await store.reserve(_appointment("11:00", day="2026-02-10"))
+        await store.cancel(cancelled["id"])
+
+        booked = await store.scheduled_between("2026-02-10", "2026-02-12")
+        assert sorted((r["appointment_date"], r["appointment_time"]) for r in booked) == [
+            ("2026-02-10", "09:00:00"), ("2026-02-11", "10:00:00"),
+        ]
+        assert len(await store.scheduled_between("2026-02-11")) == 2
+
+        mine = await store.appointments_for("+15550000001")
+        assert [r["appointment_date"] for r in mine] == ["2026-02-10", "2026-02-11", "2026-02-13"]
+        assert mine[-1]["id"] == late["id"]
+
+
+class TestSQLiteStore:
+
+    @pytest.mark.asyncio
+    async def test_file_database_is_shared_between_connections(self, tmp_path):
+        """Two processes pointing at one file see each other's bookings and conflicts."""
+        path = str(tmp_path / "appointments.db")
+        first, second = SQLiteStore(path), SQLiteStore(path)
+        await first.reserve(_appointment("09:00"))
+        with pytest.raises(SlotConflict):
+            await second.reserve(_appointment("09:00"))
+        first.close()
+        second.close()
+
+    @pytest.mark.asyncio
+    async def test_locked_file_does_not_block_the_event_loop(self, tmp_path):
+        """Waiting for another process's write lock happens off the event loop."""
+        path = str(tmp_path / "appointments.db")
+        store = SQLiteStore(path)
+        other_process = sqlite3.connect(path, isolation_level=None)
+        other_process.execute("BEGIN EXCLUSIVE")
+
+        booking = asyncio.create_task(store.reserve(_appointment("09:00")))
+        await asyncio.sleep(0.05)
+        assert not booking.done()  # Still waiting, while this coroutine kept running
+        other_process.execute("COMMIT")
+        assert (await booking)["appointment_time"] == "09:00:00"
+        other_process.close()
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_column_rejected(self):
+        with pytest.raises(InvalidRequest, match="colour"):
+            await SQLiteStore().reserve(_appointment(colour="blue"))
+
+
+class TestCreateStore:
+
+    def test_backends(self):
+        assert isinstance(create_store("sqlite"), SQLiteStore)
+        assert isinstance(create_store("supabase"), SupabaseStore)
+
+    def test_incomplete_backend_fails_at_construction(self):
+        class ReadOnlyStore(AppointmentStore):
+            async def find_patient(self, phone_number):
+                return None
+
+        with pytest.raises(TypeError, match="reserve"):
+            ReadOnlyStore()
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="postgres"):
+            create_store("postgres")
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import threading
+import time
+import pytest
+from tests.conftest import MockSupabaseResponse
+from db.supabase_client import run_query
+
+
+class _RecordingQuery:
+    """Query stub that records which thread executed it."""
+
+    def __init__(self, delay: float = 0.0):
+        self._delay = delay
+        self.thread = None
+
+    def execute(self):
+        self.thread = threading.current_thread()
+        time.sleep(self._delay)
+        return MockSupabaseResponse(data=[{"id": "abc"}])
+
+
+class TestRunQuery:
+
+    @pytest.mark.asyncio
+    async def test_returns_execute_response(self):
+        """Should return whatever the query's execute() returns."""
+        result = await run_query(_RecordingQuery())
+        assert result.data == [{"id": "abc"}]
+
+    @pytest.mark.asyncio
+    async def test_executes_off_the_event_loop_thread(self):
+        """Blocking execute() must not run on the event loop thread."""
+        query = _RecordingQuery()
+        await run_query(query)
+        assert query.thread is not threading.current_thread()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_overlap(self):
+        """Several slow queries should run in parallel, not one after another."""
+        started = time.perf_counter()
+        await asyncio.gather(*(run_query(_RecordingQuery(delay=0.1)) for _ in range(5)))
+        assert time.perf_counter() - started < 0.4
+
+    @pytest.mark.asyncio
+    async def test_propagates_errors(self):
+        """Exceptions raised by execute() should surface to the caller."""
+        class _Failing:
+            def execute(self):
+                raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await run_query(_Failing())
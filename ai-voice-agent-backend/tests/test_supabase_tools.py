@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from unittest.mock import patch
+from tests.conftest import MockSupabaseQuery
+from postgrest.exceptions import APIError
+from tools import appointment_tools
+
+
+class SequentialMockClient:
+    """Mock client that returns different responses for sequential table() calls."""
+
+    def __init__(self, responses: list[list]):
+        self._responses = responses
+        self._call_index = 0
+        self.tables: list[str] = []
+
+    def table(self, name: str):
+        self.tables.append(name)
+        if self._call_index < len(self._responses):
+            data = self._responses[self._call_index]
+            self._call_index += 1
+            return MockSupabaseQuery(data)
+        return MockSupabaseQuery([])
+
+
+def _api_error(code: str, message: str) -> APIError:
+    return APIError({"message": message, "code": code, "details": None, "hint": None})
+
+
+class TestSupabaseTools:
+    """The tools on the Supabase store: the tables they read and how PostgREST errors surface."""
+
+    @pytest.mark.asyncio
+    async def test_identify_reads_patients_table(self):
+        client = SequentialMockClient([[{"patient_name": "John Doe", "phone_number": "+15551234567"}]])
+        with patch("db.supabase_store.get_supabase", return_value=client):
+            result = await appointment_tools.identify_user_by_phone("(555) 123-4567")
+        assert client.tables == ["patients"]
+        assert result == {"found": True, "name": "John Doe", "phone": "+15551234567"}
+
+    @pytest.mark.asyncio
+    async def test_unique_violation_is_a_conflict(self):
+        """The unique slot index (23505) rejects a double booking or move."""
+        client = SequentialMockClient([
+            _api_error("23505", "duplicate key value violates unique constraint"),  # insert
+            [],  # alternatives: index load
+            _api_error("23505", "duplicate key value violates unique constraint"),  # update
+        ])
+        with patch("db.supabase_store.get_supabase", return_value=client):
+            booked = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "09:00")
+            moved = await appointment_tools.modify_appointment("abc-123", new_date="2026-02-11", new_time="10:00")
+        assert "already booked" in booked["error"]
+        assert "already booked" in moved["error"]
+
+    @pytest.mark.asyncio
+    async def test_rejected_input_is_an_error_result(self):
+        """A write the database refuses for its input is reported to the LLM, not raised."""
+        client = SequentialMockClient([_api_error("42501", "permission denied")])
+        with patch("db.supabase_store.get_supabase", return_value=client):
+            result = await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "09:00")
+        assert result["success"] is False
+        assert "permission denied" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_server_errors_propagate(self):
+        """Only input errors become results; database outages surface."""
+        client = SequentialMockClient([_api_error("08006", "connection failure")])
+        with patch("db.supabase_store.get_supabase", return_value=client):
+            with pytest.raises(APIError):
+                await appointment_tools.book_appointment("+1234567890", "John", "2026-02-10", "09:00")
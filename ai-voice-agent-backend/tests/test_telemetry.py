@@ -0,0 +1,182 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+import telemetry
+from telemetry import LatencyHistogram, span, traced, snapshot, detached_task, SPAN_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def fresh_histograms():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+class TestLatencyHistogram:
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(float(ms))
+        assert histogram.percentile(50) == 50
+        assert histogram.percentile(95) == 95
+        assert histogram.percentile(99) == 99
+
+    def test_summary(self):
+        histogram = LatencyHistogram()
+        histogram.observe(10.0)
+        histogram.observe(30.0)
+        summary = histogram.summary()
+        assert summary["count"] == 2
+        assert summary["mean_ms"] == 20.0
+        assert summary["p99_ms"] == 30.0
+
+    def test_keeps_only_recent_samples(self):
+        histogram = LatencyHistogram(max_samples=3)
+        for ms in (1000.0, 1.0, 2.0, 3.0):
+            histogram.observe(ms)
+        assert histogram.percentile(100) == 3.0
+        assert histogram.count == 4
+
+    def test_empty(self):
+        assert LatencyHistogram().summary()["p50_ms"] == 0.0
+
+
+class TestSpans:
+
+    def test_span_records_duration(self):
+        with span("work"):
+            pass
+        assert snapshot()["work"]["count"] == 1
+
+    def test_nested_span_attributed_to_root(self):
+        with span("tool.fetch_slots"):
+            with span("db.query"):
+                pass
+            with span("serialize"):
+                pass
+        names = set(snapshot())
+        assert {"tool.fetch_slots", "db.query", "serialize",
+                "tool.fetch_slots/db.query", "tool.fetch_slots/serialize"} <= names
+
+    def test_records_even_when_block_raises(self):
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError
+        assert snapshot()["failing"]["count"] == 1
+
+    def test_exports_prometheus_histogram(self):
+        before = SPAN_SECONDS.labels(span="exported")._sum.get()
+        with patch("telemetry.time.perf_counter", side_effect=[0.0, 0.25]):
+            with span("exported"):
+                pass
+        assert SPAN_SECONDS.labels(span="exported")._sum.get() - before == pytest.approx(0.25)
+
+    @pytest.mark.asyncio
+    async def test_traced_decorator(self):
+        @traced("slow_lookup")
+        async def slow_lookup(x):
+            await asyncio.sleep(0.01)
+            return x * 2
+
+        assert await slow_lookup(2) == 4
+        assert slow_lookup.__name__ == "slow_lookup"
+        assert snapshot()["slow_lookup"]["p50_ms"] >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_have_separate_roots(self):
+        async def tool(name):
+            with span(name):
+                await asyncio.sleep(0)
+                with span("db.query"):
+                    await asyncio.sleep(0)
+
+        await asyncio.gather(tool("tool.a"), tool("tool.b"))
+        assert snapshot()["tool.a/db.query"]["count"] == 1
+        assert snapshot()["tool.b/db.query"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_detached_task_is_not_attributed_to_the_span(self):
+        async def background():
+            with span("db.query"):
+                await asyncio.sleep(0)
+
+        with span("tool.a"):
+            task = detached_task(background())
+        await task
+        assert "tool.a/db.query" not in snapshot()
+        assert snapshot()["db.query"]["count"] == 1
+
+
+class TestToolInstrumentation:
+
+    @pytest.mark.asyncio
+    async def test_agent_tool_breakdown(self):
+        """A tool call should report total, data-access, serialization and publish spans."""
+        from agent_definition import AppointmentAgent
+        from session_state import SessionState
+
+        ctx = MagicMock()
+        ctx.userdata = SessionState()
+        ctx.session.room_io.room.local_participant.publish_data = AsyncMock()
+
+        with patch("agent_definition.appointment_tools.fetch_available_slots", new_callable=AsyncMock) as fetch:
+            fetch.return_value = []
+            await AppointmentAgent().fetch_slots(ctx)
+
+        names = set(snapshot())
+        assert {"tool.fetch_slots", "tool.fetch_slots/serialize", "tool.fetch_slots/publish"} <= names
+
+    @pytest.mark.asyncio
+    async def test_prefetches_are_not_counted_in_the_tool(self):
+        """Lookups identify_user starts in the background run after it returns."""
+        from agent_definition import AppointmentAgent
+        from session_state import SessionState
+
+        ctx = MagicMock()
+        ctx.userdata = SessionState()
+        ctx.session.room_io.room.local_participant.publish_data = AsyncMock()
+
+        @traced("appointment_tools.fetch_available_slots")
+        async def fetch(*args):
+            return []
+
+        with patch("agent_definition.appointment_tools.identify_user_by_phone", new_callable=AsyncMock) as identify, \
+                patch("agent_definition.appointment_tools.fetch_available_slots", side_effect=fetch):
+            identify.return_value = {"found": False, "phone": "+123"}
+            await AppointmentAgent().identify_user(ctx, phone_number="+123")
+            await asyncio.gather(*ctx.userdata.prefetched.values())
+
+        names = set(snapshot())
+        assert "appointment_tools.fetch_available_slots" in names
+        assert "tool.identify_user/appointment_tools.fetch_available_slots" not in names
+
+
+class TestLLMUsage:
+
+    def _metrics(self, prompt=1500, cached=0, creation=0, completion=40):
+        return MagicMock(prompt_tokens=prompt, prompt_cached_tokens=cached,
+                         cache_creation_tokens=creation, completion_tokens=completion)
+
+    def test_counts_hits_and_misses(self):
+        telemetry.record_llm_usage(self._metrics(cached=0, creation=1400))
+        telemetry.record_llm_usage(self._metrics(cached=1400))
+
+        usage = telemetry.llm_usage()
+        assert usage["requests"] == 2
+        assert usage["cache_hits"] == 1
+        assert usage["cached_tokens"] == 1400
+        assert usage["cache_creation_tokens"] == 1400
+        assert usage["cached_token_ratio"] == round(1400 / 3000, 3)
+
+    def test_exports_prometheus_counters(self):
+        before = telemetry.LLM_PROMPT_CACHE.labels(result="hit")._value.get()
+        telemetry.record_llm_usage(self._metrics(cached=100))
+        assert telemetry.LLM_PROMPT_CACHE.labels(result="hit")._value.get() == before + 1
+
+    def test_empty(self):
+        assert telemetry.llm_usage() == {"cached_token_ratio": 0.0}
@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from datetime import date
+from tools.transcript_entities import find_phone, find_date
+
+TODAY = date(2026, 10, 17)
+
+
+class TestFindPhone:
+
+    def test_spoken_number_is_normalized(self):
+        assert find_phone("my number is 555 123 4567", final=True) == "+15551234567"
+        assert find_phone("it's (555) 123-4567.") == "+15551234567"
+
+    def test_international_number(self):
+        assert find_phone("+44 20 7946 0958 thanks") == "+442079460958"
+
+    def test_interim_number_at_the_end_may_be_incomplete(self):
+        assert find_phone("my number is 555 123 4567") is None
+        assert find_phone("my number is 555 123 4567 please") == "+15551234567"
+
+    def test_too_few_digits(self):
+        assert find_phone("call me at 555 1234", final=True) is None
+
+    def test_last_number_wins(self):
+        assert find_phone("not 555 000 0000 but 555 123 4567", final=True) == "+15551234567"
+
+
+class TestFindDate:
+
+    def test_month_and_day(self):
+        assert find_date("how about October 20th please", TODAY) == "2026-10-20"
+        assert find_date("the 3rd of November", TODAY) == "2026-11-03"
+
+    def test_past_date_rolls_to_next_year(self):
+        assert find_date("March 3", TODAY, final=True) == "2027-03-03"
+
+    def test_interim_day_at_the_end_may_be_incomplete(self):
+        assert find_date("October 2", TODAY) is None
+        assert find_date("October 2", TODAY, final=True) == "2027-10-02"
+
+    def test_relative_and_iso_dates(self):
+        assert find_date("tomorrow at 3", TODAY) == "2026-10-18"
+        assert find_date("today", TODAY) == "2026-10-17"
+        assert find_date("2026-11-02 works", TODAY) == "2026-11-02"
+
+    def test_no_date(self):
+        assert find_date("may I book an appointment", TODAY) is None
+        assert find_date("February 30 works", TODAY) is None
+
+    def test_last_date_wins(self):
+        assert find_date("October 25 no wait tomorrow", TODAY) == "2026-10-18"
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from unittest.mock import patch
+from tools.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+
+    def test_get_and_set(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        assert cache.get("missing", "default") == "default"
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        with patch("tools.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("tools.ttl_cache.time.monotonic", return_value=109.0):
+            assert cache.get("a") == 1
+        with patch("tools.ttl_cache.time.monotonic", return_value=110.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        cache.clear()
+        assert len(cache) == 0
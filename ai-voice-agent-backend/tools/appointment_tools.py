@@ -1,180 +1,287 @@
-from datetime import date
-from db.supabase_client import get_supabase
-from tools.slot_generator import generate_all_slots
+from db.storage import SlotConflict, InvalidRequest, get_store
+from tools.slot_generator import get_calendars
+from tools.slot_query import SlotQuery, IsFree, search_free_slots, nearest_across
+from tools.schedules import DoctorSchedule, select_schedules
+from tools.availability_index import get_availability_index
+from tools.phone import normalize_phone
+from tools.clinic_time import clinic_today
+from tools.ttl_cache import TTLCache
+from config import PATIENT_CACHE_SIZE, PATIENT_CACHE_TTL_SECONDS
+from telemetry import traced
 
 
+# Caller lookups by E.164 phone; negative results are cached too and
+# overwritten when that caller books.
+_patient_cache = TTLCache(PATIENT_CACHE_SIZE, PATIENT_CACHE_TTL_SECONDS)
+
+
+@traced("appointment_tools.identify_user_by_phone")
 async def identify_user_by_phone(phone_number: str) -> dict:
-    """Look up a user by phone number from existing appointments."""
-    sb = get_supabase()
-    result = (
-        sb.table("appointments")
-        .select("patient_name, phone_number")
-        .eq("phone_number", phone_number)
-        .limit(1)
-        .execute()
-    )
-    if result.data:
-        return {
-            "found": True,
-            "name": result.data[0]["patient_name"],
-            "phone": phone_number,
-        }
-    return {"found": False, "phone": phone_number}
+    """Look up a patient by phone number (indexed point read, cached in-process)."""
+    phone = normalize_phone(phone_number)
+    cached = _patient_cache.get(phone)
+    if cached is not None:
+        return dict(cached)
+
+    patient = await get_store().find_patient(phone)
+    if patient:
+        found = {"found": True, "name": patient["patient_name"], "phone": phone}
+    else:
+        found = {"found": False, "phone": phone}
+    _patient_cache.set(phone, found)
+    return dict(found)
+
+
+async def _load_scheduled_appointments(from_date: str, to_date: str | None = None) -> list[dict]:
+    """Load every scheduled appointment from a date onwards (through `to_date` if given)
+    for the availability index."""
+    return await get_store().scheduled_between(from_date, to_date)
+
+
+def _is_free(index) -> IsFree:
+    # A slot is free if no booking overlaps its whole duration, not just its start time
+    return lambda calendar, i: not index.overlaps(calendar.doctor, *calendar.span(i))
+
+
+@traced("appointment_tools.fetch_available_slots")
+async def fetch_available_slots(
+    preferred_date: str | None = None,
+    end_date: str | None = None,
+    earliest_time: str | None = None,
+    latest_time: str | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+    doctor: str | None = None,
+    clinic: str | None = None,
+) -> list[dict]:
+    """Get available appointment slots, optionally narrowed to a date range, a time-of-day
+    window, slots after a given date-time, at most `limit` results, and one doctor or clinic.
+
+    `preferred_date` alone means that single day. Raises ValueError for malformed bounds
+    or an unknown doctor or clinic.
+    """
+    query = SlotQuery.parse(preferred_date, end_date, earliest_time, latest_time, after, limit)
+    calendars = get_calendars(clinic_today(), doctor=doctor, clinic=clinic)
+    index = get_availability_index()
+    await index.ensure_fresh(_load_scheduled_appointments)
+
+    # Bounds are bisected on each doctor's calendar; only the free slots are materialized into dicts
+    return [calendar.slot(i) for calendar, i in search_free_slots(calendars, _is_free(index), query)]
+
+
+@traced("appointment_tools.nearest_available_slots")
+async def nearest_available_slots(
+    slot_date: str,
+    slot_time: str,
+    count: int = 3,
+    doctor: str | None = None,
+) -> list[dict]:
+    """The free slots closest in time to a requested one, closest first (any doctor by default)."""
+    query = SlotQuery.parse(slot_date, earliest_time=slot_time)
+    calendars = get_calendars(clinic_today(), doctor=doctor)
+    index = get_availability_index()
+    await index.ensure_fresh(_load_scheduled_appointments)
+
+    found = nearest_across(calendars, _is_free(index), query.start_date, query.earliest_minute, count)
+    return [calendar.slot(i) for calendar, i in found]
+
+
+async def _alternatives(slot_date: str | None, slot_time: str | None, doctor: str | None = None) -> list[dict]:
+    """Nearby free slots to offer after a conflict (empty if the slot is not fully known)."""
+    if not (slot_date and slot_time):
+        return []
+    try:
+        return await nearest_available_slots(slot_date, slot_time, doctor=doctor)
+    except ValueError:
+        return []
+
 
+def _working(doctor: str | None, slot_date: str, slot_time: str) -> list[DoctorSchedule]:
+    """The matching doctors who have a slot starting then.
 
-async def fetch_available_slots(preferred_date: str | None = None) -> list[dict]:
-    """Get available appointment slots, optionally filtered by a specific date."""
-    sb = get_supabase()
-    today = date.today()
-    all_slots = generate_all_slots(today)
+    Raises ValueError for an unknown doctor, malformed input, or a time outside
+    every matching doctor's hours.
+    """
+    query = SlotQuery.parse(slot_date, earliest_time=slot_time)
+    schedules = [s for s in select_schedules(doctor) if s.offers(query.start_date, query.earliest_minute)]
+    if not schedules:
+        whose = f"{doctor}'s" if doctor else "the doctors'"
+        raise ValueError(
+            f"{slot_date} at {slot_time} is outside {whose} working hours. Please choose one of the available slots."
+        )
+    return schedules
+
+
+async def _assign_doctor(doctor: str | None, slot_date: str, slot_time: str) -> DoctorSchedule:
+    """The doctor to book: the one asked for, else the first who works and is free at that time.
 
-    # Get all booked slots from today onwards
-    booked = (
-        sb.table("appointments")
-        .select("appointment_date, appointment_time")
-        .eq("status", "scheduled")
-        .gte("appointment_date", today.isoformat())
-        .execute()
-    )
+    Raises ValueError as `_working` does.
+    """
+    schedules = _working(doctor, slot_date, slot_time)
+    if len(schedules) == 1:
+        return schedules[0]
 
-    # Build a set of booked (date, time) pairs for fast lookup
-    booked_set = set()
-    for row in booked.data:
-        # appointment_time comes as "HH:MM:SS", we only need "HH:MM"
-        time_str = row["appointment_time"][:5]
-        booked_set.add((row["appointment_date"], time_str))
+    index = get_availability_index()
+    await index.ensure_fresh(_load_scheduled_appointments)
+    for schedule in schedules:
+        if not index.is_booked(schedule.name, slot_date, slot_time, schedule.slot_duration):
+            return schedule
+    # Nobody is free then; let the database report the conflict
+    return schedules[0]
 
-    # Filter out booked slots
-    available = [s for s in all_slots if (s["date"], s["time"]) not in booked_set]
 
-    # Optionally filter by preferred date
-    if preferred_date:
-        available = [s for s in available if s["date"] == preferred_date]
+async def _check_move(appointment_id: str, new_date: str | None, new_time: str | None, new_doctor: str | None) -> None:
+    """Raise ValueError if a rescheduled appointment would start outside its doctor's hours.
 
-    return available
+    Whatever the move leaves unchanged comes from the availability index; a booking
+    it has not loaded (beyond the horizon, or unknown) is only checked on what changes.
+    """
+    current = None
+    if not (new_date and new_time and len(select_schedules(new_doctor)) == 1):
+        index = get_availability_index()
+        await index.ensure_fresh(_load_scheduled_appointments)
+        current = index.slot_of(appointment_id)
+    doctor, slot_date, slot_time = current or (None, None, None)
+    slot_date, slot_time = new_date or slot_date, new_time or slot_time
+    if slot_date and slot_time:
+        _working(new_doctor or doctor, slot_date, slot_time)
 
 
+@traced("appointment_tools.book_appointment")
 async def book_appointment(
     phone_number: str,
     patient_name: str,
     appointment_date: str,
     appointment_time: str,
     reason: str | None = None,
+    doctor_name: str | None = None,
 ) -> dict:
-    """Book a new appointment. Returns success status and appointment details."""
-    sb = get_supabase()
-
-    # Check if slot is still available (prevent double-booking)
-    existing = (
-        sb.table("appointments")
-        .select("id")
-        .eq("appointment_date", appointment_date)
-        .eq("appointment_time", appointment_time)
-        .eq("status", "scheduled")
-        .execute()
-    )
-    if existing.data:
-        return {
-            "success": False,
-            "error": f"Slot on {appointment_date} at {appointment_time} is already booked. Please choose another time.",
-        }
+    """Book a new appointment with a doctor (or the first one free at that time).
+
+    Returns success status and appointment details.
+    """
+    try:
+        schedule = await _assign_doctor(doctor_name, appointment_date, appointment_time)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
 
+    phone = normalize_phone(phone_number)
     data = {
-        "phone_number": phone_number,
+        "phone_number": phone,
         "patient_name": patient_name,
         "appointment_date": appointment_date,
         "appointment_time": appointment_time,
+        "doctor_name": schedule.name,
+        "duration_minutes": schedule.slot_duration,
         "reason": reason or "General checkup",
     }
-    result = sb.table("appointments").insert(data).execute()
-    return {"success": True, "appointment": result.data[0]}
 
+    # Single-statement insert: the store's constraints on each doctor's scheduled
+    # time ranges reject an overlapping booking atomically, so there is no
+    # separate availability check.
+    try:
+        appointment = await get_store().reserve(data)
+    except SlotConflict:
+        # Our availability view missed this booking; reload it on the next fetch,
+        # and drop the day from the shared cache in case it is stale there too
+        index = get_availability_index()
+        index.invalidate()
+        await index.announce([appointment_date])
+        return {
+            "success": False,
+            "error": f"{schedule.name} is already booked on {appointment_date} at {appointment_time}. Please choose another time.",
+            "alternatives": await _alternatives(appointment_date, appointment_time, doctor_name),
+        }
+    except InvalidRequest as e:
+        return {"success": False, "error": f"The appointment was rejected: {e}"}
 
+    index = get_availability_index()
+    index.record_booking(appointment)
+    await index.announce([appointment_date])
+    # The patients row is upserted by a database trigger on insert
+    _patient_cache.set(phone, {"found": True, "name": patient_name, "phone": phone})
+    return {"success": True, "appointment": appointment}
+
+
+@traced("appointment_tools.retrieve_appointments")
 async def retrieve_appointments(phone_number: str) -> list[dict]:
     """Get all scheduled (active) appointments for a user."""
-    sb = get_supabase()
-    result = (
-        sb.table("appointments")
-        .select("*")
-        .eq("phone_number", phone_number)
-        .eq("status", "scheduled")
-        .order("appointment_date")
-        .execute()
-    )
-    return result.data
+    return await get_store().appointments_for(normalize_phone(phone_number))
 
 
+@traced("appointment_tools.cancel_appointment")
 async def cancel_appointment(appointment_id: str) -> dict:
     """Cancel an appointment by setting its status to 'cancelled'."""
-    sb = get_supabase()
-    result = (
-        sb.table("appointments")
-        .update({"status": "cancelled"})
-        .eq("id", appointment_id)
-        .eq("status", "scheduled")
-        .execute()
-    )
-    if result.data:
-        return {"success": True, "cancelled": result.data[0]}
+    try:
+        cancelled = await get_store().cancel(appointment_id)
+    except InvalidRequest:
+        cancelled = None  # e.g. an id that is not a valid UUID
+    if cancelled:
+        index = get_availability_index()
+        day = cancelled.get("appointment_date") or index.date_of(appointment_id)
+        index.record_cancellation(appointment_id)
+        await index.announce([day and str(day)])
+        return {"success": True, "cancelled": cancelled}
     return {"success": False, "error": "Appointment not found or already cancelled"}
 
 
+@traced("appointment_tools.modify_appointment")
 async def modify_appointment(
     appointment_id: str,
     new_date: str | None = None,
     new_time: str | None = None,
+    new_doctor: str | None = None,
 ) -> dict:
-    """Modify an existing appointment's date and/or time."""
-    sb = get_supabase()
+    """Modify an existing appointment's date, time and/or doctor."""
+    try:
+        SlotQuery.parse(new_date, earliest_time=new_time)  # Rejects malformed input before the write
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
 
     updates = {}
     if new_date:
         updates["appointment_date"] = new_date
     if new_time:
         updates["appointment_time"] = new_time
+    if new_doctor:
+        try:
+            schedule = select_schedules(new_doctor)[0]
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        updates["doctor_name"] = schedule.name
+        updates["duration_minutes"] = schedule.slot_duration
 
     if not updates:
         return {"success": False, "error": "No changes specified"}
+    try:
+        await _check_move(appointment_id, new_date, new_time, updates.get("doctor_name"))
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
 
-    # Check if the new slot is available
-    check_date = new_date
-    check_time = new_time
-    if check_date or check_time:
-        # Get current appointment to fill in missing fields
-        current = (
-            sb.table("appointments")
-            .select("appointment_date, appointment_time")
-            .eq("id", appointment_id)
-            .execute()
-        )
-        if not current.data:
-            return {"success": False, "error": "Appointment not found"}
-
-        check_date = check_date or current.data[0]["appointment_date"]
-        check_time = check_time or current.data[0]["appointment_time"][:5]
-
-        existing = (
-            sb.table("appointments")
-            .select("id")
-            .eq("appointment_date", check_date)
-            .eq("appointment_time", check_time)
-            .eq("status", "scheduled")
-            .neq("id", appointment_id)
-            .execute()
-        )
-        if existing.data:
-            return {
-                "success": False,
-                "error": f"Slot on {check_date} at {check_time} is already booked.",
-            }
-
-    result = (
-        sb.table("appointments")
-        .update(updates)
-        .eq("id", appointment_id)
-        .eq("status", "scheduled")
-        .execute()
-    )
-    if result.data:
-        return {"success": True, "updated": result.data[0]}
+    index = get_availability_index()
+    old_date = index.date_of(appointment_id)  # None if unknown: every day is announced
+
+    # Single-statement update: the store rejects a move that would overlap another
+    # booking, and only scheduled (not cancelled) rows are updated.
+    try:
+        updated = await get_store().reschedule(appointment_id, updates)
+    except SlotConflict:
+        index.invalidate()
+        await index.announce([new_date or old_date])
+        slot = " ".join(filter(None, [
+            new_doctor and f"with {updates['doctor_name']}", new_date and f"on {new_date}", new_time and f"at {new_time}",
+        ]))
+        return {
+            "success": False,
+            "error": f"Slot {slot} is already booked.",
+            "alternatives": await _alternatives(new_date, new_time, new_doctor),
+        }
+    except InvalidRequest as e:
+        return {"success": False, "error": f"The change was rejected: {e}"}
+
+    if updated:
+        index.record_reschedule(updated)
+        # The date the row has now; an unknown old date announces every day
+        await index.announce([old_date, str(updated.get("appointment_date") or new_date or old_date)])
+        return {"success": True, "updated": updated}
     return {"success": False, "error": "Appointment not found or already cancelled"}
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import date, timedelta
+from tools.clinic_time import clinic_today
+from tools.interval_set import IntervalSet
+from tools.schedules import default_doctor, slot_minutes
+from tools.shared_cache import SharedCache, get_shared_cache
+from tools.slot_generator import horizon_end
+from config import AVAILABILITY_TTL_SECONDS, SHARED_CACHE_TTL_SECONDS, SLOT_CONFIG
+
+logger = logging.getLogger("availability-index")
+
+# Loads scheduled appointment rows (id, appointment_date, appointment_time, duration_minutes,
+# doctor_name) from a date onwards, or up to and including an end date when given
+Loader = Callable[..., Awaitable[list[dict]]]
+
+DAY_KEY_PREFIX = "availability:day:"
+CHANGES_CHANNEL = "availability:changes"
+_ROW_FIELDS = ("id", "appointment_date", "appointment_time", "duration_minutes", "doctor_name")
+
+
+class AvailabilityIndex:
+    """Per-worker, in-memory view of each doctor's booked time, as interval sets per day.
+
+    Built from one range query, kept current by the booking tools as they succeed,
+    and reloaded after `ttl` seconds (or when the date rolls over) to pick up changes
+    made by other workers. The database conflict check at booking time stays
+    authoritative; this index only answers availability reads.
+
+    With a shared cache, reloads read each day of the booking horizon from it and
+    only query the database for days no worker has cached. Writes delete the days
+    they touched and publish them, and every other worker drops its index so its
+    next read picks them up. `cache_ttl` bounds how stale a cached day can get if
+    a message is lost or a reload races a write.
+    """
+
+    def __init__(
+        self,
+        ttl: float = AVAILABILITY_TTL_SECONDS,
+        cache: SharedCache | None = None,
+        cache_ttl: float = SHARED_CACHE_TTL_SECONDS,
+    ):
+        self._ttl = ttl
+        self._cache = cache
+        self._cache_ttl = cache_ttl
+        self._origin = uuid.uuid4().hex  # Lets us ignore our own change messages
+        self._subscribed = False
+        self._booked: dict[tuple[str, str], IntervalSet] = {}  # (doctor, date) -> booked minutes
+        self._by_id: dict[str, tuple[str, str, int]] = {}  # appointment id -> (doctor, date, start minute)
+        self._loaded_at: float | None = None
+        self._loaded_for: date | None = None
+        self._generation = 0  # Bumped by other workers' change messages
+        self._replay: list[tuple[str | None, dict | None]] | None = None  # Our writes during a reload
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None or self._loaded_for != clinic_today():
+            return True
+        return time.monotonic() - self._loaded_at > self._ttl
+
+    async def ensure_fresh(self, loader: Loader) -> None:
+        """Reload from the database if the index is missing or older than the TTL."""
+        if not self.is_stale():
+            return
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.is_stale():
+                await self.refresh(loader)
+
+    async def refresh(self, loader: Loader) -> None:
+        """Rebuild the index from the database."""
+        today = clinic_today()
+        generation = self._generation
+        self._replay = []
+        try:
+            if self._cache is None:
+                rows = await loader(today.isoformat())
+            else:
+                rows = await self._load_days(loader, today)
+        finally:
+            replay, self._replay = self._replay, None
+
+        self._booked = {}
+        self._by_id = {}
+        for row in rows:
+            self._add(row)
+        # Our own writes made while the query was in flight may be missing from its
+        # snapshot; they are applied again on top of it (a no-op if already there)
+        for appointment_id, row in replay:
+            self._apply(appointment_id, row)
+        self._loaded_for = today
+        # Another worker's change announced meanwhile can't be replayed: keep the data
+        # but reload on the next read.
+        self._loaded_at = time.monotonic() if generation == self._generation else None
+
+    def invalidate(self) -> None:
+        """Force a reload on the next read."""
+        self._loaded_at = None
+
+    # ---- Shared cache ----
+
+    async def _load_days(self, loader: Loader, today: date) -> list[dict]:
+        """Rows for every day of the horizon: cached days from the shared cache, the rest from the database."""
+        if not self._subscribed:
+            # Subscribe before reading, so no change published after the read is missed
+            await self._cache.subscribe(CHANGES_CHANNEL, self._on_change)
+            self._subscribed = True
+        days = _horizon_days(today)
+        try:
+            cached = await self._cache.mget([DAY_KEY_PREFIX + d for d in days])
+        except Exception as e:
+            logger.warning(f"Shared availability cache unavailable, loading from the database: {e}")
+            return await loader(today.isoformat())
+
+        rows = [row for value in cached if value is not None for row in json.loads(value)]
+        missing = [d for d, value in zip(days, cached) if value is None]
+        if not missing:
+            return rows
+
+        # One query spanning the missing days; rows of days already cached are dropped
+        fresh: dict[str, list[dict]] = {d: [] for d in missing}
+        for row in await loader(missing[0], missing[-1]):
+            day = fresh.get(str(row["appointment_date"]))
+            if day is not None:
+                day.append({k: str(row[k]) if k == "appointment_date" else row.get(k) for k in _ROW_FIELDS})
+        try:
+            await self._cache.set_many({DAY_KEY_PREFIX + d: json.dumps(fresh[d]) for d in missing}, self._cache_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to fill shared availability cache: {e}")
+        return rows + [row for d in missing for row in fresh[d]]
+
+    def _on_change(self, message: str | None) -> None:
+        """Another worker changed bookings (None: the subscription dropped and changes may be missed)."""
+        if message is not None and json.loads(message).get("origin") == self._origin:
+            return
+        # A reload already in flight may have missed it
+        self._generation += 1
+        self.invalidate()
+
+    async def announce(self, dates: Iterable[str | None] | None = None) -> None:
+        """Tell other workers that bookings changed on `dates` (None or an unknown date: every day).
+
+        Drops those days from the shared cache, then publishes them. No-op without a shared cache.
+        """
+        if self._cache is None:
+            return
+        dates = None if dates is None else set(dates)
+        if dates is None or None in dates:
+            days = _horizon_days(clinic_today())
+        else:
+            days = sorted(dates)
+        try:
+            await self._cache.delete([DAY_KEY_PREFIX + d for d in days])
+            await self._cache.publish(CHANGES_CHANNEL, json.dumps({"origin": self._origin, "dates": days}))
+        except Exception as e:
+            logger.warning(f"Failed to announce availability change for {days}: {e}")
+
+    def slot_of(self, appointment_id: str) -> tuple[str, str, str] | None:
+        """(doctor, date, "HH:MM") of a booking the index knows about."""
+        slot = self._by_id.get(appointment_id)
+        if slot is None:
+            return None
+        doctor, slot_date, start = slot
+        return doctor, slot_date, f"{start // 60:02d}:{start % 60:02d}"
+
+    def date_of(self, appointment_id: str) -> str | None:
+        """Date of a booking the index knows about."""
+        slot = self._by_id.get(appointment_id)
+        return slot[1] if slot else None
+
+    def overlaps(self, doctor: str, slot_date: str, start: int, end: int) -> bool:
+        """True if the doctor has a booking intersecting [start, end) minutes on that date."""
+        booked = self._booked.get((doctor, slot_date))
+        return booked is not None and booked.overlaps(start, end)
+
+    def is_booked(self, doctor: str, slot_date: str, slot_time: str, duration: int = 1) -> bool:
+        """True if any booking covers part of the `duration` minutes from `slot_time`."""
+        start = _minutes(slot_time)
+        return self.overlaps(doctor, slot_date, start, start + duration)
+
+    def booked_times(self, doctor: str, slot_date: str) -> set[str]:
+        """Start times of the doctor's bookings on that date."""
+        booked = self._booked.get((doctor, slot_date))
+        return {f"{m // 60:02d}:{m % 60:02d}" for m in booked.starts()} if booked else set()
+
+    # ---- Incremental updates from successful writes ----
+
+    def record_booking(self, appointment: dict) -> None:
+        self._record(appointment.get("id"), appointment)
+
+    def record_cancellation(self, appointment_id: str) -> None:
+        self._record(appointment_id, None)
+
+    def record_reschedule(self, appointment: dict) -> None:
+        self._record(appointment.get("id"), appointment)
+
+    def _record(self, appointment_id: str | None, row: dict | None) -> None:
+        if self._replay is not None:
+            self._replay.append((appointment_id, row))
+        self._apply(appointment_id, row)
+
+    def _apply(self, appointment_id: str | None, row: dict | None) -> None:
+        """Make the index hold `row` for the appointment (None: not booked)."""
+        self._remove(appointment_id)
+        if row is not None:
+            self._add(row)
+
+    def _add(self, row: dict) -> None:
+        doctor = row.get("doctor_name") or default_doctor()
+        slot_date = str(row["appointment_date"])
+        start = _minutes(str(row["appointment_time"]))
+        duration = row.get("duration_minutes") or slot_minutes(doctor)
+        appointment_id = row.get("id") or ""
+        self._booked.setdefault((doctor, slot_date), IntervalSet()).add(start, start + duration, appointment_id)
+        if appointment_id:
+            self._by_id[appointment_id] = (doctor, slot_date, start)
+
+    def _remove(self, appointment_id: str | None) -> None:
+        slot = self._by_id.pop(appointment_id, None)
+        if slot is None:
+            return
+        doctor, slot_date, start = slot
+        self._booked[(doctor, slot_date)].remove(start, appointment_id)
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def _horizon_days(today: date) -> list[str]:
+    """ISO dates of the default booking horizon, the span slot calendars cover, weekends included."""
+    end = horizon_end(today, SLOT_CONFIG["days_ahead"])
+    return [(today + timedelta(days=n)).isoformat() for n in range((end - today).days)]
+
+
+_index: AvailabilityIndex | None = None
+
+
+def get_availability_index() -> AvailabilityIndex:
+    """Get or create the worker-wide availability index."""
+    global _index
+    if _index is None:
+        _index = AvailabilityIndex(cache=get_shared_cache())
+    return _index
@@ -0,0 +1,132 @@
+"""Minimal Redis-compatible server for the shared availability cache.
+
+Speaks enough of the Redis protocol for `RespSharedCache` (PING, AUTH, GET, MGET,
+SET with PX/EX, DEL, PUBLISH, SUBSCRIBE), keeping everything in memory. Lets
+several local worker processes share a cache without installing Redis, and backs
+the tests; production deployments should point SHARED_CACHE_URL at real Redis.
+
+Usage:
+    python -m tools.cache_server --port 6380
+    SHARED_CACHE_URL=redis://127.0.0.1:6380
+"""
+import argparse
+import asyncio
+import time
+from tools.shared_cache import RespError, read_reply
+
+
+def _bulk(value: str | None) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    data = value.encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def _array(values: list[str | None]) -> bytes:
+    return b"*%d\r\n" % len(values) + b"".join(_bulk(v) for v in values)
+
+
+class CacheServer:
+    """In-memory key/value store with expiry and pub/sub channels."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float | None, str]] = {}  # key -> (expires at, value)
+        self._channels: dict[str, set[asyncio.StreamWriter]] = {}
+
+    def _get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def _set(self, key: str, value: str, options: list[str]) -> None:
+        expires_at = None
+        for flag, amount in zip(options[::2], options[1::2]):
+            if flag.upper() == "PX":
+                expires_at = time.monotonic() + int(amount) / 1000
+            elif flag.upper() == "EX":
+                expires_at = time.monotonic() + int(amount)
+        self._entries[key] = (expires_at, value)
+
+    def _publish(self, channel: str, message: str) -> int:
+        frame = _array(["message", channel, message])
+        subscribers = self._channels.get(channel, set())
+        for writer in list(subscribers):
+            if writer.is_closing():
+                subscribers.discard(writer)
+            else:
+                writer.write(frame)
+        return len(subscribers)
+
+    def execute(self, command: list[str], writer: asyncio.StreamWriter) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "AUTH":
+            return b"+OK\r\n"
+        if name == "GET":
+            return _bulk(self._get(args[0]))
+        if name == "MGET":
+            return _array([self._get(k) for k in args])
+        if name == "SET":
+            self._set(args[0], args[1], args[2:])
+            return b"+OK\r\n"
+        if name == "DEL":
+            removed = sum(self._entries.pop(k, None) is not None for k in args)
+            return b":%d\r\n" % removed
+        if name == "PUBLISH":
+            return b":%d\r\n" % self._publish(args[0], args[1])
+        if name == "SUBSCRIBE":
+            reply = b""
+            for n, channel in enumerate(args, 1):
+                self._channels.setdefault(channel, set()).add(writer)
+                reply += b"*3\r\n" + _bulk("subscribe") + _bulk(channel) + b":%d\r\n" % n
+            return reply
+        return f"-ERR unknown command '{command[0]}'\r\n".encode("utf-8")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    command = await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except RespError:
+                    continue
+                if not isinstance(command, list) or not command:
+                    writer.write(b"-ERR expected a command array\r\n")
+                    continue
+                writer.write(self.execute([str(c) for c in command], writer))
+                await writer.drain()
+        finally:
+            for subscribers in self._channels.values():
+                subscribers.discard(writer)
+            writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+    """Start a server; with port 0 the OS picks one (see `server.sockets[0].getsockname()`)."""
+    return await asyncio.start_server(CacheServer().handle, host, port)
+
+
+async def _main(host: str, port: int) -> None:
+    server = await serve(host, port)
+    print(f"Cache server listening on {host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    asyncio.run(_main(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
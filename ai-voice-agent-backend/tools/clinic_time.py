@@ -0,0 +1,12 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+from config import CLINIC_TIMEZONE
+
+CLINIC_TZ = ZoneInfo(CLINIC_TIMEZONE)
+
+
+def clinic_today(now: datetime | None = None) -> date:
+    """Today's date at the clinic, which may differ from the server's local date."""
+    if now is None:
+        return datetime.now(CLINIC_TZ).date()
+    return now.astimezone(CLINIC_TZ).date()
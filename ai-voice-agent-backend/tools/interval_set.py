@@ -0,0 +1,48 @@
+from bisect import bisect_left, bisect_right
+
+
+class IntervalSet:
+    """Half-open [start, end) intervals in minutes, sorted by start, for overlap queries.
+
+    Intervals may overlap each other (e.g. legacy double bookings) and are removed by
+    key. Any interval overlapping [start, end) must begin after `start - longest`, so
+    an overlap check is a bisect plus a scan of the few intervals starting in that
+    window: O(log n) for appointment-sized intervals, however many a day holds.
+    """
+
+    def __init__(self):
+        self._starts: list[int] = []
+        self._entries: list[tuple[int, int, str]] = []  # (start, end, key), parallel to _starts
+        self._longest = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, start: int, end: int, key: str) -> None:
+        entry = (start, end, key)
+        i = bisect_right(self._entries, entry)
+        self._entries.insert(i, entry)
+        self._starts.insert(i, start)
+        # Never shrinks on removal; a stale maximum only widens the scan window
+        self._longest = max(self._longest, end - start)
+
+    def remove(self, start: int, key: str) -> bool:
+        """Remove the interval with this start and key; False if there is none."""
+        i = bisect_left(self._starts, start)
+        while i < len(self._entries) and self._starts[i] == start:
+            if self._entries[i][2] == key:
+                del self._entries[i]
+                del self._starts[i]
+                return True
+            i += 1
+        return False
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if any interval intersects [start, end)."""
+        i = bisect_right(self._starts, start - self._longest)
+        stop = bisect_left(self._starts, end)
+        return any(self._entries[j][1] > start for j in range(i, stop))
+
+    def starts(self) -> list[int]:
+        return list(self._starts)
+
@@ -0,0 +1,22 @@
+import re
+from config import DEFAULT_COUNTRY_CODE
+
+
+def normalize_phone(phone_number: str, country_code: str = DEFAULT_COUNTRY_CODE) -> str:
+    """Canonicalize a phone number to E.164, e.g. "(555) 123-4567" -> "+15551234567".
+
+    Numbers with a leading "+" or "00" international prefix keep their country code;
+    10-digit national numbers get `country_code` prepended. Input without any digits
+    is returned stripped so lookups simply miss.
+    """
+    raw = phone_number.strip()
+    digits = re.sub(r"\D", "", raw)
+    if not digits:
+        return raw
+    if raw.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    if len(digits) == 10:
+        return f"+{country_code}{digits}"
+    return f"+{digits}"
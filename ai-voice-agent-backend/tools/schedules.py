@@ -0,0 +1,151 @@
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from config import SLOT_CONFIG, DOCTOR_SCHEDULES_FILE
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# (start, end) minutes from midnight, end exclusive
+Interval = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class DoctorSchedule:
+    """When one doctor sees patients. Frozen, so calendars can be memoized on it."""
+    name: str
+    clinic: str = ""
+    slot_duration: int = 30
+    weekly_hours: tuple[tuple[Interval, ...], ...] = ((),) * 7  # Monday first, breaks already removed
+    holidays: frozenset[date] = frozenset()
+
+    @classmethod
+    def weekdays(cls, name: str, start_hour: int, end_hour: int, slot_duration: int, clinic: str = "") -> "DoctorSchedule":
+        """Same hours Monday to Friday, no breaks or holidays."""
+        day = ((start_hour * 60, end_hour * 60),)
+        return cls(name, clinic, slot_duration, (day,) * 5 + ((),) * 2)
+
+    def slot_starts(self, weekday: int) -> list[int]:
+        """Start minutes of the slots on a weekday. A slot never runs into a break or past closing."""
+        return [
+            minute
+            for start, end in self.weekly_hours[weekday]
+            for minute in range(start, end - self.slot_duration + 1, self.slot_duration)
+        ]
+
+    def offers(self, day: date, minute: int) -> bool:
+        """Whether one of the doctor's slots starts at `minute` on `day` (hours, breaks and holidays)."""
+        return day not in self.holidays and minute in self.slot_starts(day.weekday())
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _interval(text: str) -> Interval:
+    start, end = text.split("-")
+    return _minutes(start), _minutes(end)
+
+
+def _subtract(intervals: list[Interval], breaks: list[Interval]) -> tuple[Interval, ...]:
+    """Working intervals with the break intervals cut out."""
+    for b_start, b_end in breaks:
+        remaining = []
+        for start, end in intervals:
+            if b_end <= start or b_start >= end:
+                remaining.append((start, end))
+                continue
+            if start < b_start:
+                remaining.append((start, b_start))
+            if b_end < end:
+                remaining.append((b_end, end))
+        intervals = remaining
+    return tuple(sorted(intervals))
+
+
+def parse_schedule(entry: dict, shared_holidays: frozenset[date] = frozenset()) -> DoctorSchedule:
+    """Build a DoctorSchedule from one entry of the schedules file.
+
+    Example entry:
+        {"name": "Dr. Lee", "clinic": "Northside", "slot_duration": 20,
+         "hours": {"mon": ["08:00-16:00"], "sat": ["09:00-12:00"]},
+         "breaks": ["12:00-12:40"], "holidays": ["2026-12-24"]}
+    """
+    hours = entry.get("hours", {})
+    unknown = set(hours) - set(WEEKDAYS)
+    if unknown:
+        raise ValueError(f"Unknown weekday(s) {sorted(unknown)} for {entry['name']}; use {', '.join(WEEKDAYS)}")
+    breaks = [_interval(b) for b in entry.get("breaks", [])]
+    return DoctorSchedule(
+        name=entry["name"],
+        clinic=entry.get("clinic", ""),
+        slot_duration=int(entry.get("slot_duration", SLOT_CONFIG["slot_duration"])),
+        weekly_hours=tuple(
+            _subtract([_interval(i) for i in hours.get(day, [])], breaks) for day in WEEKDAYS
+        ),
+        holidays=shared_holidays | frozenset(date.fromisoformat(d) for d in entry.get("holidays", [])),
+    )
+
+
+def load_schedules(path: str) -> tuple[DoctorSchedule, ...]:
+    """Read the schedules file: {"holidays": [...], "doctors": [{...}, ...]}."""
+    with open(path) as f:
+        raw = json.load(f)
+    holidays = frozenset(date.fromisoformat(d) for d in raw.get("holidays", []))
+    schedules = tuple(parse_schedule(entry, holidays) for entry in raw["doctors"])
+    if not schedules:
+        raise ValueError(f"No doctors in {path}")
+    return schedules
+
+
+def _default_schedules() -> tuple[DoctorSchedule, ...]:
+    """The single doctor described by SLOT_CONFIG."""
+    return (DoctorSchedule.weekdays(
+        SLOT_CONFIG["doctor_name"], SLOT_CONFIG["start_hour"], SLOT_CONFIG["end_hour"], SLOT_CONFIG["slot_duration"]
+    ),)
+
+
+_schedules: tuple[DoctorSchedule, ...] | None = None
+
+
+def get_schedules() -> tuple[DoctorSchedule, ...]:
+    """Get the configured doctors (loaded once per process)."""
+    global _schedules
+    if _schedules is None:
+        _schedules = load_schedules(DOCTOR_SCHEDULES_FILE) if DOCTOR_SCHEDULES_FILE else _default_schedules()
+    return _schedules
+
+
+def default_doctor() -> str:
+    """The doctor assumed for rows without one (matches the column default)."""
+    return get_schedules()[0].name
+
+
+def _normalize(name: str) -> str:
+    words = re.sub(r"[^a-z]+", " ", name.lower()).strip()
+    return re.sub(r"^dr ", "", words)
+
+
+def select_schedules(doctor: str | None = None, clinic: str | None = None) -> list[DoctorSchedule]:
+    """Doctors matching a name ("Dr. Lee", "lee") and/or clinic; all doctors if neither is given.
+
+    Raises ValueError listing the valid choices when nothing matches.
+    """
+    schedules = get_schedules()
+    selected = [
+        s for s in schedules
+        if (not doctor or _normalize(s.name) == _normalize(doctor))
+        and (not clinic or s.clinic.lower() == clinic.strip().lower())
+    ]
+    if not selected:
+        if doctor:
+            raise ValueError(f"Unknown doctor '{doctor}'. Doctors: {', '.join(s.name for s in schedules)}")
+        clinics = sorted({s.clinic for s in schedules if s.clinic})
+        raise ValueError(f"Unknown clinic '{clinic}'. Clinics: {', '.join(clinics) or 'none configured'}")
+    return selected
+
+
+def slot_minutes(doctor: str) -> int:
+    """Appointment length for a doctor (the clinic default for unknown names)."""
+    return next((s.slot_duration for s in get_schedules() if s.name == doctor), SLOT_CONFIG["slot_duration"])
@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from urllib.parse import urlparse
+from config import SHARED_CACHE_URL
+
+logger = logging.getLogger("shared-cache")
+
+# Called with each message published on a subscribed channel, or with None when the
+# subscription dropped and messages may have been missed
+Subscriber = Callable[[str | None], None]
+
+
+class SharedCache(ABC):
+    """String key/value store with expiry and publish/subscribe, shared by workers.
+
+    `InMemorySharedCache` serves a single process; `RespSharedCache` talks to Redis
+    (or anything speaking its protocol, such as `tools.cache_server`) so several
+    worker processes or containers see the same entries and messages.
+    """
+
+    @abstractmethod
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        """The value of each key, or None where it is missing or expired."""
+
+    @abstractmethod
+    async def set_many(self, items: dict[str, str], ttl: float) -> None:
+        """Store every item, each expiring after `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, keys: list[str]) -> None:
+        """Remove the keys; missing ones are ignored."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        """Send a message to the channel's current subscribers."""
+
+    @abstractmethod
+    async def subscribe(self, channel: str, callback: Subscriber) -> None:
+        """Call `callback` with every message later published on the channel."""
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemorySharedCache(SharedCache):
+    """Process-local implementation; messages are delivered to this process's subscribers."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, str]] = {}  # key -> (expires at, value)
+        self._subscribers: dict[str, list[Subscriber]] = {}
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            values.append(entry and entry[1])
+        return values
+
+    async def set_many(self, items: dict[str, str], ttl: float) -> None:
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self._entries[key] = (expires_at, value)
+
+    async def delete(self, keys: list[str]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for callback in list(self._subscribers.get(channel, ())):
+            callback(message)
+
+    async def subscribe(self, channel: str, callback: Subscriber) -> None:
+        self._subscribers.setdefault(channel, []).append(callback)
+
+
+class RespError(Exception):
+    """An error reply from the server."""
+
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Read one RESP reply: str, int, None, or a list of replies. Raises RespError for errors."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        raise RespError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2].decode("utf-8")
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [await read_reply(reader) for _ in range(size)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+class RespSharedCache(SharedCache):
+    """Client for Redis or a compatible server, using a handful of core commands.
+
+    Commands share one connection, serialized by a lock; each subscription gets its
+    own connection, reconnecting with a delay if it drops. Connection errors, and
+    round trips taking longer than `timeout`, are raised to the caller, who decides
+    how to fall back.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, password: str | None = None,
+                 timeout: float = 1.0, retry_delay: float = 1.0):
+        self._host = host
+        self._port = port
+        self._password = password
+        self._timeout = timeout
+        self._retry_delay = retry_delay
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._listeners: list[asyncio.Task] = []
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespSharedCache":
+        """`redis://[:password@]host[:port]`."""
+        parsed = urlparse(url)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, parsed.password)
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        if self._password:
+            try:
+                writer.write(encode_command("AUTH", self._password))
+                await writer.drain()
+                await read_reply(reader)
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    async def _pipeline(self, *commands: tuple) -> list:
+        """Send commands back to back on the shared connection and read all replies.
+
+        The whole round trip, connecting included, is bounded by the timeout: a server
+        that stops reading (stalling the drain) or replying raises TimeoutError.
+        """
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(self._round_trip(commands), self._timeout)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                # Don't reuse a connection in an unknown state
+                self._drop_connection()
+                raise
+
+    async def _round_trip(self, commands: tuple[tuple, ...]) -> list:
+        if self._writer is None:
+            self._reader, self._writer = await self._connect()
+        self._writer.write(b"".join(encode_command(*c) for c in commands))
+        await self._writer.drain()
+        return [await read_reply(self._reader) for _ in commands]
+
+    def _drop_connection(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        if not keys:
+            return []
+        return (await self._pipeline(("MGET", *keys)))[0]
+
+    async def set_many(self, items: dict[str, str], ttl: float) -> None:
+        if items:
+            await self._pipeline(*(("SET", k, v, "PX", int(ttl * 1000)) for k, v in items.items()))
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self._pipeline(("DEL", *keys))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._pipeline(("PUBLISH", channel, message))
+
+    async def subscribe(self, channel: str, callback: Subscriber) -> None:
+        """Start listening on `channel`; returns once the first attempt to subscribe has finished."""
+        first_attempt = asyncio.get_running_loop().create_future()
+        self._listeners.append(asyncio.create_task(self._listen(channel, callback, first_attempt)))
+        await first_attempt
+
+    async def _listen(self, channel: str, callback: Subscriber, first_attempt: asyncio.Future) -> None:
+        while True:
+            writer = None
+            subscribed = False
+            try:
+                reader, writer = await asyncio.wait_for(self._subscribe(channel), self._timeout)
+                subscribed = True
+                if not first_attempt.done():
+                    first_attempt.set_result(True)
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and reply[0] == "message":
+                        callback(reply[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Subscription to {channel} unavailable, retrying in {self._retry_delay}s: {e}")
+                if subscribed:
+                    # Messages published until we resubscribe will be missed
+                    callback(None)
+                if not first_attempt.done():
+                    first_attempt.set_result(False)
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(self._retry_delay)
+
+    async def _subscribe(self, channel: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """A new connection subscribed to `channel`."""
+        reader, writer = await self._connect()
+        try:
+            writer.write(encode_command("SUBSCRIBE", channel))
+            await writer.drain()
+            await read_reply(reader)  # ["subscribe", channel, count]
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def close(self) -> None:
+        for task in self._listeners:
+            task.cancel()
+        await asyncio.gather(*self._listeners, return_exceptions=True)
+        self._listeners.clear()
+        async with self._lock:
+            self._drop_connection()
+
+
+def create_shared_cache(url: str | None) -> SharedCache | None:
+    """Cache for a SHARED_CACHE_URL: unset for none, `memory://`, or `redis://host:port`."""
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return InMemorySharedCache()
+    if scheme == "redis":
+        return RespSharedCache.from_url(url)
+    raise ValueError(f"Unsupported SHARED_CACHE_URL scheme '{scheme}', expected memory:// or redis://")
+
+
+_cache: SharedCache | None = None
+_configured = False
+
+
+def get_shared_cache() -> SharedCache | None:
+    """Get or create the worker-wide shared cache (None when not configured)."""
+    global _cache, _configured
+    if not _configured:
+        _cache = create_shared_cache(SHARED_CACHE_URL)
+        _configured = True
+    return _cache
@@ -1,41 +1,184 @@
+from array import array
+from bisect import bisect_left
 from datetime import date, timedelta
+from functools import lru_cache
+from tools.clinic_time import clinic_today
+from tools.schedules import DoctorSchedule, select_schedules
 from config import SLOT_CONFIG
 
 
-def generate_all_slots(from_date: date, days_ahead: int | None = None) -> list[dict]:
-    """Generate all possible appointment slots for the next N business days.
+class SlotCalendar:
+    """Precomputed slot grid of one doctor for a run of days.
 
-    Returns a list of dicts: [{"date": "2026-02-10", "time": "09:00", "doctor": "Dr. Smith"}, ...]
+    Slots are stored as two parallel integer arrays (day offset from `from_date`,
+    minute of day), ordered by day then time. Date/time strings are formatted once
+    per calendar and slot dicts are only built for the slots a caller asks for.
     """
-    days_ahead = days_ahead or SLOT_CONFIG["days_ahead"]
-    start_hour = SLOT_CONFIG["start_hour"]
-    end_hour = SLOT_CONFIG["end_hour"]
-    slot_duration = SLOT_CONFIG["slot_duration"]
-    doctor = SLOT_CONFIG["doctor_name"]
 
-    slots = []
-    current = from_date
-    days_added = 0
+    def __init__(
+        self,
+        from_date: date,
+        day_offsets: array,
+        minutes: array,
+        doctor: str,
+        slot_duration: int = SLOT_CONFIG["slot_duration"],
+    ):
+        self.from_date = from_date
+        self.day_offsets = day_offsets
+        self.minutes = minutes
+        self.doctor = doctor
+        self.slot_duration = slot_duration
+
+        self._date_labels: dict[int, str] = {
+            offset: (from_date + timedelta(days=offset)).isoformat()
+            for offset in dict.fromkeys(day_offsets)
+        }
+        self._time_labels: dict[int, str] = {
+            m: f"{m // 60:02d}:{m % 60:02d}" for m in dict.fromkeys(minutes)
+        }
+        # Slots for one day are contiguous, so each date maps to an index range
+        self._day_ranges: dict[str, range] = {}
+        start = 0
+        for i in range(1, len(day_offsets) + 1):
+            if i == len(day_offsets) or day_offsets[i] != day_offsets[start]:
+                self._day_ranges[self._date_labels[day_offsets[start]]] = range(start, i)
+                start = i
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    def dates(self) -> list[str]:
+        """ISO dates covered by the calendar, in order."""
+        return list(self._day_ranges)
+
+    def indices_for_date(self, slot_date: str) -> range:
+        """Index range of the slots on `slot_date` (empty if not in the calendar)."""
+        return self._day_ranges.get(slot_date, range(0))
+
+    def position(self, slot_date: date, minute: int = 0) -> int:
+        """Index of the first slot at or after `minute` on `slot_date` (len(self) if none).
+
+        Both arrays are sorted within the calendar's ordering, so this is two bisects.
+        """
+        offset = (slot_date - self.from_date).days
+        day_start = bisect_left(self.day_offsets, offset)
+        if day_start == len(self) or self.day_offsets[day_start] != offset:
+            return day_start
+        day = self._day_ranges[self._date_labels[offset]]
+        return bisect_left(self.minutes, minute, day.start, day.stop)
+
+    def has_slot(self, slot_date: date, minute: int) -> bool:
+        """Whether the doctor has a slot starting at `minute` on `slot_date`."""
+        i = self.position(slot_date, minute)
+        return (
+            i < len(self)
+            and self.day_offsets[i] == (slot_date - self.from_date).days
+            and self.minutes[i] == minute
+        )
+
+    def datetime_minutes(self, i: int) -> int:
+        """Minutes from midnight of `from_date` to the start of slot `i`."""
+        return self.day_offsets[i] * 24 * 60 + self.minutes[i]
 
-    while days_added < days_ahead:
+    def key(self, i: int) -> tuple[str, str]:
+        """The (date, time) strings of slot `i`."""
+        return self._date_labels[self.day_offsets[i]], self._time_labels[self.minutes[i]]
+
+    def span(self, i: int) -> tuple[str, int, int]:
+        """The date of slot `i` and its [start, end) minutes from midnight."""
+        start = self.minutes[i]
+        return self._date_labels[self.day_offsets[i]], start, start + self.slot_duration
+
+    def slot(self, i: int) -> dict:
+        """Materialize slot `i` as the dict returned to the LLM."""
+        slot_date, slot_time = self.key(i)
+        return {"date": slot_date, "time": slot_time, "doctor": self.doctor}
+
+    def materialize(self, indices=None) -> list[dict]:
+        """Build slot dicts for `indices` (default: every slot)."""
+        return [self.slot(i) for i in (range(len(self)) if indices is None else indices)]
+
+
+def horizon_end(from_date: date, days_ahead: int) -> date:
+    """The day after the last of `days_ahead` business days (Mon-Fri) from `from_date`."""
+    day, counted = from_date, 0
+    while counted < days_ahead:
         # Skip weekends (Saturday=5, Sunday=6)
-        if current.weekday() < 5:
-            hour = start_hour
-            minute = 0
-            while hour < end_hour:
-                # Don't add a slot that would extend past end_hour
-                slot_end_minutes = hour * 60 + minute + slot_duration
-                if slot_end_minutes <= end_hour * 60:
-                    slots.append({
-                        "date": current.isoformat(),
-                        "time": f"{hour:02d}:{minute:02d}",
-                        "doctor": doctor,
-                    })
-                minute += slot_duration
-                if minute >= 60:
-                    hour += minute // 60
-                    minute = minute % 60
-            days_added += 1
-        current += timedelta(days=1)
-
-    return slots
+        if day.weekday() < 5:
+            counted += 1
+        day += timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=1024)
+def build_doctor_calendar(schedule: DoctorSchedule, from_date: date, end_date: date) -> SlotCalendar:
+    """Build (and memoize) one doctor's slot calendar for [from_date, end_date)."""
+    # Every day of the week has a fixed set of slot times, so compute them once
+    week = [array("H", schedule.slot_starts(weekday)) for weekday in range(7)]
+
+    day_offsets = array("H")
+    minutes = array("H")
+    for offset in range((end_date - from_date).days):
+        day = from_date + timedelta(days=offset)
+        if day in schedule.holidays:
+            continue
+        day_minutes = week[day.weekday()]
+        day_offsets.extend(array("H", [offset]) * len(day_minutes))
+        minutes.extend(day_minutes)
+
+    return SlotCalendar(from_date, day_offsets, minutes, schedule.name, schedule.slot_duration)
+
+
+def build_slot_calendar(
+    from_date: date,
+    days_ahead: int,
+    start_hour: int,
+    end_hour: int,
+    slot_duration: int,
+    doctor: str,
+) -> SlotCalendar:
+    """Slot calendar for a doctor with the same hours every weekday, for N business days."""
+    schedule = DoctorSchedule.weekdays(doctor, start_hour, end_hour, slot_duration)
+    return build_doctor_calendar(schedule, from_date, horizon_end(from_date, days_ahead))
+
+
+_cache_day: date | None = None
+
+
+def get_calendars(
+    from_date: date,
+    days_ahead: int | None = None,
+    doctor: str | None = None,
+    clinic: str | None = None,
+) -> list[SlotCalendar]:
+    """Get the memoized calendars of the matching doctors (all by default), in configured order.
+
+    All calendars share `from_date` and the horizon of `days_ahead` business days, so slot
+    positions (`datetime_minutes`) are comparable across them. Unchanged schedules are
+    never rebuilt within a day; the cache is dropped when the clinic-local date changes,
+    so calendars anchored on previous days do not accumulate in long-lived workers.
+    Raises ValueError for an unknown doctor or clinic.
+    """
+    global _cache_day
+    today = clinic_today()
+    if _cache_day != today:
+        build_doctor_calendar.cache_clear()
+        _cache_day = today
+
+    end_date = horizon_end(from_date, days_ahead or SLOT_CONFIG["days_ahead"])
+    return [build_doctor_calendar(s, from_date, end_date) for s in select_schedules(doctor, clinic)]
+
+
+def get_slot_calendar(from_date: date, days_ahead: int | None = None, doctor: str | None = None) -> SlotCalendar:
+    """Get one doctor's memoized calendar (default: the first configured doctor)."""
+    return get_calendars(from_date, days_ahead, doctor)[0]
+
+
+def generate_all_slots(from_date: date, days_ahead: int | None = None) -> list[dict]:
+    """Generate all possible appointment slots of every doctor for the next N business days.
+
+    Returns a list of dicts ordered by date and time: [{"date": "2026-02-10", "time": "09:00", "doctor": "Dr. Smith"}, ...]
+    """
+    calendars = get_calendars(from_date, days_ahead)
+    slots = [(calendar.datetime_minutes(i), n, i) for n, calendar in enumerate(calendars) for i in range(len(calendar))]
+    return [calendars[n].slot(i) for _, n, i in sorted(slots)]
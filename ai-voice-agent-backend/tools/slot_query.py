@@ -0,0 +1,176 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Callable, Iterator
+from tools.slot_generator import SlotCalendar
+
+# Called with a calendar and a slot index; True if that slot can still be booked
+IsFree = Callable[[SlotCalendar, int], bool]
+
+
+@dataclass(frozen=True)
+class SlotQuery:
+    """Which free slots to return. Date and time bounds are inclusive; `after` is exclusive."""
+    start_date: date | None = None
+    end_date: date | None = None
+    earliest_minute: int | None = None   # Earliest slot start, minutes from midnight
+    latest_minute: int | None = None     # Latest slot start, minutes from midnight
+    after: datetime | None = None
+    limit: int | None = None
+
+    @classmethod
+    def parse(
+        cls,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        earliest_time: str | None = None,
+        latest_time: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> "SlotQuery":
+        """Build a query from tool arguments. A lone start date means that one day.
+
+        Raises ValueError with a message the LLM can act on for malformed input.
+        """
+        start = _parse_date(start_date, "start date")
+        end = _parse_date(end_date, "end date") or start
+        if start and end and end < start:
+            raise ValueError(f"End date {end} is before start date {start}")
+        return cls(
+            start_date=start,
+            end_date=end,
+            earliest_minute=_parse_minutes(earliest_time),
+            latest_minute=_parse_minutes(latest_time),
+            after=_parse_datetime(after),
+            limit=limit or None,
+        )
+
+
+def _parse_date(value: str | None, what: str) -> date | None:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {what} '{value}', expected YYYY-MM-DD") from None
+
+
+def _parse_minutes(value: str | None) -> int | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value[:5], "%H:%M")
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM (24-hour)") from None
+    return parsed.hour * 60 + parsed.minute
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace(" ", "T"))
+    except ValueError:
+        raise ValueError(f"Invalid date-time '{value}', expected YYYY-MM-DD HH:MM") from None
+
+
+def _candidates(calendar: SlotCalendar, query: SlotQuery) -> Iterator[int]:
+    """Slot indices matching the query's date, time-of-day and `after` bounds, in order."""
+    lo = calendar.position(query.start_date) if query.start_date else 0
+    if query.after is not None:
+        after = query.after
+        lo = max(lo, calendar.position(after.date(), after.hour * 60 + after.minute + 1))
+    hi = calendar.position(query.end_date + timedelta(days=1)) if query.end_date else len(calendar)
+
+    if query.earliest_minute is None and query.latest_minute is None:
+        yield from range(lo, hi)
+        return
+
+    earliest = query.earliest_minute or 0
+    latest = 24 * 60 if query.latest_minute is None else query.latest_minute
+    for slot_date in calendar.dates():
+        day = calendar.indices_for_date(slot_date)
+        start, stop = max(day.start, lo), min(day.stop, hi)
+        if start >= stop:
+            continue
+        # Minutes are sorted within a day, so the window is a sub-range
+        first = bisect_left(calendar.minutes, earliest, start, stop)
+        last = bisect_right(calendar.minutes, latest, start, stop)
+        yield from range(first, last)
+
+
+def _free(calendar: SlotCalendar, is_free: IsFree, query: SlotQuery) -> Iterator[int]:
+    return (i for i in _candidates(calendar, query) if is_free(calendar, i))
+
+
+def find_free_slots(calendar: SlotCalendar, is_free: IsFree, query: SlotQuery) -> list[int]:
+    """Indices of free slots matching `query`, earliest first, at most `query.limit`."""
+    return list(islice(_free(calendar, is_free, query), query.limit))
+
+
+def search_free_slots(
+    calendars: list[SlotCalendar],
+    is_free: IsFree,
+    query: SlotQuery,
+) -> list[tuple[SlotCalendar, int]]:
+    """Free slots matching `query` across doctors, earliest first, at most `query.limit`.
+
+    Each calendar is scanned lazily and the streams are merged, so with a limit only
+    the first few candidates of each doctor are checked. Calendars must share
+    `from_date`; ties go to the doctor listed first.
+    """
+    def stream(n: int, calendar: SlotCalendar) -> Iterator[tuple[int, int, int]]:
+        for i in _free(calendar, is_free, query):
+            yield calendar.datetime_minutes(i), n, i
+
+    merged = heapq.merge(*(stream(n, calendar) for n, calendar in enumerate(calendars)))
+    return [(calendars[n], i) for _, n, i in islice(merged, query.limit)]
+
+
+def nearest_free_slots(
+    calendar: SlotCalendar,
+    is_free: IsFree,
+    slot_date: date,
+    minute: int,
+    count: int = 3,
+) -> list[int]:
+    """The `count` free slots closest in time to (slot_date, minute), closest first.
+
+    Walks outwards from the requested position in both directions, so only the
+    neighbourhood of the request is examined.
+    """
+    target = (slot_date - calendar.from_date).days * 24 * 60 + minute
+    right = calendar.position(slot_date, minute)
+    left = right - 1
+    found: list[int] = []
+    while len(found) < count and (left >= 0 or right < len(calendar)):
+        take_left = right >= len(calendar) or (
+            left >= 0 and target - calendar.datetime_minutes(left) <= calendar.datetime_minutes(right) - target
+        )
+        i = left if take_left else right
+        if take_left:
+            left -= 1
+        else:
+            right += 1
+        if is_free(calendar, i):
+            found.append(i)
+    return found
+
+
+def nearest_across(
+    calendars: list[SlotCalendar],
+    is_free: IsFree,
+    slot_date: date,
+    minute: int,
+    count: int = 3,
+) -> list[tuple[SlotCalendar, int]]:
+    """The `count` free slots closest to (slot_date, minute) across doctors, closest first."""
+    found = []
+    for n, calendar in enumerate(calendars):
+        target = (slot_date - calendar.from_date).days * 24 * 60 + minute
+        for i in nearest_free_slots(calendar, is_free, slot_date, minute, count):
+            at = calendar.datetime_minutes(i)
+            found.append((abs(at - target), at, n, i))
+    return [(calendars[n], i) for *_, n, i in sorted(found)[:count]]
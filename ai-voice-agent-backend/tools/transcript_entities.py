@@ -0,0 +1,70 @@
+import re
+from datetime import date, timedelta
+from tools.phone import normalize_phone
+
+# Digits with the separators speech-to-text puts in phone numbers: "+1 (555) 123-4567"
+_PHONE = re.compile(r"\+?\d[\d\s().-]*\d")
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\.?\s+{_DAY}\b", re.IGNORECASE)
+_DAY_OF_MONTH = re.compile(rf"\b(?:the\s+)?{_DAY}\s+of\s+{_MONTH}\b", re.IGNORECASE)
+_RELATIVE = re.compile(r"\b(today|tomorrow)\b", re.IGNORECASE)
+
+
+def _settled(text: str, end: int, final: bool) -> bool:
+    """Whether a match ending at `end` is complete: an interim transcript ending in it may
+    still be extended ("555 123 45" -> "555 123 4567", "May 2" -> "May 21")."""
+    return final or bool(text[end:].strip())
+
+
+def find_phone(text: str, final: bool = False) -> str | None:
+    """The last complete phone number (10-15 digits) in a transcript, in E.164, or None."""
+    for match in reversed(list(_PHONE.finditer(text))):
+        digits = re.sub(r"\D", "", match.group())
+        if 10 <= len(digits) <= 15 and _settled(text, match.end(), final):
+            return normalize_phone(match.group())
+    return None
+
+
+def _month_day(month: str, day: str, today: date) -> date | None:
+    """The next `month` `day` on or after today (this year or next), or None if there is no such day."""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, _MONTHS[month[:3].lower()], int(day))
+        except ValueError:
+            return None
+        if candidate >= today:
+            return candidate
+    return None
+
+
+def find_date(text: str, today: date, final: bool = False) -> str | None:
+    """The last explicit date in a transcript as YYYY-MM-DD, or None.
+
+    Recognizes ISO dates, "October 20th", "the 20th of October", "today" and
+    "tomorrow". Weekdays and "next week" are left to the LLM.
+    """
+    found: list[tuple[int, date]] = []
+    for match in _ISO_DATE.finditer(text):
+        try:
+            found.append((match.start(), date(*map(int, match.groups()))))
+        except ValueError:
+            pass
+    for match in _MONTH_DAY.finditer(text):
+        day = _month_day(match.group(1), match.group(2), today)
+        if day and _settled(text, match.end(), final):
+            found.append((match.start(), day))
+    for match in _DAY_OF_MONTH.finditer(text):
+        day = _month_day(match.group(2), match.group(1), today)
+        if day:
+            found.append((match.start(), day))
+    for match in _RELATIVE.finditer(text):
+        offset = 1 if match.group(1).lower() == "tomorrow" else 0
+        found.append((match.start(), today + timedelta(days=offset)))
+    return max(found)[1].isoformat() if found else None
@@ -3,29 +3,41 @@
 import { useCallback, useState } from "react";
 import { ToolCallEvent } from "../lib/types";
 
+function applyEvent(
+  prev: ToolCallEvent[],
+  event: ToolCallEvent
+): ToolCallEvent[] {
+  if (event.status === "completed" || event.status === "error") {
+    // Replace the matching "started" entry with the completed one
+    const idx = prev.findIndex(
+      (tc) => tc.tool_name === event.tool_name && tc.status === "started"
+    );
+    if (idx !== -1) {
+      const updated = [...prev];
+      updated[idx] = event;
+      return updated;
+    }
+  }
+  // Append new event (started, or completed without a matching started)
+  return [...prev, event];
+}
+
 export function useToolCalls() {
   const [toolCalls, setToolCalls] = useState<ToolCallEvent[]>([]);
 
   const onDataReceived = useCallback((payload: Uint8Array) => {
     try {
       const text = new TextDecoder().decode(payload);
-      const event: ToolCallEvent = JSON.parse(text);
+      // The agent coalesces bursts: a frame is one event or an array of events
+      const parsed: ToolCallEvent | ToolCallEvent[] = JSON.parse(text);
+      const events = Array.isArray(parsed) ? parsed : [parsed];
 
       setToolCalls((prev) => {
-        if (event.status === "completed" || event.status === "error") {
-          // Replace the matching "started" entry with the completed one
-          const idx = prev.findIndex(
-            (tc) =>
-              tc.tool_name === event.tool_name && tc.status === "started"
-          );
-          if (idx !== -1) {
-            const updated = [...prev];
-            updated[idx] = event;
-            return updated;
-          }
+        let next = prev;
+        for (const event of events) {
+          next = applyEvent(next, event);
         }
-        // Append new event (started, or completed without a matching started)
-        return [...prev, event];
+        return next;
       });
     } catch (e) {
       console.error("Failed to parse tool call event:", e);